@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 缓存过期策略与后台刷新
+软/硬 TTL (stale-while-revalidate)：超过软 TTL 的行照常返回并安排后台刷新，
+超过硬 TTL 才视为未命中；后台线程还按访问计数主动刷新最热的过期条目
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+import types
+import weakref
+from collections import Counter
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class CacheTTL:
+    """缓存有效期 (秒)：soft 之后返回旧数据并后台刷新，hard 之后不再返回"""
+    soft: float = 86400.0
+    hard: float = 7 * 86400.0
+    
+    def __post_init__(self):
+        if not 0 < self.soft <= self.hard:
+            raise ValueError("缓存有效期需满足 0 < soft <= hard")
+    
+    def is_stale(self, updated: datetime) -> bool:
+        """是否超过软 TTL"""
+        return (datetime.now() - updated).total_seconds() > self.soft
+    
+    def is_expired(self, updated: datetime) -> bool:
+        """是否超过硬 TTL"""
+        return (datetime.now() - updated).total_seconds() > self.hard
+
+
+# 各缓存表的默认有效期 (管理器的 ttls 参数可按表覆盖)
+DEFAULT_TTLS: Mapping[str, CacheTTL] = {
+    "proteins": CacheTTL(soft=86400.0, hard=7 * 86400.0),
+}
+
+# 后台刷新每批的条目数
+REFRESH_BATCH_SIZE = 50
+
+# 主动刷新最热过期条目的默认间隔 (秒)
+DEFAULT_REFRESH_INTERVAL = 300.0
+
+# 访问计数在内存中累计的次数上限，达到后写入数据库
+ACCESS_FLUSH_THRESHOLD = 256
+
+
+def ensure_access_columns(cursor: sqlite3.Cursor):
+    """为 proteins 表补加访问计数列与索引 (旧缓存文件自动迁移)"""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(proteins)")}
+    if "access_count" not in columns:
+        cursor.execute("ALTER TABLE proteins ADD COLUMN access_count INTEGER NOT NULL DEFAULT 0")
+    if "last_accessed" not in columns:
+        cursor.execute("ALTER TABLE proteins ADD COLUMN last_accessed REAL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_access_count ON proteins(access_count)")
+
+
+def as_timestamp(value) -> float:
+    """
+    把缓存中的时间值转换为时间戳
+    
+    旧版本以 str(datetime) 文本写入 last_updated，按本地时间解析；
+    无法解析的值 (包括 NULL) 返回 0，即视为早已过期。
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return 0.0
+
+
+def migrate_legacy_timestamps(cursor: sqlite3.Cursor) -> int:
+    """把旧缓存文件中非数值的 last_updated/cache_expiry 转换为时间戳，返回转换的行数"""
+    rows = cursor.execute(
+        "SELECT rowid, last_updated, cache_expiry FROM proteins "
+        "WHERE typeof(last_updated) NOT IN ('integer', 'real') "
+        "OR typeof(cache_expiry) NOT IN ('integer', 'real')").fetchall()
+    # 只更新时间列，不触发全文索引
+    cursor.executemany("UPDATE proteins SET last_updated = ?, cache_expiry = ? WHERE rowid = ?",
+                       [(as_timestamp(updated), as_timestamp(expiry), rowid) for rowid, updated, expiry in rows])
+    return len(rows)
+
+
+class AccessCounter:
+    """
+    访问计数缓冲
+    
+    缓存命中只在内存中累加，不为每次读取开写事务；由调用方在 record 返回 True
+    (累计达到 flush_threshold 次) 或选择热点条目之前调用 drain 一次性写入。
+    """
+    
+    def __init__(self, flush_threshold: int = ACCESS_FLUSH_THRESHOLD):
+        self.flush_threshold = flush_threshold
+        self._counts: Counter = Counter()
+        self._total = 0
+        self._lock = threading.Lock()
+    
+    def record(self, uniprot_ids: Iterable[str]) -> bool:
+        """记录一次访问，返回是否应当写入数据库"""
+        with self._lock:
+            for uniprot_id in uniprot_ids:
+                self._counts[uniprot_id] += 1
+                self._total += 1
+            return self._total >= self.flush_threshold
+    
+    def drain(self) -> List[Tuple[int, str]]:
+        """取出并清空累计的 (次数, ID)"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._total = 0
+        return [(count, uniprot_id) for uniprot_id, count in counts.items()]
+
+
+@dataclass
+class RefreshStats:
+    """后台刷新统计"""
+    scheduled: int = 0
+    refreshed: int = 0
+    proactive: int = 0
+    failed: int = 0
+    
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def weak_method(method: Callable, default: Any) -> Callable:
+    """
+    只弱引用绑定方法的实例：实例被回收后调用直接返回 default
+    
+    共享的刷新器可能比创建它的管理器活得更久，用它包装管理器的回调，
+    刷新器不会让管理器一直存活。普通函数原样返回。
+    """
+    if not isinstance(method, types.MethodType):
+        return method
+    ref = weakref.WeakMethod(method)
+    
+    def call(*args):
+        bound = ref()
+        return default if bound is None else bound(*args)
+    return call
+
+
+class CacheRefresher:
+    """
+    后台刷新工作线程
+    
+    schedule(ids) 把已软过期的 ID 加入待刷新集合 (重复的 ID 只保留一次)，
+    工作线程按需启动，每次取出 batch_size 个调用 refresh(ids)，队列清空后退出。
+    start(interval) 使线程常驻：除处理安排的刷新外，每 interval 秒调用 select_hot()
+    取访问最多的过期条目主动刷新，热门条目在用户请求之前就已更新。
+    refresh(ids) 返回成功刷新的条目数，其余计入 stats.failed；refresh 抛出的异常
+    同样只计入 stats.failed，不会终止线程。
+    """
+    
+    def __init__(self, refresh: Callable[[List[str]], int],
+                 select_hot: Optional[Callable[[int], List[str]]] = None,
+                 batch_size: int = REFRESH_BATCH_SIZE):
+        self.refresh = refresh
+        self.select_hot = select_hot
+        self.batch_size = batch_size
+        self.access = AccessCounter()
+        self.stats = RefreshStats()
+        self._pending: Dict[str, None] = {}
+        self._interval: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+    
+    def bind(self, refresh: Callable[[List[str]], int],
+             select_hot: Optional[Callable[[int], List[str]]] = None):
+        """替换刷新回调 (共享刷新器由最近创建的管理器执行刷新)"""
+        with self._lock:
+            self.refresh = refresh
+            self.select_hot = select_hot
+    
+    def schedule(self, uniprot_ids: Iterable[str]) -> int:
+        """安排后台刷新，返回新加入的 ID 数"""
+        with self._lock:
+            added = 0
+            for uniprot_id in uniprot_ids:
+                if uniprot_id not in self._pending:
+                    self._pending[uniprot_id] = None
+                    added += 1
+            self.stats.scheduled += added
+            if added:
+                self._ensure_thread()
+        if added:
+            self._wakeup.set()
+        return added
+    
+    def pending(self) -> int:
+        """等待刷新的 ID 数"""
+        with self._lock:
+            return len(self._pending)
+    
+    def start(self, interval: float = DEFAULT_REFRESH_INTERVAL):
+        """启动常驻线程，每 interval 秒主动刷新最热的过期条目"""
+        if interval <= 0:
+            raise ValueError("interval 必须为正数")
+        with self._lock:
+            self._interval = interval
+            self._stopped.clear()
+            self._ensure_thread()
+        self._wakeup.set()
+    
+    def stop(self, timeout: Optional[float] = None):
+        """停止工作线程 (未处理的 ID 保留，之后的 schedule 不再启动线程，直到再次 start)"""
+        with self._lock:
+            self._stopped.set()
+            self._interval = None
+            thread = self._thread
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout)
+    
+    def run_pending(self) -> int:
+        """在当前线程处理所有已安排的刷新，返回成功刷新的 ID 数"""
+        refreshed = 0
+        while True:
+            with self._lock:
+                batch = list(itertools.islice(self._pending, self.batch_size))
+                for uniprot_id in batch:
+                    del self._pending[uniprot_id]
+            if not batch:
+                return refreshed
+            refreshed += self._refresh(batch)
+    
+    def refresh_hot(self) -> int:
+        """主动刷新访问最多的过期条目，返回成功刷新的 ID 数"""
+        if self.select_hot is None:
+            return 0
+        uniprot_ids = self.select_hot(self.batch_size)
+        refreshed = self._refresh(uniprot_ids) if uniprot_ids else 0
+        with self._lock:
+            self.stats.proactive += refreshed
+        return refreshed
+    
+    def _refresh(self, uniprot_ids: List[str]) -> int:
+        try:
+            refreshed = self.refresh(uniprot_ids)
+        except Exception as e:
+            print(f"缓存后台刷新错误: {e}")
+            refreshed = 0
+        with self._lock:
+            self.stats.refreshed += refreshed
+            self.stats.failed += len(uniprot_ids) - refreshed
+        return refreshed
+    
+    def _ensure_thread(self):
+        """没有存活的工作线程时启动一个 (调用方持有锁)"""
+        if self._stopped.is_set():
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="protein-cache-refresh", daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        next_proactive = time.monotonic()
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            self.run_pending()
+            
+            interval = self._interval
+            if interval is not None and time.monotonic() >= next_proactive:
+                self.refresh_hot()
+                next_proactive = time.monotonic() + interval
+            
+            with self._lock:
+                if self._interval is None and not self._pending:
+                    # 按需模式下队列已空：退出，下一次 schedule 重新启动线程
+                    self._thread = None
+                    return
+            timeout = max(next_proactive - time.monotonic(), 0.0) if self._interval is not None else None
+            self._wakeup.wait(timeout)
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+
+
+_shared_refreshers: Dict[Tuple[str, str, Tuple[Tuple[str, CacheTTL], ...]], CacheRefresher] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_refresher(db_path: str, namespace: str, factory: Callable[[], CacheRefresher],
+                     ttls: Optional[Mapping[str, CacheTTL]] = None) -> CacheRefresher:
+    """
+    按 (命名空间, 缓存数据库路径, 有效期) 共享的后台刷新器
+    
+    同一缓存文件、相同有效期的同类管理器实例共用一个待刷新集合、访问计数和工作线程；
+    有效期不同的管理器各用各的刷新器。刷新器由第一个请求它的管理器通过 factory 创建。
+    ":memory:" 每次新建。
+    """
+    if db_path == ":memory:":
+        return factory()
+    key = (namespace, os.path.abspath(db_path), tuple(sorted((ttls or {}).items())))
+    with _shared_lock:
+        refresher = _shared_refreshers.get(key)
+        if refresher is None:
+            refresher = factory()
+            _shared_refreshers[key] = refresher
+        return refresher
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 列式导出模块
+将嵌套的预测结果展开为固定类型的列 (comp_A_pct、cat_polar_pct、helix_tendency 等)，
+按记录批写出 Parquet 或 Arrow IPC 文件，供 pandas/Polars 直接加载
+
+Parquet/Arrow 写出依赖可选的 pyarrow (pip install pyarrow)，展开逻辑本身不依赖它。
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .predictor import AA_CATEGORIES, AMINO_ACIDS
+except ImportError:  # 作为顶层模块导入时 (ui/ 将 ai/ 加入 sys.path)
+    from predictor import AA_CATEGORIES, AMINO_ACIDS
+
+
+# 分类列取自预测器共用的 AA_CATEGORIES，分类增删或改名时导出列随之变化
+AA_CATEGORY_NAMES = tuple(AA_CATEGORIES)
+
+# 预测结果中的顶层标量字段
+_SCALAR_FIELDS = [
+    ("sequence_length", "int32"),
+    ("stability_score", "float64"),
+    ("molecular_weight", "float64"),
+    ("instability_index", "float64"),
+    ("hydrophobicity", "float64"),
+    ("charge_balance", "float64"),
+    ("average_volume", "float64"),
+    ("flexibility_index", "float64"),
+    ("isoelectric_point", "float64"),
+    ("disorder_tendency", "float64"),
+]
+
+# 展开后的列 (列名, 类型)；错误结果中缺失的列写为空值
+RESULT_COLUMNS: List[Tuple[str, str]] = (
+    [("id", "string"), ("offset", "int64"), ("error", "string")]
+    + _SCALAR_FIELDS
+    + [column for aa in AMINO_ACIDS for column in ((f"comp_{aa}_count", "int32"), (f"comp_{aa}_pct", "float64"))]
+    + [column for name in AA_CATEGORY_NAMES
+       for column in ((f"cat_{name}_count", "int32"), (f"cat_{name}_pct", "float64"))]
+    + [("helix_tendency", "float64"), ("sheet_tendency", "float64"), ("turn_tendency", "float64")]
+    + [("thermostability_score", "float64"), ("cysteine_content", "float64"),
+       ("potential_disulfide_bonds", "int32")]
+)
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+
+def flatten_result(result: Dict[str, Any], record_id: Optional[str] = None,
+                   offset: Optional[int] = None) -> Dict[str, Any]:
+    """将一条预测结果展开为 RESULT_COLUMNS 中的列 (不含能量图与能量路径)"""
+    row: Dict[str, Any] = {"id": record_id, "offset": offset, "error": result.get("error")}
+    
+    for name, column_type in _SCALAR_FIELDS:
+        value = result.get(name)
+        if value is not None:
+            value = int(value) if column_type == "int32" else float(value)
+        row[name] = value
+    
+    composition = result.get("amino_acid_composition", {})
+    for aa in AMINO_ACIDS:
+        entry = composition.get(aa)
+        row[f"comp_{aa}_count"] = entry["count"] if entry else None
+        row[f"comp_{aa}_pct"] = float(entry["percentage"]) if entry else None
+    
+    distribution = result.get("amino_acid_distribution", {})
+    for name in AA_CATEGORY_NAMES:
+        entry = distribution.get(name)
+        row[f"cat_{name}_count"] = entry["count"] if entry else None
+        row[f"cat_{name}_pct"] = float(entry["percentage"]) if entry else None
+    
+    secondary = result.get("secondary_structure_tendency", {})
+    for name in ("helix_tendency", "sheet_tendency", "turn_tendency"):
+        row[name] = float(secondary[name]) if name in secondary else None
+    
+    thermostability = result.get("thermostability_indicators", {})
+    for name in ("thermostability_score", "cysteine_content"):
+        row[name] = float(thermostability[name]) if name in thermostability else None
+    row["potential_disulfide_bonds"] = thermostability.get("potential_disulfide_bonds")
+    
+    return row
+
+
+def _require_pyarrow():
+    """导入可选依赖 pyarrow"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("列式导出需要安装 pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def arrow_schema(include_profile: bool = False):
+    """RESULT_COLUMNS 对应的 Arrow schema；include_profile 时追加 list<float64> 能量路径列"""
+    pa = _require_pyarrow()
+    fields = [pa.field(name, getattr(pa, column_type)()) for name, column_type in RESULT_COLUMNS]
+    if include_profile:
+        fields.append(pa.field("energy_profile", pa.list_(pa.float64())))
+    return pa.schema(fields)
+
+
+class ColumnarWriter:
+    """
+    按记录批写出 Parquet / Arrow IPC
+    
+    结果先按列缓存，达到 batch_size 条时转换为一个 RecordBatch 写出，
+    内存占用与批大小成正比，与结果总数无关。Arrow IPC 使用文件格式，
+    可用 pyarrow.memory_map / polars.read_ipc(memory_map=True) 零拷贝读取。
+    """
+    
+    def __init__(self, path: str, file_format: str = "parquet", batch_size: int = 8192,
+                 include_profile: bool = False, compression: str = "zstd"):
+        if file_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"未知的列式格式: {file_format}，可选: {', '.join(COLUMNAR_FORMATS)}")
+        if batch_size <= 0:
+            raise ValueError("batch_size 必须为正整数")
+        self._pa = _require_pyarrow()
+        self.path = path
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.include_profile = include_profile
+        self.schema = arrow_schema(include_profile)
+        self.rows_written = 0
+        self._columns: Dict[str, List[Any]] = {field.name: [] for field in self.schema}
+        self._pending = 0
+        
+        if file_format == "parquet":
+            self._writer = self._pa.parquet.ParquetWriter(path, self.schema, compression=compression)
+        else:
+            self._sink = self._pa.OSFile(path, 'wb')
+            self._writer = self._pa.ipc.new_file(self._sink, self.schema)
+    
+    def write(self, result: Dict[str, Any], record_id: Optional[str] = None,
+              offset: Optional[int] = None):
+        """追加一条预测结果"""
+        row = flatten_result(result, record_id, offset)
+        for name, _ in RESULT_COLUMNS:
+            self._columns[name].append(row[name])
+        if self.include_profile:
+            self._columns["energy_profile"].append(result.get("energy_profile") or [])
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+    
+    def write_all(self, results: Iterable[Dict[str, Any]]):
+        """追加多条预测结果 (无 id)"""
+        for result in results:
+            self.write(result)
+    
+    def flush(self):
+        """将缓存的行作为一个记录批写出"""
+        if not self._pending:
+            return
+        batch = self._pa.RecordBatch.from_arrays(
+            [self._pa.array(self._columns[field.name], type=field.type) for field in self.schema],
+            schema=self.schema)
+        self._writer.write_batch(batch)
+        self.rows_written += self._pending
+        self._pending = 0
+        for values in self._columns.values():
+            values.clear()
+    
+    def close(self):
+        """写出剩余的行并关闭文件"""
+        self.flush()
+        self._writer.close()
+        if self.file_format == "arrow":
+            self._sink.close()
+    
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_results(results: Iterable[Dict[str, Any]], path: str, file_format: str = "parquet",
+                  batch_size: int = 8192, include_profile: bool = False) -> int:
+    """将预测结果写出为列式文件，返回写出的行数"""
+    with ColumnarWriter(path, file_format, batch_size, include_profile) as writer:
+        writer.write_all(results)
+    return writer.rows_written
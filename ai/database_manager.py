@@ -9,11 +9,40 @@ import requests
 import sqlite3
 import json
 import time
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import os
 
+try:
+    from .cache_refresh import (DEFAULT_REFRESH_INTERVAL, DEFAULT_TTLS, CacheRefresher, CacheTTL, as_timestamp,
+                                ensure_access_columns, migrate_legacy_timestamps, shared_refresher,
+                                weak_method)
+    from .http_client import shared_client
+    from .protein_search import UPSERT_SQL, create_search_index, search_cached_rows
+    from .single_flight import shared_flight
+    from .sqlite_pool import shared_pool
+    from .uniprot_batch import BATCH_SIZE, BATCH_WORKERS, fetch_accession_batches
+except ImportError:  # 作为顶层模块导入时 (ui/ 将 ai/ 加入 sys.path)
+    from cache_refresh import (DEFAULT_REFRESH_INTERVAL, DEFAULT_TTLS, CacheRefresher, CacheTTL, as_timestamp,
+                               ensure_access_columns, migrate_legacy_timestamps, shared_refresher,
+                               weak_method)
+    from http_client import shared_client
+    from protein_search import UPSERT_SQL, create_search_index, search_cached_rows
+    from single_flight import shared_flight
+    from sqlite_pool import shared_pool
+    from uniprot_batch import BATCH_SIZE, BATCH_WORKERS, fetch_accession_batches
+
+# 批量获取时并发请求 UniProt 的线程数上限
+DEFAULT_FETCH_WORKERS = 8
+
+# 未命中数达到该值时改用批量 accession 检索，而不是逐条请求
+BATCH_FETCH_THRESHOLD = 20
+
+# 批量读取缓存时每条查询的 ID 数 (低于旧版 SQLite 999 个绑定参数的上限)
+CACHE_LOOKUP_CHUNK = 500
+
 @dataclass
 class ProteinInfo:
     """蛋白质信息数据类"""
@@ -32,20 +61,40 @@ class ProteinInfo:
 class ProteinDatabaseManager:
     """蛋白质数据库管理器"""
     
-    def __init__(self, cache_db_path: str = "protein_cache.db"):
+    def __init__(self, cache_db_path: str = "protein_cache.db",
+                 ttls: Optional[Mapping[str, CacheTTL]] = None):
         self.cache_db_path = cache_db_path
+        # 同一缓存文件的管理器共用一个连接池 (WAL + 长连接 + 语句缓存)
+        self._pool = shared_pool(cache_db_path)
+        # 外部 API 请求共用 keep-alive 连接、超时与退避重试
+        self.http = shared_client()
+        # 并发的相同搜索/ID 查询共享一次在途获取 (flights.stats 记录合并次数)
+        self.flights = shared_flight(cache_db_path, type(self).__name__)
+        # 各缓存表的软/硬有效期：超过软有效期照常返回并后台刷新，超过硬有效期视为未命中
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.protein_ttl = self.ttls["proteins"]
         self.uniprot_base_url = "https://rest.uniprot.org"
         self.pdb_base_url = "https://data.rcsb.org/rest/v1"
         self.alphafold_base_url = "https://alphafold.ebi.ac.uk/api"
         
         # 初始化本地缓存数据库
         self._init_cache_database()
+        
+        # 软过期条目的后台刷新 (同一缓存文件、相同有效期的同类管理器共用待刷新集合、访问计数与工作线程)；
+        # 回调只弱引用管理器，共享的刷新器改由最新的管理器执行刷新，不会让旧管理器一直存活
+        refresh = weak_method(self._refresh_proteins, 0)
+        select_hot = weak_method(self._select_hot_expired, [])
+        self.refresher = shared_refresher(cache_db_path, type(self).__name__,
+                                          lambda: CacheRefresher(refresh, select_hot), ttls=self.ttls)
+        self.refresher.bind(refresh, select_hot)
     
     def _init_cache_database(self):
         """初始化本地缓存数据库"""
-        conn = sqlite3.connect(self.cache_db_path)
-        cursor = conn.cursor()
-        
+        with self._pool.transaction() as conn:
+            self._create_tables(conn.cursor())
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """创建缓存表与索引"""
         # 创建蛋白质信息表
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS proteins (
@@ -72,39 +121,140 @@ class ProteinDatabaseManager:
         CREATE INDEX IF NOT EXISTS idx_organism ON proteins(organism)
         ''')
         
-        conn.commit()
-        conn.close()
+        # 访问计数列 (旧缓存文件自动补加)，用于主动刷新最热的过期条目
+        ensure_access_columns(cursor)
+        # 旧版本以文本保存的时间列转换为时间戳 (无法解析的视为已过期)
+        migrate_legacy_timestamps(cursor)
+        
+        # 名称/生物体/功能全文索引 (SQLite 未编译 FTS5 时退回 LIKE)
+        self._fts_enabled = create_search_index(cursor)
     
     def search_protein_by_name(self, name: str, organism: str = None) -> List[ProteinInfo]:  # pyright: ignore[reportArgumentType]
         """根据蛋白质名称搜索"""
         # 先检查本地缓存
         cached_results = self._get_cached_proteins(name, organism)
+        if cached_results:
+            self._record_hits(cached_results)
+            return cached_results
+        
+        # 从UniProt搜索 (并发的相同搜索合并为一次请求，每个调用方得到各自的列表)
+        return list(self.flights.do(("search", name, organism), self._search_and_cache, name, organism))
+    
+    def _search_and_cache(self, name: str, organism: Optional[str] = None) -> List[ProteinInfo]:
+        """缓存未命中时从UniProt搜索并缓存结果"""
+        # 刚结束的同一搜索可能已经写入缓存
+        cached_results = self._get_cached_proteins(name, organism)
         if cached_results:
             return cached_results
         
-        # 从UniProt搜索
         uniprot_results = self._search_uniprot(name, organism)
         
-        # 缓存结果
-        for protein in uniprot_results:
-            self._cache_protein(protein)
+        # 缓存结果 (单个事务批量写入)
+        self.cache_proteins(uniprot_results)
         
         return uniprot_results
     
     def get_protein_by_uniprot_id(self, uniprot_id: str) -> Optional[ProteinInfo]:
         """根据UniProt ID获取蛋白质信息"""
-        # 检查缓存
+        # 检查缓存 (超过软有效期的旧数据照常返回，后台刷新)
         cached = self._get_cached_protein_by_id(uniprot_id)
-        if cached and not self._is_cache_expired(cached.last_updated):
+        if cached:
+            self._record_hits([cached])
+            return cached
+        
+        # 从UniProt获取详细信息 (并发的相同查询合并为一次请求)
+        return self.flights.do(("id", uniprot_id), self._fetch_and_cache, uniprot_id)
+    
+    def _fetch_and_cache(self, uniprot_id: str) -> Optional[ProteinInfo]:
+        """缓存未命中时从UniProt获取详细信息并缓存"""
+        # 刚结束的同一查询可能已经写入缓存 (只接受未超过软有效期的行)
+        cached = self._get_cached_protein_by_id(uniprot_id)
+        if cached and not self._is_cache_stale(cached.last_updated):
             return cached
         
-        # 从UniProt获取详细信息
         protein_info = self._fetch_uniprot_details(uniprot_id)
         if protein_info:
             self._cache_protein(protein_info)
         
         return protein_info
     
+    def get_proteins_by_uniprot_ids(self, uniprot_ids: Iterable[str],
+                                    max_workers: int = DEFAULT_FETCH_WORKERS) -> List[ProteinInfo]:
+        """
+        批量获取蛋白质信息，结果按输入顺序 (重复 ID 只保留一次)，获取失败的 ID 省略
+        
+        缓存命中由一次 IN 查询读出；未命中的 ID 由线程池并发请求 UniProt
+        (最多 max_workers 个同时进行，同一主机还受共享 HTTP 客户端的并发上限约束)，
+        总延迟约为最慢的一次往返而不是各次往返之和；获取到的结果在一个事务中写回缓存。
+        未命中不少于 BATCH_FETCH_THRESHOLD 个时先用批量 accession 检索，
+        批量结果中没有的 ID (例如次要 accession) 再逐条请求。
+        """
+        ids = list(dict.fromkeys(uniprot_ids))
+        found = self._get_cached_proteins_by_ids(ids)
+        if found:
+            self._record_hits(found.values())
+        
+        misses = [uniprot_id for uniprot_id in ids if uniprot_id not in found]
+        if misses:
+            # 与并发的单个/批量查询中相同的 ID 合并 (例如多个会话同时加载热门列表)
+            found.update(self._fetch_coalesced(misses, max_workers))
+        
+        return [found[uniprot_id] for uniprot_id in ids if uniprot_id in found]
+    
+    def _fetch_coalesced(self, uniprot_ids: List[str], max_workers: int) -> Dict[str, ProteinInfo]:
+        """
+        按 ID 合并在途获取，返回 ID -> 蛋白质 (获取失败的 ID 省略)
+        
+        每个 ID 与 get_protein_by_uniprot_id 共用 ("id", ID) 键：已由其他单个或批量查询
+        获取中的 ID 等待其结果，其余的 ID 由本调用一次 _fetch_and_cache_many 获取。
+        """
+        def fetch(keys):
+            fetched = self._fetch_and_cache_many([key[1] for key in keys], max_workers)
+            return {("id", uniprot_id): protein for uniprot_id, protein in fetched.items()}
+        
+        results = self.flights.do_many([("id", uniprot_id) for uniprot_id in uniprot_ids], fetch)
+        return {key[1]: protein for key, protein in results.items() if protein}
+    
+    def _fetch_and_cache_many(self, misses: List[str], max_workers: int) -> Dict[str, ProteinInfo]:
+        """获取缓存未命中的多个ID并在一个事务中写回，返回 请求的ID -> 蛋白质"""
+        # 刚结束的同一批量查询可能已经写入缓存 (只接受未超过软有效期的行，后台刷新也经过这里)
+        cached = {uniprot_id: protein for uniprot_id, protein in self._get_cached_proteins_by_ids(misses).items()
+                  if not self._is_cache_stale(protein.last_updated)}
+        misses = [uniprot_id for uniprot_id in misses if uniprot_id not in cached]
+        fetched = {}
+        if len(misses) >= BATCH_FETCH_THRESHOLD:
+            for batch in fetch_accession_batches(self.http, self.uniprot_base_url, misses):
+                if batch.error:
+                    print(f"UniProt批量获取错误: {batch.error}")
+                for protein in map(self._entry_to_protein, batch.entries):
+                    fetched[protein.uniprot_id] = protein
+            misses = [uniprot_id for uniprot_id in misses if uniprot_id not in fetched]
+        if misses:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(misses))) as executor:
+                results = executor.map(self._fetch_uniprot_details, misses)
+                fetched.update((uniprot_id, protein) for uniprot_id, protein in zip(misses, results) if protein)
+        if fetched:
+            self.cache_proteins(fetched.values())
+        
+        return {**cached, **fetched}
+    
+    def warm_cache(self, uniprot_ids: Iterable[str], batch_size: int = BATCH_SIZE,
+                   max_workers: int = BATCH_WORKERS) -> int:
+        """
+        预热缓存：按 batch_size 个 accession 一次检索获取并写入缓存，返回写入的条数
+        
+        uniprot_ids 可以是生成器；请求只包含缓存需要的字段，响应逐条解析，
+        每批完成后立即在一个事务中写入，内存占用只与批大小和并发批次数有关。
+        获取失败的批次打印错误后跳过 (已解析的条目照常写入)。
+        """
+        written = 0
+        for batch in fetch_accession_batches(self.http, self.uniprot_base_url, uniprot_ids,
+                                             batch_size=batch_size, max_workers=max_workers):
+            if batch.error:
+                print(f"UniProt批量获取错误: {batch.error}")
+            written += self.cache_proteins(map(self._entry_to_protein, batch.entries))
+        return written
+    
     def get_protein_structure(self, uniprot_id: str) -> Optional[Dict]:
         """获取蛋白质3D结构信息"""
         protein_info = self.get_protein_by_uniprot_id(uniprot_id)
@@ -134,7 +284,7 @@ class ProteinDatabaseManager:
         }
         
         try:
-            response = requests.get(f"{self.uniprot_base_url}/uniprotkb/search", params=params)
+            response = self.http.get(f"{self.uniprot_base_url}/uniprotkb/search", params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -168,47 +318,50 @@ class ProteinDatabaseManager:
         }
         
         try:
-            response = requests.get(f"{self.uniprot_base_url}/uniprotkb/{uniprot_id}", params=params)
+            response = self.http.get(f"{self.uniprot_base_url}/uniprotkb/{uniprot_id}", params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            # 提取PDB IDs
-            pdb_ids = []
-            for db_ref in data.get('uniProtKBCrossReferences', []):
-                if db_ref.get('database') == 'PDB':
-                    pdb_ids.append(db_ref.get('id'))
-            
-            # 提取AlphaFold ID
-            alphafold_id = None
-            for db_ref in data.get('uniProtKBCrossReferences', []):
-                if db_ref.get('database') == 'AlphaFoldDB':
-                    alphafold_id = db_ref.get('id')
-                    break
-            
-            protein = ProteinInfo(
-                uniprot_id=data.get('primaryAccession', ''),
-                name=data.get('proteinDescription', {}).get('recommendedName', {}).get('fullName', {}).get('value', ''),
-                sequence=data.get('sequence', {}).get('value', ''),
-                organism=data.get('organism', {}).get('scientificName', ''),
-                function=data.get('proteinDescription', {}).get('recommendedName', {}).get('fullName', {}).get('value', ''),
-                length=data.get('sequence', {}).get('length', 0),
-                molecular_weight=data.get('mass', 0),
-                pdb_ids=pdb_ids,
-                alphafold_id=alphafold_id,
-                confidence_score=None,
-                last_updated=datetime.now()
-            )
-            
-            return protein
+            return self._entry_to_protein(response.json())
         
         except requests.RequestException as e:
             print(f"UniProt详情获取错误: {e}")
             return None
     
+    def _entry_to_protein(self, data: Dict) -> ProteinInfo:
+        """将UniProt条目JSON转换为ProteinInfo对象"""
+        # 提取PDB IDs
+        pdb_ids = []
+        for db_ref in data.get('uniProtKBCrossReferences', []):
+            if db_ref.get('database') == 'PDB':
+                pdb_ids.append(db_ref.get('id'))
+        
+        # 提取AlphaFold ID
+        alphafold_id = None
+        for db_ref in data.get('uniProtKBCrossReferences', []):
+            if db_ref.get('database') == 'AlphaFoldDB':
+                alphafold_id = db_ref.get('id')
+                break
+        
+        protein = ProteinInfo(
+            uniprot_id=data.get('primaryAccession', ''),
+            name=data.get('proteinDescription', {}).get('recommendedName', {}).get('fullName', {}).get('value', ''),
+            sequence=data.get('sequence', {}).get('value', ''),
+            organism=data.get('organism', {}).get('scientificName', ''),
+            function=data.get('proteinDescription', {}).get('recommendedName', {}).get('fullName', {}).get('value', ''),
+            length=data.get('sequence', {}).get('length', 0),
+            # UniProt JSON 的分子量位于 sequence.molWeight
+            molecular_weight=data.get('mass', data.get('sequence', {}).get('molWeight', 0)),
+            pdb_ids=pdb_ids,
+            alphafold_id=alphafold_id,
+            confidence_score=None,
+            last_updated=datetime.now()
+        )
+        
+        return protein
+    
     def _fetch_alphafold_structure(self, alphafold_id: str) -> Optional[Dict]:
         """获取AlphaFold结构信息"""
         try:
-            response = requests.get(f"{self.alphafold_base_url}/prediction/{alphafold_id}")
+            response = self.http.get(f"{self.alphafold_base_url}/prediction/{alphafold_id}")
             response.raise_for_status()
             return response.json()
         
@@ -219,7 +372,7 @@ class ProteinDatabaseManager:
     def _fetch_pdb_structure(self, pdb_id: str) -> Optional[Dict]:
         """获取PDB结构信息"""
         try:
-            response = requests.get(f"{self.pdb_base_url}/core/entry/{pdb_id}")
+            response = self.http.get(f"{self.pdb_base_url}/core/entry/{pdb_id}")
             response.raise_for_status()
             return response.json()
         
@@ -229,15 +382,24 @@ class ProteinDatabaseManager:
     
     def _cache_protein(self, protein: ProteinInfo):
         """缓存蛋白质信息"""
-        conn = sqlite3.connect(self.cache_db_path)
-        cursor = conn.cursor()
+        self.cache_proteins([protein])
+    
+    def cache_proteins(self, proteins: Iterable[ProteinInfo]) -> int:
+        """
+        批量缓存蛋白质信息，返回写入的行数
         
-        cursor.execute('''
-        INSERT OR REPLACE INTO proteins 
-        (uniprot_id, name, sequence, organism, function, length, molecular_weight, 
-         pdb_ids, alphafold_id, confidence_score, last_updated, cache_expiry)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        所有行在一个事务中由 executemany 写入 (只提交一次)；proteins 可以是生成器，
+        逐行转换、不整体载入内存，也适用于大批量离线导入。
+        """
+        # 硬有效期在写入时记入 cache_expiry 列 (从数据获取时间算起)，之后不随 ttls 配置变化
+        hard = self.protein_ttl.hard
+        rows = (self._protein_row(protein, protein.last_updated.timestamp() + hard) for protein in proteins)
+        with self._pool.transaction() as conn:
+            return conn.executemany(UPSERT_SQL, rows).rowcount
+    
+    def _protein_row(self, protein: ProteinInfo, cache_expiry: float) -> tuple:
+        """蛋白质信息对应的表行"""
+        return (
             protein.uniprot_id,
             protein.name,
             protein.sequence,
@@ -248,51 +410,54 @@ class ProteinDatabaseManager:
             json.dumps(protein.pdb_ids),
             protein.alphafold_id,
             protein.confidence_score,
-            protein.last_updated,
-            datetime.now().timestamp() + 86400  # 24小时过期
-        ))
-        
-        conn.commit()
-        conn.close()
+            protein.last_updated.timestamp(),  # 与 cache_expiry 一样存为时间戳
+            cache_expiry
+        )
     
     def _get_cached_proteins(self, name: str, organism: str = None) -> List[ProteinInfo]:  # pyright: ignore[reportArgumentType]
-        """从缓存获取蛋白质"""
-        conn = sqlite3.connect(self.cache_db_path)
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM proteins WHERE name LIKE ?"
-        params = [f"%{name}%"]
-        
-        if organism:
-            query += " AND organism LIKE ?"
-            params.append(f"%{organism}%")
+        """从缓存获取蛋白质 (全文索引按相关性排序，前缀匹配)"""
+        organism_filter = organism or None
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        with self._pool.connection() as conn:
+            results = search_cached_rows(conn, name, organism_filter) if self._fts_enabled else None
+            if results is None:
+                # 没有全文索引或名称中没有可检索的词时，退回子串匹配
+                query = "SELECT * FROM proteins WHERE name LIKE ?"
+                params = [f"%{name}%"]
+                if organism_filter:
+                    query += " AND organism LIKE ?"
+                    params.append(f"%{organism_filter}%")
+                results = conn.execute(query, params).fetchall()
         
         proteins = []
         for row in results:
-            if not self._is_cache_expired(datetime.fromtimestamp(row[11])):
-                protein = self._row_to_protein(row)
-                proteins.append(protein)
+            if not self._is_cache_expired(row[11]):
+                proteins.append(self._row_to_protein(row))
         
         return proteins
     
     def _get_cached_protein_by_id(self, uniprot_id: str) -> Optional[ProteinInfo]:
         """根据ID从缓存获取蛋白质"""
-        conn = sqlite3.connect(self.cache_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM proteins WHERE uniprot_id = ?", (uniprot_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT * FROM proteins WHERE uniprot_id = ?", (uniprot_id,)).fetchone()
         
-        if row and not self._is_cache_expired(datetime.fromtimestamp(row[11])):
+        if row and not self._is_cache_expired(row[11]):
             return self._row_to_protein(row)
         
         return None
     
+    def _get_cached_proteins_by_ids(self, uniprot_ids: List[str]) -> Dict[str, ProteinInfo]:
+        """根据多个ID从缓存获取蛋白质 (未超过硬有效期)，按 UniProt ID 索引"""
+        rows = []
+        with self._pool.connection() as conn:
+            for start in range(0, len(uniprot_ids), CACHE_LOOKUP_CHUNK):
+                chunk = uniprot_ids[start:start + CACHE_LOOKUP_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                rows += conn.execute(f"SELECT * FROM proteins WHERE uniprot_id IN ({placeholders})",
+                                     chunk).fetchall()
+        
+        return {row[0]: self._row_to_protein(row) for row in rows if not self._is_cache_expired(row[11])}
+    
     def _row_to_protein(self, row) -> ProteinInfo:
         """将数据库行转换为ProteinInfo对象"""
         return ProteinInfo(
@@ -306,12 +471,61 @@ class ProteinDatabaseManager:
             pdb_ids=json.loads(row[7]) if row[7] else [],
             alphafold_id=row[8],
             confidence_score=row[9],
-            last_updated=datetime.fromtimestamp(row[10])
+            last_updated=datetime.fromtimestamp(as_timestamp(row[10]))
         )
     
-    def _is_cache_expired(self, cache_time: datetime) -> bool:
-        """检查缓存是否过期"""
-        return (datetime.now() - cache_time).days > 1
+    def _is_cache_expired(self, cache_expiry: Optional[float]) -> bool:
+        """检查缓存行是否超过写入时记录的硬有效期 (cache_expiry 列，超过后不再返回)"""
+        return not cache_expiry or cache_expiry <= datetime.now().timestamp()
+    
+    def _is_cache_stale(self, cache_time: datetime) -> bool:
+        """检查缓存是否超过软有效期 (照常返回，后台刷新)"""
+        return self.protein_ttl.is_stale(cache_time)
+    
+    def _record_hits(self, proteins: Iterable[ProteinInfo]):
+        """记录缓存命中：累计访问计数，超过软有效期的条目安排后台刷新"""
+        proteins = list(proteins)
+        if self.refresher.access.record(protein.uniprot_id for protein in proteins):
+            self.flush_access_counts()
+        stale = [protein.uniprot_id for protein in proteins if self._is_cache_stale(protein.last_updated)]
+        if stale:
+            self.refresher.schedule(stale)
+    
+    def flush_access_counts(self) -> int:
+        """把内存中累计的访问计数在一个事务中写入 access_count 列，返回更新的行数"""
+        counts = self.refresher.access.drain()
+        if not counts:
+            return 0
+        now = datetime.now().timestamp()
+        try:
+            with self._pool.transaction() as conn:
+                return conn.executemany(
+                    "UPDATE proteins SET access_count = access_count + ?, last_accessed = ? WHERE uniprot_id = ?",
+                    [(count, now, uniprot_id) for count, uniprot_id in counts]).rowcount
+        except sqlite3.Error as e:
+            # 访问计数只影响主动刷新的优先级，写入失败不影响读取
+            print(f"访问计数写入错误: {e}")
+            return 0
+    
+    def _refresh_proteins(self, uniprot_ids: List[str]) -> int:
+        """后台刷新：重新获取并写回缓存，返回成功刷新的条目数"""
+        # 与同步查询中相同的 ID 合并；刚被其他调用刷新过的行不再请求
+        refreshed = self._fetch_coalesced(uniprot_ids, DEFAULT_FETCH_WORKERS)
+        return sum(uniprot_id in refreshed for uniprot_id in uniprot_ids)
+    
+    def _select_hot_expired(self, limit: int) -> List[str]:
+        """访问次数最多的已超过软有效期的条目"""
+        self.flush_access_counts()
+        stale_before = datetime.now().timestamp() - self.protein_ttl.soft
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT uniprot_id FROM proteins WHERE access_count > 0 AND last_updated < ? "
+                "ORDER BY access_count DESC LIMIT ?", (stale_before, limit)).fetchall()
+        return [row[0] for row in rows]
+    
+    def start_background_refresh(self, interval: float = DEFAULT_REFRESH_INTERVAL):
+        """启动常驻后台刷新线程，每 interval 秒主动刷新访问最多的过期条目"""
+        self.refresher.start(interval)
     
     def get_popular_proteins(self) -> List[ProteinInfo]:
         """获取热门蛋白质列表"""
@@ -328,13 +542,7 @@ class ProteinDatabaseManager:
             "P03372"   # ESR1
         ]
         
-        proteins = []
-        for uniprot_id in popular_uniprot_ids:
-            protein = self.get_protein_by_uniprot_id(uniprot_id)
-            if protein:
-                proteins.append(protein)
-        
-        return proteins
+        return self.get_proteins_by_uniprot_ids(popular_uniprot_ids)
 
 # 使用示例
 if __name__ == "__main__":
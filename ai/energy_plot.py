@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 能量路径图渲染模块
+复用预配置的 Figure/FigureCanvasAgg，不经过 pyplot 全局状态，可在多线程中并发渲染
+"""
+
+import base64
+import io
+import threading
+import zlib
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+
+# 单张能量图最多绘制的点数，更长的能量路径按最小/最大值抽取
+MAX_PLOT_POINTS = 2000
+
+
+def decimate_min_max(values: np.ndarray, max_points: int = MAX_PLOT_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    最小/最大值抽取：返回 (残基位置, 能量值)
+    
+    长度不超过 max_points 时原样返回；否则把序列均分为 (max_points-2)//2 个桶，
+    每桶按位置顺序保留最小值和最大值两个点，峰谷不会因抽样丢失；
+    首尾两点总是保留，横轴范围与原序列一致。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= max_points:
+        return np.arange(len(values), dtype=np.float64), values
+    
+    buckets = max((max_points - 2) // 2, 1)
+    bucket_size = -(-len(values) // buckets)
+    buckets = -(-len(values) // bucket_size)
+    # 末桶以 NaN 补齐后整形为 桶数×桶大小，按行求最小/最大位置
+    padded = np.full(buckets * bucket_size, np.nan)
+    padded[:len(values)] = values
+    padded = padded.reshape(buckets, bucket_size)
+    offsets = np.arange(buckets) * bucket_size
+    low = offsets + np.nanargmin(padded, axis=1)
+    high = offsets + np.nanargmax(padded, axis=1)
+    
+    positions = np.concatenate([[0], np.column_stack([np.minimum(low, high), np.maximum(low, high)]).ravel(),
+                                [len(values) - 1]])
+    # 最小值与最大值重合或与首尾点重合时去掉重复位置
+    positions = positions[np.concatenate([[True], positions[1:] != positions[:-1]])]
+    return positions.astype(np.float64), values[positions]
+
+
+class _PlotSurface:
+    """单个线程持有的预配置画布：坐标轴、图例和布局只创建一次，之后只更新数据"""
+    
+    def __init__(self, figsize: Tuple[float, float], dpi: int):
+        self.figure = Figure(figsize=figsize, dpi=dpi, facecolor='white', edgecolor='none')
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        
+        self.line, = self.ax.plot([], [], 'b-', linewidth=2, label='Folding Energy')
+        self.fill = self.ax.fill_between([0, 1], [0, 0], alpha=0.3, color='blue')
+        # 稳定性区域标注
+        self.stable = self.ax.scatter([], [], color='green', s=20, alpha=0.7, label='Stable Regions')
+        
+        self.ax.set_xlabel('Amino Acid Position', fontsize=10)
+        self.ax.set_ylabel('Relative Energy (kcal/mol)', fontsize=10)
+        self.ax.set_title('Protein Folding Energy Path', fontsize=12, fontweight='bold')
+        self.ax.grid(True, alpha=0.3)
+        self.ax.legend(handles=[self.line], fontsize=9)
+        
+        # 布局只计算一次，替代每次调用的 tight_layout / bbox_inches='tight'
+        self.update(np.linspace(-2.0, 2.0, 100))
+        self.figure.tight_layout()
+    
+    def update(self, energy_values: np.ndarray, x: Optional[np.ndarray] = None):
+        """只更新折线、填充和散点数据以及坐标范围；x 为各点的残基位置，默认 0..n-1"""
+        if x is None:
+            x = np.arange(len(energy_values), dtype=np.float64)
+        self.line.set_data(x, energy_values)
+        
+        # 与 fill_between(x, y) 相同的多边形：沿曲线前进，再沿 y=0 返回
+        zeros = np.zeros_like(energy_values)
+        verts = np.concatenate([
+            np.column_stack([x, energy_values]),
+            np.column_stack([x[::-1], zeros]),
+        ])
+        self.fill.set_verts([verts] if len(x) else [])
+        
+        stable_regions = np.where(energy_values < -0.5)[0]
+        self.stable.set_offsets(np.column_stack([x[stable_regions], energy_values[stable_regions]]))
+        
+        # 数据范围包含填充基线 y=0，与 pyplot 自动缩放的结果一致
+        if len(x):
+            bounds = np.array([[x[0], min(energy_values.min(), 0.0)],
+                               [x[-1], max(energy_values.max(), 0.0)]])
+        else:
+            bounds = np.array([[0.0, 0.0], [1.0, 1.0]])
+        self.ax.dataLim.update_from_data_xy(bounds, ignore=True)
+        self.ax.autoscale_view()
+    
+    def render_png(self, energy_values: np.ndarray, compress_level: int,
+                   x: Optional[np.ndarray] = None) -> bytes:
+        """渲染为PNG字节"""
+        self.update(energy_values, x)
+        self.canvas.draw()
+        width, height = self.canvas.get_width_height()
+        image = Image.frombuffer('RGBA', (width, height), self.canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+        buffer = io.BytesIO()
+        # 背景为不透明白色，去掉alpha通道以减小编码量；
+        # 图中大片纯色，RLE策略压缩率接近默认策略而编码快约一倍
+        image.convert('RGB').save(buffer, format='png', compress_level=compress_level,
+                                  compress_type=zlib.Z_RLE)
+        return buffer.getvalue()
+
+
+class EnergyPlotRenderer:
+    """
+    能量路径图渲染器
+    
+    每个线程懒创建并复用一个 _PlotSurface，渲染之间只更新艺术家对象的数据，
+    不使用 pyplot，因此不同线程可以并发渲染，且长时间运行内存保持稳定。
+    超过 max_points 个点的能量路径先做最小/最大值抽取，绘制开销与序列长度无关。
+    """
+    
+    def __init__(self, figsize: Tuple[float, float] = (8, 4), dpi: int = 150,
+                 compress_level: int = 6, max_points: int = MAX_PLOT_POINTS):
+        if max_points < 4:
+            raise ValueError("max_points 至少为4")
+        self.figsize = figsize
+        self.dpi = dpi
+        self.compress_level = compress_level
+        self.max_points = max_points
+        self._local = threading.local()
+    
+    def _surface(self) -> _PlotSurface:
+        """返回当前线程的画布，首次使用时创建"""
+        surface = getattr(self._local, 'surface', None)
+        if surface is None:
+            surface = _PlotSurface(self.figsize, self.dpi)
+            self._local.surface = surface
+        return surface
+    
+    def render_png(self, energy_profile: Iterable[float]) -> bytes:
+        """将能量路径渲染为PNG字节"""
+        x, energy_values = decimate_min_max(np.asarray(energy_profile, dtype=np.float64), self.max_points)
+        return self._surface().render_png(energy_values, self.compress_level, x)
+    
+    def render(self, energy_profile: Iterable[float]) -> str:
+        """将能量路径渲染为 base64 编码的PNG"""
+        return base64.b64encode(self.render_png(energy_profile)).decode()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 批量预测命令行工具
+逐条流式读取 FASTA/FASTQ 文件，结果增量写入 JSON Lines、CSV 或 Parquet/Arrow，支持断点续跑与多进程
+
+示例:
+    python ai/fasta_cli.py proteins.fasta -o results.jsonl --workers 8
+    python ai/fasta_cli.py proteins.fasta -o results.csv --resume
+    python ai/fasta_cli.py proteins.fasta -o results.parquet --workers 8
+"""
+
+import argparse
+import collections
+import csv
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+try:
+    from .predictor import ProteinFoldingPredictor, NOISE_MODES
+    from .parallel_predictor import ParallelPredictor
+    from .columnar_export import ColumnarWriter, RESULT_COLUMNS, COLUMNAR_FORMATS, flatten_result
+except ImportError:  # 作为脚本运行时 (python ai/fasta_cli.py)
+    from predictor import ProteinFoldingPredictor, NOISE_MODES
+    from parallel_predictor import ParallelPredictor
+    from columnar_export import ColumnarWriter, RESULT_COLUMNS, COLUMNAR_FORMATS, flatten_result
+
+
+# CSV 输出展开后的列 (与列式导出相同)
+CSV_COLUMNS = [name for name, _ in RESULT_COLUMNS]
+
+OUTPUT_FORMATS = ("jsonl", "csv") + COLUMNAR_FORMATS
+
+# 按输出文件扩展名推断格式
+_FORMAT_EXTENSIONS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+@dataclass
+class SequenceRecord:
+    """输入文件中的一条序列记录"""
+    id: str
+    description: str
+    sequence: str
+    offset: int  # 记录首行在文件中的字节偏移
+
+
+def _record(header: bytes, parts: List[bytes], offset: int) -> SequenceRecord:
+    description = header.decode('utf-8', errors='replace')
+    record_id = description.split(maxsplit=1)[0] if description.strip() else ""
+    sequence = b"".join(parts).decode('ascii', errors='replace')
+    return SequenceRecord(id=record_id, description=description, sequence=sequence, offset=offset)
+
+
+def read_fasta(stream: BinaryIO, offset: int = 0) -> Iterator[SequenceRecord]:
+    """逐条解析 FASTA (多行序列)，offset 为流的当前字节位置"""
+    header = None
+    header_offset = 0
+    parts: List[bytes] = []
+    for line in stream:
+        if line.startswith(b'>'):
+            if header is not None:
+                yield _record(header, parts, header_offset)
+            header = line[1:].strip()
+            header_offset = offset
+            parts = []
+        elif header is not None:
+            parts.append(line.strip())
+        offset += len(line)
+    if header is not None:
+        yield _record(header, parts, header_offset)
+
+
+def read_fastq(stream: BinaryIO, offset: int = 0) -> Iterator[SequenceRecord]:
+    """逐条解析 FASTQ (序列行直到 '+' 行，质量行与序列等长)"""
+    line = stream.readline()
+    while line:
+        if not line.startswith(b'@'):
+            offset += len(line)
+            line = stream.readline()
+            continue
+        header_offset = offset
+        header = line[1:].strip()
+        offset += len(line)
+        
+        parts: List[bytes] = []
+        line = stream.readline()
+        while line and not line.startswith(b'+'):
+            parts.append(line.strip())
+            offset += len(line)
+            line = stream.readline()
+        offset += len(line)
+        
+        # 跳过与序列等长的质量行
+        remaining = sum(len(part) for part in parts)
+        while remaining > 0:
+            line = stream.readline()
+            if not line:
+                break
+            offset += len(line)
+            remaining -= len(line.strip())
+        yield _record(header, parts, header_offset)
+        line = stream.readline()
+
+
+def detect_format(stream: BinaryIO) -> str:
+    """根据缓冲区中首个非空白字节判断 fasta / fastq (只预读，不消耗流)"""
+    head = stream.peek(1).lstrip()[:1] if hasattr(stream, 'peek') else b''
+    return "fastq" if head == b'@' else "fasta"
+
+
+def read_records(stream: BinaryIO, input_format: str = "auto", offset: int = 0) -> Iterator[SequenceRecord]:
+    """按格式逐条读取记录"""
+    if input_format == "auto":
+        input_format = detect_format(stream)
+    reader = read_fastq if input_format == "fastq" else read_fasta
+    return reader(stream, offset)
+
+
+def predict_records(records: Iterable[SequenceRecord], workers: int = 1, chunk_size: int = 64,
+                    predictor_kwargs: Optional[Dict[str, Any]] = None
+                    ) -> Iterator[Tuple[SequenceRecord, Dict[str, Any]]]:
+    """按输入顺序产出 (记录, 预测结果)；workers > 1 时使用多进程执行器"""
+    predictor_kwargs = predictor_kwargs or {}
+    if workers <= 1:
+        predictor = ProteinFoldingPredictor(**predictor_kwargs)
+        for record in records:
+            yield record, predictor.predict_folding(record.sequence, render_plot=False)
+        return
+    
+    # 在途记录与执行器的在途块一一对应，队列长度同样有界
+    in_flight: "collections.deque[SequenceRecord]" = collections.deque()
+    
+    def sequences() -> Iterator[str]:
+        for record in records:
+            in_flight.append(record)
+            yield record.sequence
+    
+    executor = ParallelPredictor(workers=workers, chunk_size=chunk_size,
+                                 predictor_kwargs=predictor_kwargs)
+    for _, result in executor.imap(sequences(), ordered=True):
+        yield in_flight.popleft(), result
+
+
+def output_row(record: SequenceRecord, result: Dict[str, Any],
+               include_profile: bool = False) -> Dict[str, Any]:
+    """组装一条输出记录 (不含能量图)"""
+    row = {"id": record.id, "offset": record.offset}
+    for name, value in result.items():
+        if name == "energy_plot" or (name == "energy_profile" and not include_profile):
+            continue
+        row[name] = value
+    return row
+
+
+class ResultWriter:
+    """增量写出 JSON Lines、CSV 或列式文件 (Parquet / Arrow IPC)"""
+    
+    def __init__(self, stream: Optional[TextIO], output_format: str, write_header: bool = True,
+                 include_profile: bool = False, path: Optional[str] = None):
+        self.stream = stream
+        self.output_format = output_format
+        self.include_profile = include_profile
+        if output_format == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=CSV_COLUMNS, extrasaction='ignore',
+                                       lineterminator='\n')
+            if write_header:
+                self._csv.writeheader()
+        elif output_format in COLUMNAR_FORMATS:
+            self._columnar = ColumnarWriter(path, output_format, include_profile=include_profile)
+    
+    def write(self, record: SequenceRecord, result: Dict[str, Any]):
+        if self.output_format == "csv":
+            self._csv.writerow(flatten_result(result, record.id, record.offset))
+        elif self.output_format in COLUMNAR_FORMATS:
+            self._columnar.write(result, record.id, record.offset)
+        else:
+            row = output_row(record, result, self.include_profile)
+            self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+    
+    def flush(self):
+        # 列式文件按记录批写出，不在进度报告时强制刷新
+        if self.stream is not None:
+            self.stream.flush()
+    
+    def close(self):
+        if self.output_format in COLUMNAR_FORMATS:
+            self._columnar.close()
+
+
+def resume_offset(path: str, output_format: str) -> Optional[int]:
+    """
+    读取已有输出中最后一条完整记录的输入偏移
+    
+    末尾未写完的行会被截断；没有任何记录 (空文件或只有CSV表头) 时返回 None。
+    """
+    if not os.path.exists(path):
+        return None
+    
+    with open(path, 'rb+') as f:
+        size = f.seek(0, io.SEEK_END)
+        if size == 0:
+            return None
+        
+        # 从文件末尾向前读取，直到包含最后一条完整行
+        block = 4096
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            tail = f.read(size - start)
+            end = tail.rfind(b'\n')
+            line_start = tail.rfind(b'\n', 0, end) + 1 if end >= 0 else -1
+            if (end >= 0 and line_start > 0) or start == 0:
+                break
+            block *= 2
+        
+        if end < 0:
+            # 没有任何完整行
+            f.truncate(0)
+            return None
+        f.truncate(start + end + 1)
+        last_line = tail[line_start:end].decode('utf-8')
+        
+        if output_format == "csv":
+            f.seek(0)
+            header = next(csv.reader([f.readline().decode('utf-8')]))
+            if start + line_start == 0:
+                return None
+            values = next(csv.reader([last_line]))
+            return int(values[header.index("offset")])
+    
+    return int(json.loads(last_line)["offset"])
+
+
+class ProgressReporter:
+    """按时间间隔输出处理进度 (条/秒)"""
+    
+    def __init__(self, interval: float = 5.0, stream: TextIO = sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.count = 0
+        self.errors = 0
+        self.start_time = time.perf_counter()
+        self._last_report = self.start_time
+    
+    def update(self, result: Dict[str, Any]) -> bool:
+        """记录一条结果，到达报告间隔时输出并返回 True"""
+        self.count += 1
+        if "error" in result:
+            self.errors += 1
+        now = time.perf_counter()
+        if self.interval > 0 and now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report(now)
+            return True
+        return False
+    
+    def report(self, now: Optional[float] = None):
+        elapsed = (now or time.perf_counter()) - self.start_time
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        print(f"已处理 {self.count} 条 (失败 {self.errors} 条), {rate:.1f} 条/秒", file=self.stream)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="ProteinFoldDAO 批量蛋白折叠预测")
+    parser.add_argument("input", help="FASTA/FASTQ 文件路径，'-' 表示标准输入")
+    parser.add_argument("-o", "--output", default="-", help="输出文件路径，默认标准输出")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None,
+                        help="输出格式，默认按输出文件扩展名判断 (.csv/.parquet/.arrow，否则 JSON Lines)；"
+                             "parquet/arrow 需要 pyarrow 且不支持标准输出与 --resume")
+    parser.add_argument("--input-format", choices=("auto", "fasta", "fastq"), default="auto")
+    parser.add_argument("--workers", type=int, default=1, help="工作进程数 (默认 1，不启用多进程)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="多进程模式下每块的序列数")
+    parser.add_argument("--offset", type=int, default=0, help="从输入文件的该字节偏移 (记录起始) 开始处理")
+    parser.add_argument("--resume", action="store_true",
+                        help="根据已有输出的最后一条记录续跑，并追加写入")
+    parser.add_argument("--include-profile", action="store_true",
+                        help="JSON Lines / 列式输出中包含能量路径")
+    parser.add_argument("--noise-mode", choices=NOISE_MODES, default="deterministic",
+                        help="噪声模式 (默认 deterministic，续跑结果可复现)")
+    parser.add_argument("--seed", type=int, default=0, help="deterministic 模式的全局种子")
+    parser.add_argument("--long-sequences", action="store_true",
+                        help="长序列模式：最长支持10万个氨基酸，能量路径覆盖全长")
+    parser.add_argument("--progress-interval", type=float, default=5.0,
+                        help="进度报告间隔 (秒)，0 表示不报告")
+    return parser
+
+
+def run(args: argparse.Namespace) -> int:
+    """执行批量预测，返回写出的记录数"""
+    output_format = args.format or _FORMAT_EXTENSIONS.get(os.path.splitext(args.output)[1].lower(), "jsonl")
+    to_stdout = args.output == "-"
+    if args.resume and (to_stdout or args.input == "-"):
+        raise SystemExit("--resume 需要输入和输出都是文件")
+    columnar = output_format in COLUMNAR_FORMATS
+    if columnar and (to_stdout or args.resume):
+        raise SystemExit(f"{output_format} 输出需要写入文件，且不支持 --resume")
+    
+    start_offset = args.offset
+    skip_first = False
+    if args.resume:
+        last_offset = resume_offset(args.output, output_format)
+        if last_offset is not None:
+            # 最后一条已写出的记录从该偏移开始，续跑时跳过它
+            start_offset = last_offset
+            skip_first = True
+    
+    if args.input == "-":
+        if start_offset:
+            raise SystemExit("标准输入不支持 --offset")
+        input_stream = sys.stdin.buffer
+    else:
+        input_stream = open(args.input, 'rb')
+        input_stream.seek(start_offset)
+    
+    append = args.resume and os.path.exists(args.output) and os.path.getsize(args.output) > 0
+    if columnar:
+        output_stream = None
+    elif to_stdout:
+        output_stream = sys.stdout
+    else:
+        output_stream = open(args.output, 'a' if append else 'w', encoding='utf-8', newline='')
+    
+    writer = None
+    try:
+        records = read_records(input_stream, args.input_format, start_offset)
+        if skip_first:
+            next(records, None)
+        
+        writer = ResultWriter(output_stream, output_format, write_header=not append,
+                              include_profile=args.include_profile, path=args.output)
+        progress = ProgressReporter(args.progress_interval)
+        predictor_kwargs = {"noise_mode": args.noise_mode, "noise_seed": args.seed,
+                            "long_sequence_mode": args.long_sequences}
+        for record, result in predict_records(records, args.workers, args.chunk_size, predictor_kwargs):
+            writer.write(record, result)
+            if progress.update(result):
+                writer.flush()
+        writer.flush()
+        if args.progress_interval > 0:
+            progress.report()
+        return progress.count
+    finally:
+        if writer is not None:
+            writer.close()
+        if input_stream is not sys.stdin.buffer:
+            input_stream.close()
+        if output_stream is not None and not to_stdout:
+            output_stream.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，返回进程退出码 (参数或输入错误由 run 以 SystemExit 退出)"""
+    args = build_parser().parse_args(argv)
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 共享 HTTP 客户端
+UniProt / PDB / AlphaFold 请求共用带连接池的 requests.Session (keep-alive)，
+统一设置超时、按主机限制并发，并对 429/5xx 与连接错误做带抖动的指数退避重试
+"""
+
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (连接超时, 读取超时) 秒；上游变慢时请求最终会失败，而不是无限期占住 Streamlit 工作线程
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)
+
+# 可重试的响应状态码
+RETRY_STATUSES: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+USER_AGENT = "ProteinFoldDAO/1.0"
+
+
+class HTTPClient:
+    """
+    共享 HTTP 客户端
+    
+    所有请求经同一个 Session 发出，同一主机的 TCP/TLS 连接由 urllib3 连接池复用
+    (每个主机最多保留 pool_maxsize 个连接)。每个主机的在途请求数由信号量限制为
+    per_host_limit，信号量只在请求期间持有，退避等待时不占用名额。
+    stream=True 的响应体在返回后才读取，名额持有到响应关闭时释放 (调用方应使用
+    with 或 close()；未关闭的响应在被回收时释放)。
+    
+    429/5xx 响应与连接错误、超时最多重试 max_retries 次，第 n 次重试前等待
+    [0, min(backoff_max, backoff_base * 2**n)] 内的随机时间 (full jitter)；
+    响应带 Retry-After 时等待其给出的时间 (不超过 backoff_max)。
+    重试用尽后返回最后一次响应 (由调用方 raise_for_status) 或抛出最后一次异常，
+    调用方现有的 requests.RequestException 处理保持不变。
+    """
+    
+    def __init__(self, timeout: Tuple[float, float] = DEFAULT_TIMEOUT, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, per_host_limit: int = 4,
+                 pool_maxsize: int = 8):
+        if per_host_limit <= 0:
+            raise ValueError("per_host_limit 必须为正整数")
+        if max_retries < 0:
+            raise ValueError("max_retries 不能为负数")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.per_host_limit = per_host_limit
+        self.requests_sent = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        # 重试由本类处理 (抖动、Retry-After、不占并发名额)，适配器本身不重试
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        """返回 URL 所在主机的并发信号量"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+    
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """第 attempt 次重试前的等待秒数"""
+        retry_after = _retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送请求，必要时重试"""
+        kwargs.setdefault("timeout", self.timeout)
+        slot = self._slot(url)
+        attempt = 0
+        while True:
+            response = None
+            slot.acquire()
+            try:
+                with self._lock:
+                    self.requests_sent += 1
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                slot.release()
+                if attempt >= self.max_retries:
+                    raise
+            except BaseException:
+                slot.release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    if kwargs.get("stream"):
+                        _release_on_close(response, slot)
+                    else:
+                        slot.release()
+                    return response
+                # 丢弃响应体，连接放回连接池
+                response.close()
+                slot.release()
+            
+            delay = self._backoff(attempt, response)
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+    
+    def get(self, url: str, params=None, **kwargs) -> requests.Response:
+        """GET 请求，接口与 requests.get 相同"""
+        return self.request("GET", url, params=params, **kwargs)
+    
+    def close(self):
+        """关闭连接池中的所有连接"""
+        self.session.close()
+
+
+def _release_on_close(response: requests.Response, slot: threading.BoundedSemaphore):
+    """流式响应关闭 (或被回收) 时释放主机名额，只释放一次"""
+    release = weakref.finalize(response, slot.release)
+    # 只弱引用响应，避免 response.close 与响应之间形成引用环而推迟回收
+    ref = weakref.ref(response)
+    
+    def close():
+        target = ref()
+        try:
+            if target is not None:
+                requests.Response.close(target)
+        finally:
+            release()
+    response.close = close
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """解析 Retry-After 头 (秒数或 HTTP 日期)"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+_shared_client: Optional[HTTPClient] = None
+_shared_lock = threading.Lock()
+
+
+def shared_client() -> HTTPClient:
+    """
+    进程内共享的 HTTP 客户端
+    
+    各数据库管理器实例 (例如 Streamlit 每次重运行新建的管理器) 共用同一组 keep-alive 连接
+    与每主机并发限制。
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HTTPClient()
+        return _shared_client
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 多进程批量预测模块
+每个工作进程初始化一个预测器，输入按块分发，在途块数有界，可按输入顺序或完成顺序返回结果
+"""
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .predictor import ProteinFoldingPredictor, error_result
+except ImportError:  # 作为顶层模块导入时 (ui/ 将 ai/ 加入 sys.path)
+    from predictor import ProteinFoldingPredictor, error_result
+
+
+# 工作进程内的预测器 (由进程池 initializer 创建)
+_worker_predictor: Optional[ProteinFoldingPredictor] = None
+
+
+def _init_worker(predictor_factory: Callable[..., ProteinFoldingPredictor],
+                 predictor_kwargs: Dict[str, Any]):
+    """工作进程初始化：每个进程只构造一次预测器"""
+    global _worker_predictor
+    _worker_predictor = predictor_factory(**predictor_kwargs)
+
+
+def _predict_chunk(chunk: List[str], render_plot: bool) -> List[Dict[str, Any]]:
+    """在工作进程中预测一个块；整块失败时逐条重试，单条异常转为错误结果"""
+    try:
+        return _worker_predictor.predict_folding_batch(chunk, render_plot=render_plot)
+    except Exception:
+        results = []
+        for sequence in chunk:
+            try:
+                results.append(_worker_predictor.predict_folding(sequence, render_plot=render_plot))
+            except Exception as e:
+                results.append(error_result(f"预测失败: {type(e).__name__}: {e}"))
+        return results
+
+
+@dataclass
+class ExecutorStats:
+    """执行统计"""
+    sequences: int = 0
+    chunks: int = 0
+    failed_sequences: int = 0
+    crashed_chunks: int = 0
+    retried_chunks: int = 0
+    pool_restarts: int = 0
+    
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class ParallelPredictor:
+    """
+    多进程批量预测器
+    
+    输入是任意(可为惰性的)序列可迭代对象，按 chunk_size 切块提交，
+    同时在途 (已提交未交付) 的块不超过 max_in_flight，内存占用与输入总量无关。
+    结果以 (输入下标, 结果) 形式逐个产出，格式与 predict_folding 相同：
+    - 无效序列与单条预测异常返回带 "error" 的结果，不影响其他序列
+    - 工作进程崩溃时重建进程池；崩溃时在途的块逐个单独重试，
+      只有单独运行仍崩溃的块返回错误结果，其余块正常交付
+    """
+    
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 64,
+                 max_in_flight: Optional[int] = None, render_plot: bool = False,
+                 predictor_factory: Callable[..., ProteinFoldingPredictor] = ProteinFoldingPredictor,
+                 predictor_kwargs: Optional[Dict[str, Any]] = None):
+        """
+        workers: 工作进程数，默认 CPU 核数
+        chunk_size: 每次提交给工作进程的序列条数
+        max_in_flight: 在途块数上限，默认 workers 的两倍
+        predictor_factory/predictor_kwargs: 在每个工作进程中构造预测器 (需可 pickle)
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size 必须为正整数")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight or self.workers * 2
+        if self.max_in_flight <= 0:
+            raise ValueError("max_in_flight 必须为正整数")
+        self.render_plot = render_plot
+        self.predictor_factory = predictor_factory
+        self.predictor_kwargs = dict(predictor_kwargs or {})
+        self.stats = ExecutorStats()
+    
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.predictor_factory, self.predictor_kwargs))
+    
+    def _chunks(self, sequences: Iterable[str]) -> Iterator[Tuple[int, List[str]]]:
+        """惰性切块，产出 (块起始下标, 块)"""
+        iterator = iter(sequences)
+        start = 0
+        while True:
+            chunk = list(itertools.islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            yield start, chunk
+            start += len(chunk)
+    
+    def imap(self, sequences: Iterable[str], ordered: bool = True) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        逐条产出 (输入下标, 结果)
+        
+        ordered=True 按输入顺序产出 (已完成但排在前面的块未完成时暂存，暂存块计入在途上限)；
+        ordered=False 按完成顺序产出。
+        """
+        chunks = self._chunks(sequences)
+        pool = self._new_pool()
+        pending = {}
+        done_chunks: Dict[int, List[Dict[str, Any]]] = {}
+        retry: Deque[Tuple[int, List[str]]] = deque()
+        isolating = False
+        next_start = 0
+        exhausted = False
+        
+        try:
+            while True:
+                if not pending and retry:
+                    # 嫌疑块单独提交：此时进程池再崩溃即可确定是该块所致
+                    start, chunk = retry.popleft()
+                    pending[pool.submit(_predict_chunk, chunk, self.render_plot)] = (start, chunk)
+                    isolating = True
+                
+                # 补足在途块 (重试嫌疑块期间不提交新块)
+                while (not exhausted and not isolating and not retry
+                       and len(pending) + len(done_chunks) < self.max_in_flight):
+                    item = next(chunks, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    start, chunk = item
+                    self.stats.chunks += 1
+                    self.stats.sequences += len(chunk)
+                    pending[pool.submit(_predict_chunk, chunk, self.render_plot)] = (start, chunk)
+                
+                if not pending and not done_chunks:
+                    return
+                
+                if pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    crashed = []
+                    for future in finished:
+                        start, chunk = pending.pop(future)
+                        try:
+                            results = future.result()
+                        except BrokenProcessPool:
+                            crashed.append((start, chunk))
+                            continue
+                        except Exception as e:
+                            results = [error_result(f"预测失败: {type(e).__name__}: {e}") for _ in chunk]
+                        self.stats.failed_sequences += sum(1 for result in results if "error" in result)
+                        done_chunks[start] = results
+                    
+                    if crashed:
+                        # 进程池已不可用：其余在途块同样中断，无法区分是哪一块导致崩溃
+                        crashed.extend(pending.values())
+                        pending.clear()
+                        if len(crashed) == 1:
+                            start, chunk = crashed[0]
+                            self.stats.crashed_chunks += 1
+                            self.stats.failed_sequences += len(chunk)
+                            done_chunks[start] = [error_result("工作进程异常退出") for _ in chunk]
+                        else:
+                            self.stats.retried_chunks += len(crashed)
+                            retry.extend(sorted(crashed, key=lambda item: item[0]))
+                        pool.shutdown(wait=False)
+                        pool = self._new_pool()
+                        self.stats.pool_restarts += 1
+                    
+                    if not pending:
+                        isolating = False
+                
+                # 交付结果
+                if ordered:
+                    while next_start in done_chunks:
+                        results = done_chunks.pop(next_start)
+                        for offset, result in enumerate(results):
+                            yield next_start + offset, result
+                        next_start += len(results)
+                else:
+                    for start in list(done_chunks):
+                        for offset, result in enumerate(done_chunks.pop(start)):
+                            yield start + offset, result
+        finally:
+            # 不使用 shutdown(cancel_futures=True)，以兼容 Python 3.8
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+    
+    def predict(self, sequences: Iterable[str]) -> List[Dict[str, Any]]:
+        """按输入顺序返回全部结果的列表"""
+        return [result for _, result in self.imap(sequences, ordered=True)]
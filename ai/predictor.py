@@ -6,22 +6,435 @@ ProteinFoldDAO AI预测模块
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # 使用非交互式后端
-import base64
-import io
+import copy
 import json
-import random
-from typing import Dict, Tuple, Any
+import hashlib
+import string
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Tuple, Any, Iterable, List, Mapping, Optional, Union
 from Bio.SeqUtils.ProtParam import ProteinAnalysis
-from Bio.SeqUtils import molecular_weight
+from Bio.SeqUtils import molecular_weight, ProtParamData
+from Bio.Data import IUPACData
+
+try:
+    from .energy_plot import EnergyPlotRenderer
+    from .result_cache import PredictionCache, cache_key
+except ImportError:  # 作为顶层模块导入时 (ui/ 将 ai/ 加入 sys.path)
+    from energy_plot import EnergyPlotRenderer
+    from result_cache import PredictionCache, cache_key
+
+
+# 预测算法版本：评分公式、特征或噪声生成方式变化时递增，旧的缓存结果随之失效
+PREDICTOR_VERSION = "1.1"
+
+# 批量预测吞吐目标 (条/秒)：GFP长度序列、单核、不渲染能量图
+BATCH_THROUGHPUT_TARGET = 500
+
+# 20种标准氨基酸，其顺序即残基编码
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+# 非标准字符统一编码为第21类
+UNKNOWN_RESIDUE = len(AMINO_ACIDS)
+
+_RESIDUE_CODES = np.full(256, UNKNOWN_RESIDUE, dtype=np.uint8)
+for _index, _aa in enumerate(AMINO_ACIDS):
+    _RESIDUE_CODES[ord(_aa)] = _index
+
+
+def encode_sequence(sequence: str) -> np.ndarray:
+    """将(已清理的)序列编码为 uint8 残基索引数组，非标准字符编码为 UNKNOWN_RESIDUE"""
+    # 非ASCII字符替换为单个'?'，保证编码长度与序列长度一致
+    raw = np.frombuffer(sequence.encode('ascii', errors='replace'), dtype=np.uint8)
+    return _RESIDUE_CODES[raw]
+
+
+# 清理用的字节转换表：删除所有非字母字节，小写字母映射为大写
+_UPPERCASE_TABLE = bytes.maketrans(string.ascii_lowercase.encode(), string.ascii_uppercase.encode())
+_NON_LETTER_BYTES = bytes(b for b in range(128) if not chr(b).isalpha())
+_RESIDUE_BYTES = AMINO_ACIDS.encode()
+_RESIDUE_SET = frozenset(AMINO_ACIDS)
+
+
+def clean_residues(sequence: str) -> Tuple[str, FrozenSet[str]]:
+    """
+    清理序列 (移除非字母字符、转换为大写)，同时返回清理后序列中的非标准氨基酸字符
+    
+    ASCII 输入由两次 bytes.translate 完成：第一次删除非字母并转大写，
+    第二次删除20种标准氨基酸，剩下的即无效字符。非 ASCII 输入 (全角、带重音字母等)
+    保持 str.isalpha / str.upper 的 Unicode 语义逐字符清理。
+    """
+    if not sequence:
+        return "", frozenset()
+    if sequence.isascii():
+        cleaned = sequence.encode('ascii').translate(_UPPERCASE_TABLE, delete=_NON_LETTER_BYTES)
+        invalid = cleaned.translate(None, delete=_RESIDUE_BYTES)
+        return cleaned.decode('ascii'), frozenset(invalid.decode('ascii'))
+    cleaned = ''.join(c.upper() for c in sequence if c.isalpha())
+    return cleaned, frozenset(cleaned) - _RESIDUE_SET
+
+
+# BioPython分析后端：native 为本模块的向量化实现，biopython 作为参照实现用于校验
+ANALYSIS_BACKENDS = ("native", "biopython")
+
+# 二肽不稳定性权重 (DIWV, Guruprasad et al. 1990)，按残基编码索引的 20×20 矩阵
+DIWV_MATRIX = np.array([[ProtParamData.DIWV[a][b] for b in AMINO_ACIDS] for a in AMINO_ACIDS])
+# 氨基酸平均质量 (Da) 与肽键脱水质量，与 Bio.SeqUtils.molecular_weight 一致
+RESIDUE_MASSES = np.array([IUPACData.protein_weights[aa] for aa in AMINO_ACIDS])
+WATER_MASS = 18.0153
+AROMATIC_RESIDUES = [AMINO_ACIDS.index(aa) for aa in 'YWF']
+
+# 氨基酸分类 (键的顺序即 amino_acid_distribution 与列式导出中分类列的顺序)
+AA_CATEGORIES: Dict[str, str] = {
+    'polar': 'NQSTY',
+    'nonpolar': 'AGILMFPWV',
+    'acidic': 'DE',
+    'basic': 'RHK',
+    'aromatic': 'FWY',
+    'sulfur': 'CM',
+    'small': 'AGSV',
+    'large': 'FWY'
+}
+
+# 能量路径覆盖的残基数 (前100个氨基酸)；长序列模式下覆盖全长
+ENERGY_PROFILE_LENGTH = 100
+
+# 默认模式与长序列模式支持的最大序列长度
+MAX_SEQUENCE_LENGTH = 1000
+LONG_SEQUENCE_MAX_LENGTH = 100000
+# 长序列的逐残基中间数组按块计算，峰值内存与块大小成正比而与序列长度无关
+FEATURE_CHUNK_SIZE = 16384
+
+# 模拟AI不确定性的噪声模式：
+# random 每次调用独立取样 (默认)；deterministic 由清理后序列的哈希与全局种子确定；off 不加噪声
+NOISE_MODES = ("random", "deterministic", "off")
+# 各处噪声使用互相独立的随机流，单独计算能量路径与完整预测得到相同结果
+NOISE_STREAM_STABILITY = 0
+NOISE_STREAM_ENERGY = 1
+
+
+def sequence_digest(sequence: str) -> int:
+    """清理后序列的128位 BLAKE2b 摘要，作为确定性噪声的种子熵"""
+    digest = hashlib.blake2b(sequence.encode('ascii', errors='replace'), digest_size=16).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def instability_index(codes: np.ndarray) -> float:
+    """
+    不稳定性指数 (与 ProteinAnalysis.instability_index 一致)
+    
+    相邻残基对直接索引 DIWV 矩阵求和；含非标准残基或空序列时抛出 ValueError，
+    与 BioPython 对未知字母抛出异常的行为保持一致。
+    """
+    if len(codes) == 0 or (codes == UNKNOWN_RESIDUE).any():
+        raise ValueError("不稳定性指数只支持20种标准氨基酸")
+    if len(codes) <= FEATURE_CHUNK_SIZE:
+        score = float(DIWV_MATRIX[codes[:-1], codes[1:]].sum())
+    else:
+        # 长序列按块累加 (相邻块重叠一个残基，每个二肽恰好计入一次)
+        score = 0.0
+        for start in range(0, len(codes) - 1, FEATURE_CHUNK_SIZE):
+            stop = min(start + FEATURE_CHUNK_SIZE, len(codes) - 1)
+            score += float(DIWV_MATRIX[codes[start:stop], codes[start + 1:stop + 1]].sum())
+    return (10.0 / len(codes)) * score
+
+
+def protein_molecular_weight(histogram: np.ndarray) -> float:
+    """蛋白分子量 (与 molecular_weight(seq, seq_type='protein') 一致)：残基直方图点乘残基质量"""
+    length = int(histogram.sum())
+    if length == 0 or histogram[UNKNOWN_RESIDUE]:
+        raise ValueError("分子量只支持20种标准氨基酸")
+    return float(histogram[:UNKNOWN_RESIDUE] @ RESIDUE_MASSES) - (length - 1) * WATER_MASS
+
+
+def aromaticity(histogram: np.ndarray) -> float:
+    """芳香性 (与 ProteinAnalysis.aromaticity 一致)：Phe+Trp+Tyr 的相对频率"""
+    length = int(histogram.sum())
+    return float(histogram[AROMATIC_RESIDUES].sum()) / length
+
+
+def error_result(error_msg: str) -> Dict[str, Any]:
+    """构造与 predict_folding 统一格式的错误结果"""
+    return {
+        "error": error_msg,
+        "sequence_length": 0,
+        "stability_score": 0.0,
+        "energy_plot": "",
+        "energy_profile": []
+    }
+
+
+def base_stability_score(length: int, hydrophobicity, charge_balance, instability_index,
+                         aromaticity, molecular_weight):
+    """
+    未加噪声、未截断的稳定性评分 (六个因子的加权和)
+    
+    除 length 外的参数既可以是标量，也可以是形状相同的数组 (如突变扫描的 L×20 矩阵)，
+    逐元素运算与标量运算结果一致。
+    """
+    # 稳定性评分算法
+    # 1. 长度因子 (适中长度更稳定)
+    length_factor = 1.0 - abs(length - 200) / 1000 if length > 0 else 0
+    
+    # 2. 疏水性因子 (中等疏水性更稳定)
+    hydrophobicity_factor = 1.0 - np.abs(hydrophobicity) / 5.0
+    
+    # 3. 电荷平衡因子
+    charge_factor = 1.0 - charge_balance
+    
+    # 4. 不稳定性指数因子
+    instability_factor = np.maximum(0, 1.0 - instability_index / 100.0)
+    
+    # 5. 芳香性因子
+    aromaticity_factor = np.minimum(1.0, aromaticity * 2)
+    
+    # 6. 分子量因子
+    mw_factor = 1.0 - np.abs(molecular_weight - 25000) / 100000
+    
+    # 加权平均
+    weights = [0.2, 0.2, 0.15, 0.2, 0.1, 0.15]
+    factors = [length_factor, hydrophobicity_factor, charge_factor, 
+              instability_factor, aromaticity_factor, mw_factor]
+    
+    return sum(w * f for w, f in zip(weights, factors))
+
+
+# 默认能量图渲染器 (每个线程复用各自的画布)
+_energy_plot_renderer = EnergyPlotRenderer()
+
+
+def render_energy_plot(energy_profile: Iterable[float]) -> str:
+    """将能量路径渲染为 base64 编码的 PNG 图像 (线程安全)"""
+    return _energy_plot_renderer.render(energy_profile)
+
+
+def ensure_energy_plot(result: Dict[str, Any]) -> str:
+    """
+    按需渲染预测结果中的能量图
+    
+    以 render_plot=False 预测的结果只携带 energy_profile；首次调用时渲染 PNG
+    并写回 result['energy_plot']，之后直接复用。错误结果返回空字符串。
+    """
+    if not result.get('energy_plot') and result.get('energy_profile'):
+        result['energy_plot'] = render_energy_plot(result['energy_profile'])
+    return result.get('energy_plot', "")
+
+
+def residue_histogram(codes: np.ndarray) -> np.ndarray:
+    """单次遍历统计残基直方图 (21个分箱，最后一箱为非标准残基)"""
+    return np.bincount(codes, minlength=UNKNOWN_RESIDUE + 1)
+
+
+@dataclass
+class ResidueFeatures:
+    """单条序列的残基特征：直方图及由其/查找矩阵归约得到的各项统计"""
+    length: int
+    histogram: np.ndarray
+    means: Dict[str, float]
+    sums: Dict[str, float]
+    group_counts: Dict[str, int]
+
+
+@dataclass
+class PredictionContext:
+    """
+    单条序列预测的共享上下文
+    
+    一次预测中的昂贵分析（编码、残基特征、BioPython分析、分子量）
+    各只计算一次，随上下文传给各个 calculate_* 方法。
+    """
+    sequence: str
+    codes: np.ndarray
+    features: ResidueFeatures
+    instability_index: float
+    aromaticity: float
+    molecular_weight: float
+
+
+# calculate_* 方法既接受原始序列，也接受预测上下文
+SequenceInput = Union[str, PredictionContext]
+
+# 滑动窗口性质曲线：疏水性、柔性为窗口均值，无序倾向为窗口内 disorder/(disorder+order)
+WINDOW_PROFILES = ("hydrophobicity", "flexibility", "disorder")
+# 各曲线所需的特征引擎性质列
+_PROFILE_SCALES = {
+    "hydrophobicity": ("hydrophobicity",),
+    "flexibility": ("flexibility",),
+    "disorder": ("disorder", "order"),
+}
+
+
+@dataclass
+class ProfileBatch:
+    """
+    批量滑动窗口曲线
+    
+    profiles 中每条曲线为 B×L 数组 (L 为最长曲线长度)，右侧以填充值补齐；
+    lengths[b] 为第 b 条序列的窗口数，mask[b, j] 标记有效位置。
+    """
+    window_size: int
+    profiles: Dict[str, np.ndarray]
+    lengths: np.ndarray
+    mask: np.ndarray
+
+
+@dataclass
+class MutationScan:
+    """
+    单点饱和突变扫描结果
+    
+    scores[i, a] 为第 i 个残基突变为 AMINO_ACIDS[a] 后的稳定性评分 (不含噪声、截断到0-1、未取整)，
+    deltas = scores - wild_type_score；野生型位置的 delta 恰为 0。
+    """
+    sequence: str
+    wild_type_score: float
+    scores: np.ndarray
+    deltas: np.ndarray
+    
+    def top_mutations(self, count: int = 10, stabilizing: bool = True) -> List[Tuple[str, float]]:
+        """按 delta 排序的突变 (如 'A23G')，stabilizing=False 时返回最不稳定的突变"""
+        order = np.argsort(-self.deltas if stabilizing else self.deltas, axis=None, kind='stable')
+        mutations = []
+        for flat_index in order:
+            position, target = divmod(int(flat_index), len(AMINO_ACIDS))
+            if AMINO_ACIDS[target] == self.sequence[position]:
+                continue
+            mutations.append((f"{self.sequence[position]}{position + 1}{AMINO_ACIDS[target]}",
+                              float(self.deltas[position, target])))
+            if len(mutations) >= count:
+                break
+        return mutations
+
+
+class ResidueFeatureEngine:
+    """
+    向量化残基特征引擎
+    
+    所有残基性质标度存放在一个 21×K 查找矩阵中（20种氨基酸 + 非标准残基行，
+    非标准行取原字典查找的默认值）。均值由一次 gather 加归约得到；
+    总和与残基分组计数都由 21 分箱直方图与矩阵的点积得到，不再遍历序列。
+    """
+    
+    def __init__(self, scales: Mapping[str, Tuple[Mapping[str, float], float]],
+                 groups: Optional[Mapping[str, Iterable[str]]] = None):
+        """
+        scales: 性质名 → (氨基酸→数值 字典, 非标准残基默认值)
+        groups: 分组名 → 所含氨基酸 (用于类别/二级结构计数)
+        """
+        self.columns = {name: k for k, name in enumerate(scales)}
+        self.matrix = np.empty((UNKNOWN_RESIDUE + 1, len(scales)), dtype=np.float64)
+        for name, (scale, default) in scales.items():
+            k = self.columns[name]
+            self.matrix[:, k] = [scale.get(aa, default) for aa in AMINO_ACIDS] + [default]
+        # 按性质连续存储，gather结果每行连续，归约与 np.mean 逐位一致
+        self._matrix_t = np.ascontiguousarray(self.matrix.T)
+        
+        groups = groups or {}
+        self.groups = {name: g for g, name in enumerate(groups)}
+        self.group_matrix = np.zeros((UNKNOWN_RESIDUE + 1, len(groups)), dtype=np.int64)
+        for name, members in groups.items():
+            for aa in members:
+                self.group_matrix[AMINO_ACIDS.index(aa), self.groups[name]] = 1
+    
+    def gather(self, codes: np.ndarray) -> np.ndarray:
+        """一次 gather 得到 K×n 的逐残基性质数组"""
+        return np.take(self._matrix_t, codes, axis=1)
+    
+    def prefix_sums(self, codes: np.ndarray, names: Iterable[str]) -> np.ndarray:
+        """
+        指定性质的前缀和，形状 len(names)×(n+1)，第 j 列为前 j 个残基之和
+        
+        任意窗口 [i, i+w) 之和为 prefix[:, i+w] - prefix[:, i]，所有窗口大小共用一次累加。
+        """
+        rows = self._matrix_t[[self.columns[name] for name in names]]
+        prefix = np.zeros((len(rows), len(codes) + 1))
+        np.cumsum(np.take(rows, codes, axis=1), axis=1, out=prefix[:, 1:])
+        return prefix
+    
+    def compute(self, codes: np.ndarray) -> ResidueFeatures:
+        """
+        计算编码序列的全部残基特征；空序列的均值/总和为空字典
+        
+        超过 FEATURE_CHUNK_SIZE 的长序列不再 gather 出 K×n 数组，
+        总和改由直方图点乘得到、均值取 总和/长度，内存占用与长度无关
+        (与逐残基累加可能相差最后一位)。
+        """
+        if len(codes) > FEATURE_CHUNK_SIZE:
+            return self.compute_from_histogram(residue_histogram(codes))
+        
+        histogram = residue_histogram(codes)
+        group_totals = histogram @ self.group_matrix
+        group_counts = {name: int(group_totals[g]) for name, g in self.groups.items()}
+        if len(codes) == 0:
+            return ResidueFeatures(0, histogram, {}, {}, group_counts)
+        
+        # 均值使用与 np.mean 相同的成对求和，总和使用与内置 sum 相同的顺序累加，
+        # 两者都与逐残基查找的原实现逐位一致
+        values = self.gather(codes)
+        means = np.add.reduce(values, axis=1) / len(codes)
+        np.add.accumulate(values, axis=1, out=values)
+        sums = values[:, -1]
+        return ResidueFeatures(
+            length=len(codes),
+            histogram=histogram,
+            means={name: means[k] for name, k in self.columns.items()},
+            sums={name: float(sums[k]) for name, k in self.columns.items()},
+            group_counts=group_counts
+        )
+    
+    def compute_from_histogram(self, histogram: np.ndarray) -> ResidueFeatures:
+        """
+        只由残基直方图计算全部残基特征 (用于长序列)
+        
+        均值取 总和/长度，与 compute 的成对求和均值可能相差最后一位。
+        """
+        length = int(histogram.sum())
+        group_totals = histogram @ self.group_matrix
+        group_counts = {name: int(group_totals[g]) for name, g in self.groups.items()}
+        if length == 0:
+            return ResidueFeatures(0, histogram, {}, {}, group_counts)
+        
+        sums = histogram @ self.matrix
+        return ResidueFeatures(
+            length=length,
+            histogram=histogram,
+            means={name: float(sums[k]) / length for name, k in self.columns.items()},
+            sums={name: float(sums[k]) for name, k in self.columns.items()},
+            group_counts=group_counts
+        )
 
 
 class ProteinFoldingPredictor:
     """蛋白折叠预测器"""
     
-    def __init__(self):
+    def __init__(self, analysis_backend: str = "native", noise_mode: str = "random",
+                 noise_seed: int = 0, result_cache: Optional[PredictionCache] = None,
+                 long_sequence_mode: bool = False):
+        """
+        analysis_backend: 不稳定性指数/芳香性/分子量的计算后端，
+        "native" 为向量化实现 (默认)，"biopython" 调用 BioPython 作为参照
+        noise_mode: 噪声模式，见 NOISE_MODES
+        noise_seed: deterministic 模式下与序列哈希组合的全局种子
+        result_cache: 可选的预测结果缓存，要求噪声可复现 (deterministic 或 off)
+        long_sequence_mode: 长序列模式，最大长度提高到 LONG_SEQUENCE_MAX_LENGTH，
+        能量路径覆盖全长 (能量图按最小/最大值抽取)，特征计算内存有界；
+        结果中的 energy_profile 每残基一个值，输出本身仍为 O(n)
+        """
+        if analysis_backend not in ANALYSIS_BACKENDS:
+            raise ValueError(f"未知的分析后端: {analysis_backend}，可选: {', '.join(ANALYSIS_BACKENDS)}")
+        if noise_mode not in NOISE_MODES:
+            raise ValueError(f"未知的噪声模式: {noise_mode}，可选: {', '.join(NOISE_MODES)}")
+        if noise_seed < 0:
+            raise ValueError("noise_seed 必须为非负整数")
+        if result_cache is not None and noise_mode == "random":
+            raise ValueError("结果缓存要求噪声可复现，请使用 noise_mode='deterministic' 或 'off'")
+        self.analysis_backend = analysis_backend
+        self.noise_mode = noise_mode
+        self.noise_seed = noise_seed
+        self.result_cache = result_cache
+        self.long_sequence_mode = long_sequence_mode
+        self.max_sequence_length = LONG_SEQUENCE_MAX_LENGTH if long_sequence_mode else MAX_SEQUENCE_LENGTH
+        # random 模式共用一个生成器 (由系统熵初始化)
+        self._random_generator = np.random.default_rng()
+        
         # 氨基酸疏水性指数 (Kyte-Doolittle scale)
         self.hydrophobicity_scale = {
             'A': 1.8, 'R': -4.5, 'N': -3.5, 'D': -3.5, 'C': 2.5,
@@ -34,16 +447,7 @@ class ProteinFoldingPredictor:
         self.charged_aa = {'R': 1, 'K': 1, 'D': -1, 'E': -1, 'H': 0.5}
         
         # 氨基酸分类
-        self.aa_categories = {
-            'polar': set('NQSTY'),
-            'nonpolar': set('AGILMFPWV'),
-            'acidic': set('DE'),
-            'basic': set('RHK'),
-            'aromatic': set('FWY'),
-            'sulfur': set('CM'),
-            'small': set('AGSV'),
-            'large': set('FWY')
-        }
+        self.aa_categories = {name: set(residues) for name, residues in AA_CATEGORIES.items()}
         
         # 氨基酸体积 (Å³)
         self.aa_volume = {
@@ -68,13 +472,96 @@ class ProteinFoldingPredictor:
             'L': 6.0, 'K': 9.7, 'M': 5.7, 'F': 5.5, 'P': 6.3,
             'S': 5.7, 'T': 5.6, 'W': 5.9, 'Y': 5.7, 'V': 6.0
         }
+        
+        # 二级结构倾向性氨基酸 (简化评分)
+        self.secondary_structure_favoring = {
+            'helix': set('AELKMQ'),
+            'sheet': set('VITYFW'),
+            'turn': set('PGNDS')
+        }
+        
+        # 无序/有序倾向性权重
+        self.disorder_favoring = {'P': 0.8, 'G': 0.6, 'S': 0.4, 'N': 0.4, 'Q': 0.4}
+        self.order_favoring = {'C': 0.8, 'W': 0.6, 'F': 0.6, 'Y': 0.5, 'I': 0.5, 'L': 0.5, 'V': 0.5}
+        
+        # 热稳定性相关氨基酸权重
+        self.thermostable_aa = {'C': 2, 'W': 1.5, 'F': 1.2, 'Y': 1.1, 'I': 1.1, 'L': 1.1, 'V': 1.1}
+        self.thermolabile_aa = {'G': 0.5, 'S': 0.7, 'N': 0.8, 'Q': 0.8, 'D': 0.8, 'E': 0.8}
+        
+        # 向量化特征引擎 (性质名 → (标度, 非标准残基默认值))
+        self.feature_engine = ResidueFeatureEngine({
+            'hydrophobicity': (self.hydrophobicity_scale, 0.0),
+            'volume': (self.aa_volume, 0.0),
+            'flexibility': (self.flexibility_index, 0.0),
+            'isoelectric_point': (self.isoelectric_points, 6.0),
+            'charge': (self.charged_aa, 0.0),
+            'disorder': (self.disorder_favoring, 0.0),
+            'order': (self.order_favoring, 0.0),
+            'thermostable': (self.thermostable_aa, 1.0),
+            'thermolabile': (self.thermolabile_aa, 1.0),
+        }, groups={
+            **self.aa_categories,
+            **self.secondary_structure_favoring,
+        })
+        # 最近一条输入的清理结果 (原始输入, 清理后序列, 无效字符)，同一输入只清理一次
+        self._clean_memo: Tuple[str, str, FrozenSet[str]] = ("", "", frozenset())
+        # 最近一条序列的特征，同一序列的多个calculate_*调用共享
+        self._features_memo: Tuple[str, Optional[ResidueFeatures]] = ("", None)
+    
+    def build_context(self, sequence_clean: str) -> PredictionContext:
+        """为已清理、已验证的序列构建预测上下文，BioPython分析与分子量各计算一次"""
+        codes = encode_sequence(sequence_clean)
+        features = self.feature_engine.compute(codes)
+        try:
+            if self.analysis_backend == "native":
+                instability_index_val = instability_index(codes)
+                aromaticity_val = aromaticity(features.histogram)
+                molecular_weight_val = protein_molecular_weight(features.histogram)
+            else:
+                analysis = ProteinAnalysis(sequence_clean)
+                instability_index_val = float(analysis.instability_index())
+                aromaticity_val = float(analysis.aromaticity())
+                molecular_weight_val = float(molecular_weight(sequence_clean, seq_type="protein"))
+        except:
+            instability_index_val = 50.0  # 默认值
+            aromaticity_val = 0.1
+            molecular_weight_val = float(len(sequence_clean) * 110)  # 平均分子量
+        
+        return PredictionContext(
+            sequence=sequence_clean,
+            codes=codes,
+            features=features,
+            instability_index=instability_index_val,
+            aromaticity=aromaticity_val,
+            molecular_weight=molecular_weight_val
+        )
+    
+    def _residue_features(self, sequence: SequenceInput) -> ResidueFeatures:
+        """清理、编码序列并一次性计算所有残基特征；传入上下文时直接复用"""
+        if isinstance(sequence, PredictionContext):
+            return sequence.features
+        
+        sequence_clean = self.clean_sequence(sequence)
+        memo_sequence, memo_features = self._features_memo
+        if memo_features is not None and sequence_clean == memo_sequence:
+            return memo_features
+        
+        features = self.feature_engine.compute(encode_sequence(sequence_clean))
+        self._features_memo = (sequence_clean, features)
+        return features
     
     def clean_sequence(self, sequence: str) -> str:
-        """清理序列：移除非字母字符，转换为大写"""
+        """清理序列：移除非字母字符，转换为大写 (最近一条输入的结果被记忆)"""
         if not sequence:
             return ""
-        return ''.join(c.upper() for c in sequence if c.isalpha())
+        memo_raw, memo_clean, _ = self._clean_memo
+        if sequence == memo_raw:
+            return memo_clean
         
+        sequence_clean, invalid_chars = clean_residues(sequence)
+        self._clean_memo = (sequence, sequence_clean, invalid_chars)
+        return sequence_clean
+    
     def validate_sequence(self, sequence: str) -> tuple[bool, str]:
         """验证蛋白序列格式，返回(是否有效, 错误信息)"""
         if not sequence or not sequence.strip():
@@ -82,7 +569,10 @@ class ProteinFoldingPredictor:
         
         # 清理序列：移除换行符、空格、数字等
         sequence_clean = self.clean_sequence(sequence)
-        
+        return self._validate_clean_sequence(sequence_clean)
+    
+    def _validate_clean_sequence(self, sequence_clean: str) -> tuple[bool, str]:
+        """验证已清理的序列，避免重复清理"""
         if not sequence_clean:  # 清理后仍为空
             return False, "序列只包含非字母字符"
         
@@ -90,94 +580,69 @@ class ProteinFoldingPredictor:
         if len(sequence_clean) < 5:
             return False, f"序列太短（{len(sequence_clean)}个字符），至少需要5个氨基酸"
         
-        if len(sequence_clean) > 1000:
-            return False, f"序列太长（{len(sequence_clean)}个字符），最多支持1000个氨基酸"
-            
-        # 检查是否只包含有效氨基酸
-        valid_aa = set('ACDEFGHIKLMNPQRSTVWY')
-        invalid_chars = set(sequence_clean) - valid_aa
+        if len(sequence_clean) > self.max_sequence_length:
+            return False, (f"序列太长（{len(sequence_clean)}个字符），"
+                           f"最多支持{self.max_sequence_length}个氨基酸")
+        
+        # 检查是否只包含有效氨基酸：刚由 clean_sequence 清理的序列直接使用同一遍得到的无效字符
+        _, memo_clean, memo_invalid = self._clean_memo
+        if sequence_clean is memo_clean:
+            invalid_chars = memo_invalid
+        else:
+            invalid_chars = set(sequence_clean) - _RESIDUE_SET
         if invalid_chars:
             return False, f"序列包含无效字符: {', '.join(sorted(invalid_chars))}"
         
         return True, ""
     
-    def calculate_hydrophobicity(self, sequence: str) -> float:
+    def calculate_hydrophobicity(self, sequence: SequenceInput) -> float:
         """计算序列平均疏水性"""
-        sequence_clean = self.clean_sequence(sequence)
-        hydrophobicity_values = [self.hydrophobicity_scale.get(aa, 0) for aa in sequence_clean]
-        return np.mean(hydrophobicity_values) if hydrophobicity_values else 0 # type: ignore
+        means = self._residue_features(sequence).means
+        return means['hydrophobicity'] if means else 0 # type: ignore
     
-    def calculate_charge_balance(self, sequence: str) -> float:
+    def calculate_charge_balance(self, sequence: SequenceInput) -> float:
         """计算电荷平衡"""
-        sequence_clean = self.clean_sequence(sequence)
-        charges = [self.charged_aa.get(aa, 0) for aa in sequence_clean]
-        net_charge = sum(charges)
-        return abs(net_charge) / len(sequence_clean) if sequence_clean else 0
+        features = self._residue_features(sequence)
+        return abs(features.sums['charge']) / features.length if features.length else 0
     
-    def calculate_stability_score(self, sequence: str) -> float:
+    def calculate_stability_score(self, sequence: SequenceInput) -> float:
         """计算蛋白折叠稳定性分数 (0-1, 高=稳定)"""
-        is_valid, error_msg = self.validate_sequence(sequence)
-        if not is_valid:
-            return 0.0
-        
-        sequence_clean = self.clean_sequence(sequence)
+        if isinstance(sequence, PredictionContext):
+            # 上下文中的序列已清理、验证
+            context = sequence
+        else:
+            is_valid, error_msg = self.validate_sequence(sequence)
+            if not is_valid:
+                return 0.0
+            context = self.build_context(self.clean_sequence(sequence))
         
         # 基础指标
-        length = len(sequence_clean)
-        hydrophobicity = self.calculate_hydrophobicity(sequence_clean)
-        charge_balance = self.calculate_charge_balance(sequence_clean)
-        
-        # 使用BioPython分析
-        try:
-            analysis = ProteinAnalysis(sequence_clean)
-            instability_index = analysis.instability_index()
-            aromaticity = analysis.aromaticity()
-            molecular_weight_val = molecular_weight(sequence_clean)
-        except:
-            instability_index = 50.0  # 默认值
-            aromaticity = 0.1
-            molecular_weight_val = length * 110  # 平均分子量
+        length = len(context.sequence)
+        hydrophobicity = self.calculate_hydrophobicity(context)
+        charge_balance = self.calculate_charge_balance(context)
         
-        # 稳定性评分算法
-        # 1. 长度因子 (适中长度更稳定)
-        length_factor = 1.0 - abs(length - 200) / 1000 if length > 0 else 0
+        # BioPython分析结果 (由上下文统一计算)
+        instability_index = context.instability_index
+        aromaticity = context.aromaticity
+        molecular_weight_val = context.molecular_weight
         
-        # 2. 疏水性因子 (中等疏水性更稳定)
-        hydrophobicity_factor = 1.0 - abs(hydrophobicity) / 5.0
-        
-        # 3. 电荷平衡因子
-        charge_factor = 1.0 - charge_balance
-        
-        # 4. 不稳定性指数因子
-        instability_factor = max(0, 1.0 - instability_index / 100.0)
-        
-        # 5. 芳香性因子
-        aromaticity_factor = min(1.0, aromaticity * 2)
-        
-        # 6. 分子量因子
-        mw_factor = 1.0 - abs(molecular_weight_val - 25000) / 100000
-        
-        # 加权平均
-        weights = [0.2, 0.2, 0.15, 0.2, 0.1, 0.15]
-        factors = [length_factor, hydrophobicity_factor, charge_factor, 
-                  instability_factor, aromaticity_factor, mw_factor]
-        
-        stability_score = sum(w * f for w, f in zip(weights, factors))
+        stability_score = float(base_stability_score(
+            length, hydrophobicity, charge_balance, instability_index, aromaticity, molecular_weight_val))
         
         # 添加一些随机性模拟AI不确定性
-        noise = random.uniform(-0.05, 0.05)
+        noise = float(self._noise(context.sequence, NOISE_STREAM_STABILITY, 0.05))
         stability_score = max(0.0, min(1.0, stability_score + noise))
         
         return round(stability_score, 3)
     
-    def calculate_amino_acid_composition(self, sequence: str) -> dict:
+    def calculate_amino_acid_composition(self, sequence: SequenceInput) -> dict:
         """计算氨基酸组成"""
-        sequence_clean = self.clean_sequence(sequence)
-        total = len(sequence_clean)
+        features = self._residue_features(sequence)
+        total = features.length
         
         composition = {}
-        for aa in 'ACDEFGHIKLMNPQRSTVWY':
-            count = sequence_clean.count(aa)
+        for index, aa in enumerate(AMINO_ACIDS):
+            count = int(features.histogram[index])
             composition[aa] = {
                 'count': count,
                 'percentage': round(count / total * 100, 2) if total > 0 else 0
@@ -185,14 +650,14 @@ class ProteinFoldingPredictor:
         
         return composition
     
-    def calculate_aa_category_distribution(self, sequence: str) -> dict:
+    def calculate_aa_category_distribution(self, sequence: SequenceInput) -> dict:
         """计算氨基酸类别分布"""
-        sequence_clean = self.clean_sequence(sequence)
-        total = len(sequence_clean)
+        features = self._residue_features(sequence)
+        total = features.length
         
         distribution = {}
-        for category, aa_set in self.aa_categories.items():
-            count = sum(1 for aa in sequence_clean if aa in aa_set)
+        for category in self.aa_categories:
+            count = features.group_counts[category]
             distribution[category] = {
                 'count': count,
                 'percentage': round(count / total * 100, 2) if total > 0 else 0
@@ -200,72 +665,55 @@ class ProteinFoldingPredictor:
         
         return distribution
     
-    def calculate_average_volume(self, sequence: str) -> float:
+    def calculate_average_volume(self, sequence: SequenceInput) -> float:
         """计算平均体积"""
-        sequence_clean = self.clean_sequence(sequence)
-        volumes = [self.aa_volume.get(aa, 0) for aa in sequence_clean]
-        return np.mean(volumes) if volumes else 0 # type: ignore
+        means = self._residue_features(sequence).means
+        return means['volume'] if means else 0 # type: ignore
     
-    def calculate_flexibility(self, sequence: str) -> float:
+    def calculate_flexibility(self, sequence: SequenceInput) -> float:
         """计算平均柔性指数"""
-        sequence_clean = self.clean_sequence(sequence)
-        flexibilities = [self.flexibility_index.get(aa, 0) for aa in sequence_clean]
-        return np.mean(flexibilities) if flexibilities else 0 # type: ignore
+        means = self._residue_features(sequence).means
+        return means['flexibility'] if means else 0 # type: ignore
     
-    def calculate_isoelectric_point(self, sequence: str) -> float:
+    def calculate_isoelectric_point(self, sequence: SequenceInput) -> float:
         """计算等电点"""
-        sequence_clean = self.clean_sequence(sequence)
-        pI_values = [self.isoelectric_points.get(aa, 6.0) for aa in sequence_clean]
-        return np.mean(pI_values) if pI_values else 6.0 # type: ignore
+        means = self._residue_features(sequence).means
+        return means['isoelectric_point'] if means else 6.0 # type: ignore
     
-    def calculate_secondary_structure_tendency(self, sequence: str) -> dict:
+    def calculate_secondary_structure_tendency(self, sequence: SequenceInput) -> dict:
         """计算二级结构倾向性"""
-        sequence_clean = self.clean_sequence(sequence)
-        
         # 简化的二级结构倾向性评分
-        helix_favoring = set('AELKMQ')
-        sheet_favoring = set('VITYFW')
-        turn_favoring = set('PGNDS')
+        features = self._residue_features(sequence)
+        total = features.length
         
-        helix_count = sum(1 for aa in sequence_clean if aa in helix_favoring)
-        sheet_count = sum(1 for aa in sequence_clean if aa in sheet_favoring)
-        turn_count = sum(1 for aa in sequence_clean if aa in turn_favoring)
-        total = len(sequence_clean)
+        tendency = {}
+        for structure in self.secondary_structure_favoring:
+            count = features.group_counts[structure]
+            tendency[f'{structure}_tendency'] = round(count / total * 100, 2) if total > 0 else 0
         
-        return {
-            'helix_tendency': round(helix_count / total * 100, 2) if total > 0 else 0,
-            'sheet_tendency': round(sheet_count / total * 100, 2) if total > 0 else 0,
-            'turn_tendency': round(turn_count / total * 100, 2) if total > 0 else 0
-        }
+        return tendency
     
-    def calculate_disorder_tendency(self, sequence: str) -> float:
+    def calculate_disorder_tendency(self, sequence: SequenceInput) -> float:
         """计算无序倾向性"""
-        sequence_clean = self.clean_sequence(sequence)
-        
         # 基于氨基酸特性的无序倾向性评分
-        disorder_favoring = {'P': 0.8, 'G': 0.6, 'S': 0.4, 'N': 0.4, 'Q': 0.4}
-        order_favoring = {'C': 0.8, 'W': 0.6, 'F': 0.6, 'Y': 0.5, 'I': 0.5, 'L': 0.5, 'V': 0.5}
-        
-        disorder_score = sum(disorder_favoring.get(aa, 0) for aa in sequence_clean)
-        order_score = sum(order_favoring.get(aa, 0) for aa in sequence_clean)
+        sums = self._residue_features(sequence).sums
+        disorder_score = sums.get('disorder', 0)
+        order_score = sums.get('order', 0)
         
         total_score = disorder_score + order_score
         return round(disorder_score / total_score, 3) if total_score > 0 else 0.5
     
-    def calculate_thermostability_indicators(self, sequence: str) -> dict:
+    def calculate_thermostability_indicators(self, sequence: SequenceInput) -> dict:
         """计算热稳定性指标"""
-        sequence_clean = self.clean_sequence(sequence)
+        features = self._residue_features(sequence)
         
         # 热稳定性相关氨基酸
-        thermostable_aa = {'C': 2, 'W': 1.5, 'F': 1.2, 'Y': 1.1, 'I': 1.1, 'L': 1.1, 'V': 1.1}
-        thermolabile_aa = {'G': 0.5, 'S': 0.7, 'N': 0.8, 'Q': 0.8, 'D': 0.8, 'E': 0.8}
-        
-        stable_score = sum(thermostable_aa.get(aa, 1) for aa in sequence_clean)
-        labile_score = sum(thermolabile_aa.get(aa, 1) for aa in sequence_clean)
+        stable_score = features.sums.get('thermostable', 0)
+        labile_score = features.sums.get('thermolabile', 0)
         
         # 计算Cys含量（二硫键形成能力）
-        cys_count = sequence_clean.count('C')
-        cys_percentage = cys_count / len(sequence_clean) * 100 if sequence_clean else 0
+        cys_count = int(features.histogram[AMINO_ACIDS.index('C')])
+        cys_percentage = cys_count / features.length * 100 if features.length else 0
         
         return {
             'thermostability_score': round(stable_score / (stable_score + labile_score), 3) if (stable_score + labile_score) > 0 else 0.5,
@@ -273,109 +721,351 @@ class ProteinFoldingPredictor:
             'potential_disulfide_bonds': cys_count // 2
         }
     
-    def generate_energy_plot(self, sequence: str) -> str:
+    def _profile_scales(self, properties: Iterable[str]) -> List[str]:
+        """校验曲线名称，返回所需的性质列 (去重、保持顺序)"""
+        scales: List[str] = []
+        for name in properties:
+            if name not in _PROFILE_SCALES:
+                raise ValueError(f"未知的性质曲线: {name}，可选: {', '.join(WINDOW_PROFILES)}")
+            scales.extend(scale for scale in _PROFILE_SCALES[name] if scale not in scales)
+        return scales
+    
+    @staticmethod
+    def _profiles_from_window_sums(window_sums: np.ndarray, scales: List[str], window_size: int,
+                                   properties: Iterable[str]) -> Dict[str, np.ndarray]:
+        """由各性质的窗口和计算曲线"""
+        rows = {scale: window_sums[index] for index, scale in enumerate(scales)}
+        profiles = {}
+        for name in properties:
+            if name == "disorder":
+                total = rows["disorder"] + rows["order"]
+                profiles[name] = np.divide(rows["disorder"], total, out=np.full_like(total, 0.5),
+                                           where=total > 0)
+            else:
+                profiles[name] = rows[name] / window_size
+        return profiles
+    
+    def calculate_window_profiles(self, sequence: SequenceInput, window_sizes: Iterable[int] = (9,),
+                                  properties: Iterable[str] = WINDOW_PROFILES
+                                  ) -> Dict[int, Dict[str, np.ndarray]]:
+        """
+        滑动窗口性质曲线
+        
+        返回 窗口大小 → {曲线名: 数组}，第 i 个值对应残基 [i, i+w) 的窗口，
+        长度为 n-w+1 (序列短于窗口时为空数组)。编码与前缀和只计算一次，
+        每个窗口大小只需一次数组相减，总耗时 O(n)。
+        """
+        properties = tuple(properties)
+        scales = self._profile_scales(properties)
+        codes = sequence.codes if isinstance(sequence, PredictionContext) else encode_sequence(
+            self.clean_sequence(sequence))
+        prefix = self.feature_engine.prefix_sums(codes, scales)
+        
+        profiles = {}
+        for window_size in window_sizes:
+            if window_size <= 0:
+                raise ValueError("窗口大小必须为正整数")
+            window_sums = prefix[:, window_size:] - prefix[:, :max(0, len(codes) + 1 - window_size)]
+            profiles[window_size] = self._profiles_from_window_sums(window_sums, scales, window_size, properties)
+        return profiles
+    
+    def calculate_hydrophobicity_profile(self, sequence: SequenceInput, window_size: int = 9) -> np.ndarray:
+        """疏水性滑动窗口均值曲线"""
+        profiles = self.calculate_window_profiles(sequence, (window_size,), ("hydrophobicity",))
+        return profiles[window_size]["hydrophobicity"]
+    
+    def calculate_flexibility_profile(self, sequence: SequenceInput, window_size: int = 9) -> np.ndarray:
+        """柔性滑动窗口均值曲线"""
+        profiles = self.calculate_window_profiles(sequence, (window_size,), ("flexibility",))
+        return profiles[window_size]["flexibility"]
+    
+    def calculate_disorder_profile(self, sequence: SequenceInput, window_size: int = 9) -> np.ndarray:
+        """无序倾向滑动窗口曲线 (窗口内无序/有序残基无时为0.5)"""
+        profiles = self.calculate_window_profiles(sequence, (window_size,), ("disorder",))
+        return profiles[window_size]["disorder"]
+    
+    def calculate_window_profiles_batch(self, sequences: Iterable[str], window_size: int = 9,
+                                        properties: Iterable[str] = WINDOW_PROFILES,
+                                        pad_value: float = 0.0) -> ProfileBatch:
+        """
+        批量滑动窗口曲线
+        
+        所有序列编码后首尾相接，只做一次 gather 和一次前缀和；每条序列的窗口
+        起点都落在自身范围内，相减后按长度掩码散布到 B×L 填充数组中。
+        """
+        if window_size <= 0:
+            raise ValueError("窗口大小必须为正整数")
+        properties = tuple(properties)
+        scales = self._profile_scales(properties)
+        
+        encoded = [encode_sequence(self.clean_sequence(sequence)) for sequence in sequences]
+        sequence_lengths = np.array([len(codes) for codes in encoded], dtype=np.int64)
+        codes = np.concatenate(encoded) if encoded else np.empty(0, dtype=np.uint8)
+        prefix = self.feature_engine.prefix_sums(codes, scales)
+        
+        starts = np.cumsum(sequence_lengths) - sequence_lengths
+        lengths = np.maximum(sequence_lengths - window_size + 1, 0)
+        max_length = int(lengths.max()) if len(lengths) else 0
+        mask = np.arange(max_length) < lengths[:, None]
+        # 有效窗口在拼接序列中的起点，按行优先顺序与 mask 的 True 位置一一对应
+        window_starts = (starts[:, None] + np.arange(max_length))[mask]
+        window_sums = prefix[:, window_starts + window_size] - prefix[:, window_starts]
+        
+        profiles = {}
+        for name, values in self._profiles_from_window_sums(window_sums, scales, window_size, properties).items():
+            padded = np.full(mask.shape, pad_value, dtype=np.float64)
+            padded[mask] = values
+            profiles[name] = padded
+        return ProfileBatch(window_size=window_size, profiles=profiles, lengths=lengths, mask=mask)
+    
+    def scan_point_mutations(self, sequence: str) -> MutationScan:
+        """
+        单点饱和突变扫描：返回 L×20 的稳定性评分变化矩阵
+        
+        点突变只改变一个残基，稳定性评分依赖的量都可以增量更新：
+        疏水性/电荷总和、芳香残基计数和分子量各加上 新残基值 - 原残基值；
+        不稳定性指数的二肽和只调整突变位点左右两个二肽。每个突变体 O(1)，
+        整个扫描是若干 L×20 数组运算，不需要重新预测 19×L 条序列。
+        
+        评分不含噪声 (与 noise_mode 无关)，便于比较突变间的差异。
+        序列无效时抛出 ValueError。
+        """
+        sequence_clean, error_msg = self._prepare_sequence(sequence)
+        if error_msg:
+            raise ValueError(error_msg)
+        
+        codes = encode_sequence(sequence_clean).astype(np.intp)
+        length = len(codes)
+        matrix = self.feature_engine.matrix[:UNKNOWN_RESIDUE]
+        hydrophobicity = matrix[:, self.feature_engine.columns['hydrophobicity']]
+        charge = matrix[:, self.feature_engine.columns['charge']]
+        aromatic = np.zeros(len(AMINO_ACIDS))
+        aromatic[AROMATIC_RESIDUES] = 1.0
+        
+        def mutated_totals(values: np.ndarray) -> np.ndarray:
+            """野生型总和加上每个位点 新残基值 - 原残基值 (L×20)"""
+            return values[codes].sum() + (values[None, :] - values[codes][:, None])
+        
+        # 不稳定性指数：原二肽和，加上左侧二肽 (i-1, i) 与右侧二肽 (i, i+1) 的变化
+        dipeptide_total = DIWV_MATRIX[codes[:-1], codes[1:]].sum()
+        dipeptide_delta = np.zeros((length, len(AMINO_ACIDS)))
+        left = DIWV_MATRIX[codes[:-1]]                     # [i-1, 新残基]
+        dipeptide_delta[1:] += left - left[np.arange(length - 1), codes[1:]][:, None]
+        right = DIWV_MATRIX[:, codes[1:]].T                # [新残基, i+1]
+        dipeptide_delta[:-1] += right - right[np.arange(length - 1), codes[:-1]][:, None]
+        
+        residue_mass_totals = mutated_totals(RESIDUE_MASSES)
+        scores = base_stability_score(
+            length,
+            mutated_totals(hydrophobicity) / length,
+            np.abs(mutated_totals(charge)) / length,
+            (10.0 / length) * (dipeptide_total + dipeptide_delta),
+            mutated_totals(aromatic) / length,
+            residue_mass_totals - (length - 1) * WATER_MASS
+        )
+        scores = np.clip(scores, 0.0, 1.0)
+        
+        wild_type_score = float(scores[0, codes[0]])
+        return MutationScan(
+            sequence=sequence_clean,
+            wild_type_score=wild_type_score,
+            scores=scores,
+            deltas=scores - wild_type_score
+        )
+    
+    def calculate_energy_profile(self, sequence: SequenceInput) -> np.ndarray:
+        """计算模拟折叠能量路径 (前100个氨基酸，长序列模式下为全长；负值表示稳定)"""
+        profile_length = None if self.long_sequence_mode else ENERGY_PROFILE_LENGTH
+        if isinstance(sequence, PredictionContext):
+            sequence_clean = sequence.sequence
+            codes = sequence.codes[:profile_length]
+        else:
+            sequence_clean = self.clean_sequence(sequence)
+            codes = encode_sequence(sequence_clean[:profile_length])
+        
+        # 基于序列疏水性生成能量曲线 (只取疏水性一列，不 gather 全部性质)
+        engine = self.feature_engine
+        hydrophobicity_values = np.take(engine._matrix_t[engine.columns['hydrophobicity']], codes)
+        base_energy = -hydrophobicity_values * 0.5
+        # 添加局部结构影响
+        local_factor = np.sin(np.arange(len(codes)) * 0.3) * 0.2
+        # 添加随机噪声
+        noise = self._noise(sequence_clean, NOISE_STREAM_ENERGY, 0.1, size=len(codes))
+        return base_energy + local_factor + noise
+    
+    def noise_generator(self, sequence_clean: str, stream: int) -> np.random.Generator:
+        """
+        返回给定序列与噪声流的随机数生成器
+        
+        deterministic 模式下种子由 (全局种子, 序列摘要, 流编号) 组成，
+        同一序列在任意进程、任意调用顺序下得到相同的噪声。
+        """
+        if self.noise_mode == "deterministic":
+            seed = np.random.SeedSequence([self.noise_seed, sequence_digest(sequence_clean), stream])
+            return np.random.default_rng(seed)
+        return self._random_generator
+    
+    def _noise(self, sequence_clean: str, stream: int, amplitude: float,
+               size: Optional[int] = None) -> Union[float, np.ndarray]:
+        """[-amplitude, amplitude) 上的均匀噪声；off 模式返回0"""
+        if self.noise_mode == "off":
+            return 0.0 if size is None else np.zeros(size)
+        return self.noise_generator(sequence_clean, stream).uniform(-amplitude, amplitude, size)
+    
+    def generate_energy_plot(self, sequence: SequenceInput) -> str:
         """生成能量路径可视化图"""
-        sequence_clean = self.clean_sequence(sequence)
-        length = len(sequence_clean)
-        
-        # 生成模拟能量路径
-        x = np.arange(min(100, length))  # 前100个氨基酸
-        
-        # 基于序列特征生成能量曲线
-        hydrophobicity_values = [self.hydrophobicity_scale.get(aa, 0) for aa in sequence_clean[:100]]
-        energy_values = []
-        
-        for i, hydro in enumerate(hydrophobicity_values):
-            # 模拟折叠能量 (负值表示稳定)
-            base_energy = -hydro * 0.5
-            # 添加局部结构影响
-            local_factor = np.sin(i * 0.3) * 0.2
-            # 添加随机噪声
-            noise = random.uniform(-0.1, 0.1)
-            energy = base_energy + local_factor + noise
-            energy_values.append(energy)
-        
-        # 创建图表
-        plt.figure(figsize=(8, 4))  # 减小高度，与下面的图表保持一致
-        plt.plot(x, energy_values, 'b-', linewidth=2, label='Folding Energy')
-        plt.fill_between(x, energy_values, alpha=0.3, color='blue')
-        
-        plt.xlabel('Amino Acid Position', fontsize=10)
-        plt.ylabel('Relative Energy (kcal/mol)', fontsize=10)
-        plt.title('Protein Folding Energy Path', fontsize=12, fontweight='bold')
-        plt.grid(True, alpha=0.3)
-        plt.legend(fontsize=9)
-        
-        # 添加稳定性区域标注
-        stable_regions = np.where(np.array(energy_values) < -0.5)[0]
-        if len(stable_regions) > 0:
-            plt.scatter(stable_regions, [energy_values[i] for i in stable_regions], 
-                       color='green', s=20, alpha=0.7, label='Stable Regions')
-        
-        plt.tight_layout()
-        
-        # 转换为base64字符串
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        return image_base64
-    
-    def predict_folding(self, sequence: str) -> Dict[str, Any]:
-        """主要预测函数"""
+        return render_energy_plot(self.calculate_energy_profile(sequence))
+    
+    def _error_result(self, error_msg: str) -> Dict[str, Any]:
+        """构造统一格式的错误结果"""
+        return error_result(error_msg)
+    
+    def _prepare_sequence(self, sequence: str) -> Tuple[str, str]:
+        """清理并验证序列（各只执行一次），返回(清理后序列, 错误信息)"""
         if not sequence or not sequence.strip():
-            return {
-                "error": "序列不能为空",
-                "sequence_length": 0,
-                "stability_score": 0.0,
-                "energy_plot": ""
-            }
+            return "", "序列不能为空"
         
-        is_valid, error_msg = self.validate_sequence(sequence)
+        sequence_clean = self.clean_sequence(sequence)
+        is_valid, error_msg = self._validate_clean_sequence(sequence_clean)
         if not is_valid:
-            return {
-                "error": error_msg,
-                "sequence_length": 0,
-                "stability_score": 0.0,
-                "energy_plot": ""
-            }
+            return "", error_msg
         
-        sequence_clean = self.clean_sequence(sequence)
+        return sequence_clean, ""
+    
+    def predict_folding(self, sequence: str, render_plot: bool = True) -> Dict[str, Any]:
+        """
+        主要预测函数
         
-        # 计算预测结果
-        stability_score = self.calculate_stability_score(sequence_clean)
-        energy_plot = self.generate_energy_plot(sequence_clean)
+        结果总是包含原始能量路径 energy_profile (浮点数列表)。
+        render_plot=False 时跳过 PNG 渲染，energy_plot 为空字符串，
+        需要显示时再调用 ensure_energy_plot(result) 按需渲染。
+        配置了 result_cache 时，相同序列与配置直接返回缓存结果。
+        """
+        sequence_clean, error_msg = self._prepare_sequence(sequence)
+        if error_msg:
+            return self._error_result(error_msg)
         
-        # 额外分析信息
-        try:
-            analysis = ProteinAnalysis(sequence_clean)
-            molecular_weight_val = float(molecular_weight(sequence_clean))
-            instability_index = float(analysis.instability_index())
-        except:
-            molecular_weight_val = float(len(sequence_clean) * 110)
-            instability_index = 50.0
+        return self._predict_cached(sequence_clean, render_plot=render_plot)
+    
+    def cache_config(self) -> Dict[str, Any]:
+        """影响预测结果的版本与配置，作为结果缓存键的一部分"""
+        config = {
+            "version": PREDICTOR_VERSION,
+            "analysis_backend": self.analysis_backend,
+            "noise_mode": self.noise_mode,
+            "noise_seed": self.noise_seed
+        }
+        # 只在启用时加入，默认模式的缓存键保持不变
+        if self.long_sequence_mode:
+            config["long_sequence_mode"] = True
+        return config
+    
+    def _predict_cached(self, sequence_clean: str, render_plot: bool = True) -> Dict[str, Any]:
+        """经过结果缓存的预测：数值结果与能量图分别查找、分别写入"""
+        if self.result_cache is None:
+            return self._predict_clean_sequence(sequence_clean, render_plot=render_plot)
+        
+        key = cache_key(sequence_clean, self.cache_config())
+        result = self.result_cache.get(key)
+        if result is None:
+            result = self._predict_clean_sequence(sequence_clean, render_plot=False)
+            self.result_cache.put(key, result)
+        
+        if render_plot:
+            energy_plot = self.result_cache.get_plot(key)
+            if energy_plot is None:
+                energy_plot = render_energy_plot(result['energy_profile'])
+                self.result_cache.put_plot(key, energy_plot)
+            result['energy_plot'] = energy_plot
+        return result
+    
+    def predict_folding_batch(
+        self,
+        sequences: Union[Iterable[str], Mapping[str, str]],
+        render_plot: bool = False
+    ) -> Union[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        批量预测函数
+        
+        接受序列的可迭代对象或 id→序列 映射，按输入顺序返回结果：
+        可迭代对象返回列表，映射返回保持原顺序的 id→结果 字典。
+        无效序列返回与 predict_folding 相同格式的错误结果，不会中断整批。
+        
+        与逐条调用 predict_folding 相比：
+        - 每条序列只清理、验证一次
+        - 同一批次中的重复序列只计算一次，配置了 result_cache 时跨批次复用
+        - 默认不渲染能量图 (render_plot=False)，此时 energy_plot 为空字符串，
+          可用 ensure_energy_plot(result) 从 energy_profile 按需渲染
+        
+        吞吐目标：BATCH_THROUGHPUT_TARGET 条/秒（GFP长度序列，单核，
+        不渲染能量图），见 tests/benchmark_predictor.py。
+        """
+        is_mapping = isinstance(sequences, Mapping)
+        items = sequences.items() if is_mapping else enumerate(sequences)  # type: ignore[union-attr]
+        
+        # 同一批次内按清理后序列去重
+        computed: Dict[str, Dict[str, Any]] = {}
+        results: List[Tuple[Any, Dict[str, Any]]] = []
+        for key, sequence in items:
+            sequence_clean, error_msg = self._prepare_sequence(sequence)
+            if error_msg:
+                results.append((key, self._error_result(error_msg)))
+                continue
+            
+            if sequence_clean in computed:
+                # 重复序列深拷贝 (含嵌套的列表/字典)，避免调用方修改时互相影响
+                result = copy.deepcopy(computed[sequence_clean])
+            else:
+                result = computed[sequence_clean] = self._predict_cached(
+                    sequence_clean, render_plot=render_plot)
+            results.append((key, result))
+        
+        if is_mapping:
+            return {key: result for key, result in results}
+        return [result for _, result in results]
+    
+    def _predict_clean_sequence(self, sequence_clean: str, render_plot: bool = True) -> Dict[str, Any]:
+        """对已清理、已验证的序列执行预测，所有分析共享同一个预测上下文"""
+        return self.result_from_context(self.build_context(sequence_clean), render_plot=render_plot)
+    
+    def result_from_context(self, context: PredictionContext, render_plot: bool = True,
+                            include_profile: bool = True) -> Dict[str, Any]:
+        """
+        由预测上下文组装完整的预测结果
+        
+        除能量路径外只使用上下文中的直方图与汇总量，耗时与序列长度无关。
+        include_profile=False 时不计算能量路径 (energy_profile 为空列表、不渲染能量图)，
+        供 PredictorSession 在需要显示时再按需生成。
+        """
+        sequence_clean = context.sequence
+        
+        # 计算预测结果
+        stability_score = self.calculate_stability_score(context)
+        if include_profile:
+            energy_profile = self.calculate_energy_profile(context).tolist()
+            energy_plot = render_energy_plot(energy_profile) if render_plot else ""
+        else:
+            energy_profile, energy_plot = [], ""
         
         # 计算所有蛋白质特性
-        aa_composition = self.calculate_amino_acid_composition(sequence_clean)
-        aa_distribution = self.calculate_aa_category_distribution(sequence_clean)
-        average_volume = self.calculate_average_volume(sequence_clean)
-        flexibility = self.calculate_flexibility(sequence_clean)
-        isoelectric_point = self.calculate_isoelectric_point(sequence_clean)
-        secondary_structure = self.calculate_secondary_structure_tendency(sequence_clean)
-        disorder_tendency = self.calculate_disorder_tendency(sequence_clean)
-        thermostability = self.calculate_thermostability_indicators(sequence_clean)
+        aa_composition = self.calculate_amino_acid_composition(context)
+        aa_distribution = self.calculate_aa_category_distribution(context)
+        average_volume = self.calculate_average_volume(context)
+        flexibility = self.calculate_flexibility(context)
+        isoelectric_point = self.calculate_isoelectric_point(context)
+        secondary_structure = self.calculate_secondary_structure_tendency(context)
+        disorder_tendency = self.calculate_disorder_tendency(context)
+        thermostability = self.calculate_thermostability_indicators(context)
         
         return {
             "sequence_length": len(sequence_clean),
             "stability_score": stability_score,
             "energy_plot": energy_plot,
-            "molecular_weight": round(molecular_weight_val, 2),
-            "instability_index": round(instability_index, 2),
-            "hydrophobicity": round(self.calculate_hydrophobicity(sequence_clean), 3),
-            "charge_balance": round(self.calculate_charge_balance(sequence_clean), 3),
+            "energy_profile": energy_profile,
+            "molecular_weight": round(context.molecular_weight, 2),
+            "instability_index": round(context.instability_index, 2),
+            "hydrophobicity": round(self.calculate_hydrophobicity(context), 3),
+            "charge_balance": round(self.calculate_charge_balance(context), 3),
             
             # 新增的蛋白质特性
             "amino_acid_composition": aa_composition,
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 交互式预测会话
+保存上一条序列的编码、残基直方图与二肽和，编辑后只按差异 (替换、少量插入/删除) 增量更新；
+能量路径与能量图在需要显示时才生成
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from .predictor import (ProteinFoldingPredictor, PredictionContext, DIWV_MATRIX, aromaticity,
+                            encode_sequence, error_result, protein_molecular_weight,
+                            render_energy_plot, residue_histogram)
+except ImportError:  # 作为顶层模块导入时 (ui/ 将 ai/ 加入 sys.path)
+    from predictor import (ProteinFoldingPredictor, PredictionContext, DIWV_MATRIX, aromaticity,
+                           encode_sequence, error_result, protein_molecular_weight,
+                           render_energy_plot, residue_histogram)
+
+# 增量更新的最大编辑量 (删除与插入的残基数之和)，更大的编辑直接完整重建
+MAX_EDIT_SIZE = 64
+
+
+@dataclass
+class SequenceEdit:
+    """两条序列之间的差异：从 start 起把 removed 替换为 inserted"""
+    start: int
+    removed: str
+    inserted: str
+    
+    @property
+    def size(self) -> int:
+        return len(self.removed) + len(self.inserted)
+
+
+def diff_sequences(old: str, new: str) -> SequenceEdit:
+    """
+    由公共前缀和公共后缀 (互不重叠) 得到单个编辑区间
+    
+    比较在 numpy 字节数组上进行，单次替换、插入或删除都能精确还原。
+    """
+    a = np.frombuffer(old.encode('ascii', errors='replace'), dtype=np.uint8)
+    b = np.frombuffer(new.encode('ascii', errors='replace'), dtype=np.uint8)
+    common = min(len(a), len(b))
+    
+    mismatch = np.flatnonzero(a[:common] != b[:common])
+    prefix = int(mismatch[0]) if len(mismatch) else common
+    
+    max_suffix = common - prefix
+    tail_a = a[len(a) - max_suffix:][::-1]
+    tail_b = b[len(b) - max_suffix:][::-1]
+    mismatch = np.flatnonzero(tail_a != tail_b)
+    suffix = int(mismatch[0]) if len(mismatch) else max_suffix
+    
+    return SequenceEdit(start=prefix, removed=old[prefix:len(old) - suffix],
+                        inserted=new[prefix:len(new) - suffix])
+
+
+def dipeptide_sum(codes: np.ndarray) -> float:
+    """相邻残基对的 DIWV 权重和"""
+    return float(DIWV_MATRIX[codes[:-1], codes[1:]].sum()) if len(codes) > 1 else 0.0
+
+
+class PredictorSession:
+    """
+    交互式预测会话
+    
+    每次 predict 与上一条 (有效) 序列比较：编辑量不超过 max_edit_size 时，
+    直方图只减去被删除、加上被插入的残基，不稳定性指数的二肽和只调整编辑区间
+    两端受影响的二肽，其余特征 (总和、均值、分组计数、分子量、芳香性) 都由直方图
+    的固定大小运算得到。结果中的能量路径 (长序列模式下为全长) 不随每次编辑重建：
+    energy_profile 为空列表，显示时由 ensure_energy_plot / ensure_energy_profile 按需生成。
+    
+    因此每次编辑的 Python 层开销与序列长度无关；与长度成正比的只剩清理输入、
+    比较前后缀和拼接编码这几次 C 层的线性扫描 (每残基约1纳秒)。
+    
+    增量结果与 predict_folding 的差异只来自浮点舍入 (均值取 总和/长度)。
+    BioPython 分析后端不能增量计算，此时每次都完整重建。
+    """
+    
+    def __init__(self, predictor: Optional[ProteinFoldingPredictor] = None,
+                 max_edit_size: int = MAX_EDIT_SIZE):
+        self.predictor = predictor or ProteinFoldingPredictor()
+        self.max_edit_size = max_edit_size
+        self.last_edit: Optional[SequenceEdit] = None
+        self.full_updates = 0
+        self.incremental_updates = 0
+        self._context: Optional[PredictionContext] = None
+        self._dipeptide_total = 0.0
+        self._result: Optional[Dict[str, Any]] = None
+        self._last_profile: Optional[List[float]] = None
+        self._last_plot = ""
+    
+    def _rebuild(self, sequence_clean: str) -> PredictionContext:
+        """完整构建上下文"""
+        context = self.predictor.build_context(sequence_clean)
+        self._dipeptide_total = dipeptide_sum(context.codes)
+        self.full_updates += 1
+        return context
+    
+    def _apply_edit(self, edit: SequenceEdit, sequence_clean: str) -> PredictionContext:
+        """把编辑应用到上一次的上下文"""
+        old = self._context
+        start = edit.start
+        old_end = start + len(edit.removed)
+        new_end = start + len(edit.inserted)
+        inserted_codes = encode_sequence(edit.inserted)
+        codes = np.concatenate([old.codes[:start], inserted_codes, old.codes[old_end:]])
+        
+        histogram = (old.features.histogram - residue_histogram(old.codes[start:old_end])
+                     + residue_histogram(inserted_codes))
+        features = self.predictor.feature_engine.compute_from_histogram(histogram)
+        
+        # 受影响的二肽：编辑区间内部及其与左右邻居之间的二肽
+        lower = max(start - 1, 0)
+        self._dipeptide_total += (dipeptide_sum(codes[lower:new_end + 1])
+                                  - dipeptide_sum(old.codes[lower:old_end + 1]))
+        
+        self.incremental_updates += 1
+        return PredictionContext(
+            sequence=sequence_clean,
+            codes=codes,
+            features=features,
+            instability_index=(10.0 / len(codes)) * self._dipeptide_total,
+            aromaticity=aromaticity(histogram),
+            molecular_weight=protein_molecular_weight(histogram)
+        )
+    
+    def _update(self, sequence_clean: str) -> PredictionContext:
+        """根据与上一条序列的差异选择增量更新或完整重建"""
+        self.last_edit = None
+        if self._context is None or self.predictor.analysis_backend != "native":
+            return self._rebuild(sequence_clean)
+        
+        edit = diff_sequences(self._context.sequence, sequence_clean)
+        self.last_edit = edit
+        if edit.size == 0:
+            return self._context
+        if edit.size > self.max_edit_size:
+            return self._rebuild(sequence_clean)
+        return self._apply_edit(edit, sequence_clean)
+    
+    def predict(self, sequence: str, render_plot: bool = True) -> Dict[str, Any]:
+        """
+        与 predict_folding 相同的结果格式
+        
+        energy_profile 为空列表 (render_plot=True 时随能量图一同生成)，
+        需要时对本会话最近一次的结果调用 ensure_energy_profile / ensure_energy_plot。
+        """
+        is_valid, error_msg = self.predictor.validate_sequence(sequence)
+        if not is_valid:
+            return error_result(error_msg)
+        sequence_clean = self.predictor.clean_sequence(sequence)
+        
+        self._context = self._update(sequence_clean)
+        result = self.predictor.result_from_context(self._context, include_profile=False)
+        self._result = result
+        if render_plot:
+            self.ensure_energy_plot(result)
+        return result
+    
+    def ensure_energy_profile(self, result: Dict[str, Any]) -> List[float]:
+        """
+        按需计算能量路径并写回 result['energy_profile']
+        
+        只对本会话最近一次 predict 返回的结果生效 (之前的结果对应的序列已不再保存)，
+        其他结果原样返回其中的能量路径。
+        """
+        if result is self._result and not result['energy_profile']:
+            result['energy_profile'] = self.predictor.calculate_energy_profile(self._context).tolist()
+        return result.get('energy_profile', [])
+    
+    def ensure_energy_plot(self, result: Dict[str, Any]) -> str:
+        """按需渲染能量图并写回 result['energy_plot']；能量路径与上次相同时复用上次的图"""
+        energy_profile = self.ensure_energy_profile(result)
+        if not result.get('energy_plot') and energy_profile:
+            if energy_profile != self._last_profile or not self._last_plot:
+                self._last_plot = render_energy_plot(energy_profile)
+                self._last_profile = energy_profile
+            result['energy_plot'] = self._last_plot
+        return result.get('energy_plot', "")
+    
+    def reset(self):
+        """丢弃保存的状态，下一次预测完整重建"""
+        self._context = None
+        self._dipeptide_total = 0.0
+        self._result = None
+        self._last_profile = None
+        self._last_plot = ""
+        self.last_edit = None
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 蛋白质缓存全文检索
+在 proteins 表上维护外部内容 FTS5 索引 (名称、生物体、功能)，由触发器保持同步，
+支持 bm25 排序、前缀查询与生物体过滤
+"""
+
+import re
+import sqlite3
+from typing import List, Optional
+
+FTS_TABLE = "proteins_fts"
+
+# 缓存检索返回的最大行数 (按相关性排序)
+CACHE_SEARCH_LIMIT = 200
+
+# bm25 列权重：名称 > 功能 > 生物体
+# (索引另存 2-4 个字符的前缀，短前缀查询不必合并大量词项)
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+_INDEX_SQL = [
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, organism, function,
+        content='proteins', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS proteins_fts_insert AFTER INSERT ON proteins BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, organism, function)
+        VALUES (new.rowid, new.name, new.organism, new.function);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS proteins_fts_delete AFTER DELETE ON proteins BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, organism, function)
+        VALUES ('delete', old.rowid, old.name, old.organism, old.function);
+    END
+    ''',
+    # 只在检索列变化时重建索引项 (访问计数等其它列的更新不触发)；
+    # 旧版本创建的 proteins_fts_update 对任何 UPDATE 都触发，先删除
+    "DROP TRIGGER IF EXISTS proteins_fts_update",
+    f'''
+    CREATE TRIGGER IF NOT EXISTS proteins_fts_update_text
+    AFTER UPDATE OF name, organism, function ON proteins BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, organism, function)
+        VALUES ('delete', old.rowid, old.name, old.organism, old.function);
+        INSERT INTO {FTS_TABLE}(rowid, name, organism, function)
+        VALUES (new.rowid, new.name, new.organism, new.function);
+    END
+    ''',
+]
+
+# 先在索引内按 bm25 取前 N 个 rowid，再只为这 N 行回表读取完整记录
+_SEARCH_SQL = f'''
+SELECT p.* FROM (
+    SELECT rowid, bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)}) AS score
+    FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?
+    ORDER BY score LIMIT ?
+) AS f JOIN proteins AS p ON p.rowid = f.rowid
+ORDER BY f.score, p.uniprot_id
+'''
+
+# 写入缓存的 upsert：冲突时原地更新 (触发 UPDATE 触发器、保留 rowid)，
+# 不用 INSERT OR REPLACE，后者删除旧行时默认不触发 DELETE 触发器，索引会残留旧内容
+UPSERT_SQL = '''
+INSERT INTO proteins
+(uniprot_id, name, sequence, organism, function, length, molecular_weight,
+ pdb_ids, alphafold_id, confidence_score, last_updated, cache_expiry)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(uniprot_id) DO UPDATE SET
+    name = excluded.name,
+    sequence = excluded.sequence,
+    organism = excluded.organism,
+    function = excluded.function,
+    length = excluded.length,
+    molecular_weight = excluded.molecular_weight,
+    pdb_ids = excluded.pdb_ids,
+    alphafold_id = excluded.alphafold_id,
+    confidence_score = excluded.confidence_score,
+    last_updated = excluded.last_updated,
+    cache_expiry = excluded.cache_expiry
+'''
+
+
+def create_search_index(cursor: sqlite3.Cursor) -> bool:
+    """
+    创建 FTS5 索引与同步触发器，返回是否可用
+    
+    首次创建时从已有的 proteins 行重建索引；SQLite 未编译 FTS5 时返回 False，
+    调用方退回 LIKE 查询。
+    """
+    existed = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).fetchone()
+    try:
+        for statement in _INDEX_SQL:
+            cursor.execute(statement)
+    except sqlite3.OperationalError:
+        return False
+    if not existed:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def _prefix_terms(text: str) -> List[str]:
+    """把用户输入拆成词，每个词作为带引号的前缀项 ("insul"*)"""
+    return [f'"{token}"*' for token in re.findall(r"\w+", text)]
+
+
+def fts_query(name: str, organism: Optional[str] = None) -> Optional[str]:
+    """
+    构造 FTS5 查询：名称中的每个词都须作为前缀出现在名称或功能列，
+    生物体中的每个词都须作为前缀出现在生物体列；名称没有可检索的词时返回 None
+    """
+    name_terms = _prefix_terms(name or "")
+    if not name_terms:
+        return None
+    query = "{name function} : (" + " AND ".join(name_terms) + ")"
+    organism_terms = _prefix_terms(organism or "")
+    if organism_terms:
+        query += " AND organism : (" + " AND ".join(organism_terms) + ")"
+    return query
+
+
+def search_cached_rows(conn: sqlite3.Connection, name: str, organism: Optional[str] = None,
+                       limit: int = CACHE_SEARCH_LIMIT) -> Optional[List[tuple]]:
+    """按相关性检索缓存的 proteins 行；无法构造查询时返回 None"""
+    query = fts_query(name, organism)
+    if query is None:
+        return None
+    return conn.execute(_SEARCH_SQL, (query, limit)).fetchall()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 预测结果缓存模块
+以 (清理后序列, 预测器版本/配置) 的摘要为键：内存LRU层 + 可选SQLite持久层，
+能量图与数值结果分开存放，数值结果的缓存不受PNG体积影响
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Mapping, Optional
+
+try:
+    from .sqlite_pool import shared_pool
+except ImportError:  # 作为顶层模块导入时 (ui/ 将 ai/ 加入 sys.path)
+    from sqlite_pool import shared_pool
+
+
+def cache_key(sequence_clean: str, config: Mapping[str, Any]) -> str:
+    """清理后序列与预测器配置的内容摘要 (十六进制)"""
+    payload = json.dumps(dict(config), sort_keys=True) + "\n" + sequence_clean
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=20).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    disk_hits: int = 0
+    plot_hits: int = 0
+    plot_misses: int = 0
+    
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class _LRUStore:
+    """有界LRU字典 (调用方负责加锁)"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+    
+    def put(self, key: str, value: str) -> int:
+        """写入并返回被淘汰的条目数"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PredictionCache:
+    """
+    预测结果缓存
+    
+    数值结果以JSON文本存放，每次读取都返回新的字典，调用方修改结果不会污染缓存。
+    db_path 为空时只使用内存层；指定后未命中内存的键会查询SQLite，
+    写入同时落盘，进程重启后仍可命中。持久层经按文件共享的连接池访问，
+    命中时不再重复建立连接、设置 PRAGMA。
+    """
+    
+    def __init__(self, max_entries: int = 1024, max_plots: int = 128,
+                 db_path: Optional[str] = None):
+        if max_entries <= 0 or max_plots <= 0:
+            raise ValueError("缓存容量必须为正整数")
+        self.db_path = db_path
+        self.stats = CacheStats()
+        self._results = _LRUStore(max_entries)
+        self._plots = _LRUStore(max_plots)
+        self._lock = threading.Lock()
+        self._pool = shared_pool(db_path) if db_path else None
+        
+        if db_path:
+            self._init_database()
+    
+    def _init_database(self):
+        """初始化持久层数据表"""
+        with self._pool.transaction() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prediction_results (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT,
+                created_at REAL
+            )
+            ''')
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS energy_plots (
+                cache_key TEXT PRIMARY KEY,
+                plot TEXT,
+                created_at REAL
+            )
+            ''')
+    
+    def _load(self, table: str, column: str, key: str) -> Optional[str]:
+        """从持久层读取一条记录"""
+        with self._pool.connection() as conn:
+            row = conn.execute(f"SELECT {column} FROM {table} WHERE cache_key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _store(self, table: str, column: str, key: str, value: str):
+        """写入持久层"""
+        with self._pool.transaction() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO {table} (cache_key, {column}, created_at) VALUES (?, ?, ?)",
+                         (key, value, time.time()))
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取数值结果，未命中返回 None"""
+        with self._lock:
+            payload = self._results.get(key)
+            if payload is not None:
+                self.stats.hits += 1
+                return json.loads(payload)
+        
+        payload = self._load('prediction_results', 'result', key) if self.db_path else None
+        with self._lock:
+            if payload is None:
+                self.stats.misses += 1
+                return None
+            # 持久层命中后提升到内存层
+            self.stats.hits += 1
+            self.stats.disk_hits += 1
+            self.stats.evictions += self._results.put(key, payload)
+        return json.loads(payload)
+    
+    def put(self, key: str, result: Mapping[str, Any]):
+        """写入数值结果 (不含能量图)"""
+        numeric = {name: value for name, value in result.items() if name != 'energy_plot'}
+        numeric['energy_plot'] = ""
+        payload = json.dumps(numeric)
+        with self._lock:
+            self.stats.evictions += self._results.put(key, payload)
+        if self.db_path:
+            self._store('prediction_results', 'result', key, payload)
+    
+    def get_plot(self, key: str) -> Optional[str]:
+        """读取能量图 (base64 PNG)，未命中返回 None"""
+        with self._lock:
+            plot = self._plots.get(key)
+            if plot is not None:
+                self.stats.plot_hits += 1
+                return plot
+        
+        plot = self._load('energy_plots', 'plot', key) if self.db_path else None
+        with self._lock:
+            if plot is None:
+                self.stats.plot_misses += 1
+                return None
+            self.stats.plot_hits += 1
+            self._plots.put(key, plot)
+        return plot
+    
+    def put_plot(self, key: str, plot: str):
+        """写入能量图"""
+        with self._lock:
+            self._plots.put(key, plot)
+        if self.db_path:
+            self._store('energy_plots', 'plot', key, plot)
+    
+    def clear(self):
+        """清空内存层与持久层，统计归零"""
+        with self._lock:
+            self._results.clear()
+            self._plots.clear()
+            self.stats = CacheStats()
+        if self.db_path:
+            with self._pool.transaction() as conn:
+                conn.execute("DELETE FROM prediction_results")
+                conn.execute("DELETE FROM energy_plots")
+    
+    def __len__(self) -> int:
+        """内存层中的数值结果条数"""
+        return len(self._results)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 并发请求合并 (single-flight)
+同一个键同时只有一次在途的获取，并发的相同调用等待并共享它的结果
+"""
+
+import os
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+
+@dataclass
+class FlightStats:
+    """请求合并统计：executed 为实际执行次数，coalesced 为等待他人结果的次数 (do_many 按键计)"""
+    executed: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class _Call:
+    """一次在途调用"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    请求合并
+    
+    do(key, fn) 在没有相同 key 的在途调用时执行 fn；已有在途调用时阻塞等待，
+    返回同一个结果 (或抛出同一个异常)。调用完成后 key 立即移除，之后的调用重新执行，
+    因此只合并时间上重叠的请求，不缓存结果。
+    do_many(keys, fn) 按键合并批量调用：已在途的键等待其结果，其余的键由一次 fn 调用获取。
+    """
+    
+    def __init__(self):
+        self.stats = FlightStats()
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+    
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """执行或加入 key 对应的调用"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.stats.executed += 1
+            else:
+                self.stats.coalesced += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.stats.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+    
+    def do_many(self, keys: Iterable[Hashable],
+                fn: Callable[[List[Hashable]], Mapping[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        按键执行或加入调用，返回 key -> 结果
+        
+        没有在途调用的键由本调用领取，一次调用 fn(领取的键) 获取 (fn 返回的映射中缺少的键结果为 None)；
+        已被其他 do/do_many 领取的键等待其结果。先执行再等待，相互等待的批量调用不会死锁。
+        领取的键出错时异常传给等待它们的调用方并由本调用抛出；等待的键出错时同样抛出。
+        """
+        leading: Dict[Hashable, _Call] = {}
+        joined: Dict[Hashable, _Call] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    call = _Call()
+                    self._calls[key] = call
+                    leading[key] = call
+                else:
+                    joined[key] = call
+            if leading:
+                self.stats.executed += 1
+            self.stats.coalesced += len(joined)
+        
+        results: Dict[Hashable, Any] = {}
+        if leading:
+            try:
+                fetched = fn(list(leading))
+            except BaseException as e:
+                for call in leading.values():
+                    call.error = e
+                with self._lock:
+                    self.stats.errors += 1
+                raise
+            else:
+                for key, call in leading.items():
+                    call.result = results[key] = fetched.get(key)
+            finally:
+                with self._lock:
+                    for key in leading:
+                        del self._calls[key]
+                for call in leading.values():
+                    call.done.set()
+        
+        for key, call in joined.items():
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.result
+        return results
+    
+    def in_flight(self) -> int:
+        """当前在途的调用数"""
+        with self._lock:
+            return len(self._calls)
+
+
+_shared_flights: Dict[Tuple[str, str], SingleFlight] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_flight(db_path: str, namespace: str = "") -> SingleFlight:
+    """
+    按 (命名空间, 缓存数据库路径) 共享的请求合并器
+    
+    同一缓存文件的同类管理器实例 (例如不同 Streamlit 会话各自新建的管理器) 合并彼此的请求；
+    不同管理器类 (查询方式不同) 用不同的命名空间，不同缓存文件的获取结果写入各自的数据库，
+    都不相互合并。":memory:" 每次返回独立的实例。
+    """
+    if db_path == ":memory:":
+        return SingleFlight()
+    key = (namespace, os.path.abspath(db_path))
+    with _shared_lock:
+        flight = _shared_flights.get(key)
+        if flight is None:
+            flight = SingleFlight()
+            _shared_flights[key] = flight
+        return flight
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO SQLite 连接池
+复用长连接代替每次查询的 connect/close，连接打开时统一设置 WAL 与性能相关的 PRAGMA
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Mapping, Optional
+
+# 新连接默认执行的 PRAGMA (按顺序)
+DEFAULT_PRAGMAS: Mapping[str, object] = {
+    "journal_mode": "WAL",      # 读写并发：读不阻塞写，写不阻塞读
+    "synchronous": "NORMAL",    # WAL 下仍保证一致性，提交时不再每次 fsync
+    "cache_size": -16000,       # 每个连接约 16 MB 页缓存 (负值单位为 KiB)
+    "mmap_size": 268435456,     # 256 MB 内存映射读
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,       # 写锁冲突时最多等待 5 秒
+}
+
+# 每个连接缓存的预编译语句数 (sqlite3 按 SQL 文本复用已编译的语句)
+STATEMENT_CACHE_SIZE = 256
+
+_memory_ids = itertools.count()
+
+
+class SQLiteConnectionPool:
+    """
+    SQLite 连接池
+    
+    connection() 借出一个空闲连接 (没有时新建)，用完归还；最多保留 max_idle 个空闲连接，
+    多余的直接关闭。连接只在借出期间被一个线程使用，因此可以安全地在 Streamlit
+    每次重运行的脚本线程之间共享，而不会像线程局部连接那样随线程数增长。
+    长连接上的语句缓存使相同 SQL 只编译一次。
+    
+    ":memory:" 使用命名的共享缓存内存库，池中所有连接访问同一个数据库，
+    并保留一个常驻连接保证数据库不被释放。
+    """
+    
+    def __init__(self, db_path: str, max_idle: int = 4, pragmas: Optional[Mapping[str, object]] = None,
+                 timeout: float = 30.0):
+        if max_idle <= 0:
+            raise ValueError("max_idle 必须为正整数")
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.timeout = timeout
+        self.connections_created = 0
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        
+        if db_path == ":memory:":
+            self._database = f"file:proteinfold-memory-{os.getpid()}-{next(_memory_ids)}?mode=memory&cache=shared"
+            self._uri = True
+            # 内存库不支持 WAL
+            self.pragmas.pop("journal_mode", None)
+            self._keepalive: Optional[sqlite3.Connection] = self._connect()
+        else:
+            self._database = db_path
+            self._uri = False
+            self._keepalive = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """打开新连接并设置 PRAGMA"""
+        conn = sqlite3.connect(self._database, timeout=self.timeout, uri=self._uri,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        with self._lock:
+            self.connections_created += 1
+        return conn
+    
+    def _release(self, conn: sqlite3.Connection):
+        """归还连接：回滚未提交的事务，空闲连接已满时关闭"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """借出一个连接，退出时归还"""
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("连接池已关闭")
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """借出一个连接并在单个事务中执行，正常退出时提交，异常时回滚"""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+    
+    def close(self):
+        """关闭所有空闲连接；借出中的连接在归还时关闭"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        if self._keepalive is not None:
+            self._keepalive.close()
+            self._keepalive = None
+
+
+_shared_pools: Dict[str, SQLiteConnectionPool] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_pool(db_path: str) -> SQLiteConnectionPool:
+    """
+    按数据库文件路径共享的连接池
+    
+    同一文件的多个管理器实例 (例如 Streamlit 每次重运行新建的管理器) 共用一个池；
+    ":memory:" 每次调用返回独立的池。
+    """
+    if db_path == ":memory:":
+        return SQLiteConnectionPool(db_path)
+    key = os.path.abspath(db_path)
+    with _shared_lock:
+        pool = _shared_pools.get(key)
+        if pool is None or pool._closed:
+            pool = SQLiteConnectionPool(db_path)
+            _shared_pools[key] = pool
+        return pool
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO UniProt 批量获取
+把多个 accession 合并为一次 accession:(A OR B OR ...) 检索，按 Link 头的游标翻页，
+只请求缓存需要的字段，并从响应字节流中逐条解析条目
+"""
+
+import codecs
+import itertools
+import json
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+import requests
+
+# 缓存写入用到的 UniProt 返回字段
+UNIPROT_FIELDS: Sequence[str] = (
+    "accession", "protein_name", "organism_name", "sequence", "length", "mass",
+    "xref_pdb", "xref_alphafolddb",
+)
+
+# 每次检索合并的 accession 数 (查询串约 2 KB)
+BATCH_SIZE = 200
+
+# 每页条目数 (UniProt 检索接口上限为 500)
+PAGE_SIZE = 500
+
+# 同时进行的批次数
+BATCH_WORKERS = 4
+
+# 读取响应体的块大小
+CHUNK_SIZE = 65536
+
+# UniProtKB accession 格式；不符合的 ID 不会出现在检索结果中，也不拼入查询
+ACCESSION_PATTERN = re.compile(r"^(?:[OPQ][0-9][A-Z0-9]{3}[0-9]|[A-NR-Z][0-9](?:[A-Z][A-Z0-9]{2}[0-9]){1,2})$")
+
+
+@dataclass
+class AccessionBatch:
+    """一批 accession 的获取结果；出错时 entries 为出错前已解析的条目"""
+    accessions: List[str]
+    entries: List[dict] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+
+def batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    """按 size 个一组切分 (输入可以是生成器)"""
+    if size <= 0:
+        raise ValueError("size 必须为正整数")
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def accession_query(accessions: Iterable[str]) -> Optional[str]:
+    """构造 accession:(A OR B ...) 查询；没有合法 accession 时返回 None"""
+    valid = [accession for accession in accessions if ACCESSION_PATTERN.match(accession)]
+    if not valid:
+        return None
+    return "accession:(" + " OR ".join(valid) + ")"
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str = "results") -> Iterator[Any]:
+    """
+    从 JSON 文档的字节块中逐个解析 key 对应数组的元素
+    
+    字节块按 UTF-8 增量解码 (多字节字符可以跨块)，每解析出一个元素就从缓冲区丢弃，
+    内存占用只与块大小和单个元素大小有关，与整个响应的大小无关。
+    文档中没有该数组时不产生任何元素。
+    """
+    start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    in_array = False
+    exhausted = False
+    
+    while True:
+        if not in_array:
+            match = start.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                in_array = True
+                continue
+        else:
+            pos = 0
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                if buffer[pos] == "]":
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise
+                else:
+                    # 数字等标量可能在块边界被截断 (如 "6." 之后是 "5")，看到分隔符才确定元素完整
+                    delimiter = end
+                    while delimiter < len(buffer) and buffer[delimiter] in " \t\r\n":
+                        delimiter += 1
+                    if delimiter < len(buffer) and buffer[delimiter] in ",]":
+                        yield item
+                        buffer = buffer[delimiter:]
+                        continue
+            else:
+                buffer = ""
+        
+        if exhausted:
+            if in_array:
+                raise ValueError(f"JSON 数组 {key} 不完整或格式错误")
+            return
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer += utf8.decode(b"", final=True)
+        else:
+            buffer += utf8.decode(chunk)
+
+
+def iter_accession_entries(http, base_url: str, accessions: Iterable[str], page_size: int = PAGE_SIZE,
+                           fields: Sequence[str] = UNIPROT_FIELDS) -> Iterator[dict]:
+    """
+    用一次 accession 检索获取多个条目，逐条返回
+    
+    http 为 HTTPClient (或任何提供 get(url, params, stream=...) 的对象)；
+    响应以流方式读取并增量解析，存在 Link: <...>; rel="next" 时继续请求下一页
+    (下一页链接已包含查询参数与游标)。
+    """
+    query = accession_query(accessions)
+    if query is None:
+        return
+    url: Optional[str] = f"{base_url}/uniprotkb/search"
+    params: Optional[dict] = {"query": query, "fields": ",".join(fields), "format": "json", "size": page_size}
+    while url:
+        with http.get(url, params=params, stream=True) as response:
+            response.raise_for_status()
+            yield from iter_json_array(response.iter_content(CHUNK_SIZE))
+            url = response.links.get("next", {}).get("url")
+        params = None
+
+
+def _fetch_batch(http, base_url: str, accessions: List[str], page_size: int) -> AccessionBatch:
+    """获取一批 accession，错误记录在结果中而不是抛出"""
+    batch = AccessionBatch(accessions=accessions)
+    try:
+        for entry in iter_accession_entries(http, base_url, accessions, page_size):
+            batch.entries.append(entry)
+    except (requests.RequestException, ValueError) as e:
+        batch.error = e
+    return batch
+
+
+def fetch_accession_batches(http, base_url: str, accessions: Iterable[str], batch_size: int = BATCH_SIZE,
+                            max_workers: int = BATCH_WORKERS,
+                            page_size: int = PAGE_SIZE) -> Iterator[AccessionBatch]:
+    """
+    把 accession 按 batch_size 分批并发获取，按完成顺序返回每批的结果
+    
+    accessions 可以是生成器，按需切分；同时在途的批次不超过 max_workers 个，
+    已完成的批次交给调用方 (例如写入缓存) 后即可释放，总内存与输入规模无关。
+    """
+    if max_workers <= 0:
+        raise ValueError("max_workers 必须为正整数")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for batch in batched(accessions, batch_size):
+            pending.add(executor.submit(_fetch_batch, http, base_url, batch, page_size))
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 蛋白质缓存数据库性能基准
+对比每次查询 connect/close 与连接池长连接的缓存命中延迟，
+逐行提交与单事务 executemany 批量写入的吞吐量 (行/秒)，FTS5 与 LIKE 检索延迟，
+以及从本地 UniProt 样例服务器批量预热缓存的耗时与内存
+
+运行: python tests/benchmark_database.py
+"""
+
+import sys
+import itertools
+import os
+import random
+import resource
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from ai.database_manager import ProteinDatabaseManager, ProteinInfo
+from ai.http_client import HTTPClient
+from ai.protein_search import search_cached_rows
+from tests.test_uniprot_batch import UniProtFixtureServer
+
+
+# 名称词表：随机生成的词按 Zipf 分布取用，常见蛋白名词放在中等频率的位置
+# (如 kinase 约出现在 1.5% 的名称中，与 UniProt 中的比例相近)
+NAME_WORDS = [''.join(random.Random(i).choice("abcdefghiklmnoprstuvy") for _ in range(4 + i % 7))
+              for i in range(5000)]
+NAME_WORDS[20:27] = ["kinase", "receptor", "insulin", "transporter", "synthase", "zinc", "finger"]
+NAME_CUM_WEIGHTS = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(NAME_WORDS))))
+ORGANISMS = ["Homo sapiens", "Mus musculus", "Rattus norvegicus", "Danio rerio", "Escherichia coli"]
+
+
+def make_proteins(count: int) -> list:
+    """生成测试蛋白质 (每个名称3个词)"""
+    rng = random.Random(0)
+    return [ProteinInfo(
+        uniprot_id=f"Q{i:06d}",
+        name=" ".join(rng.choices(NAME_WORDS, cum_weights=NAME_CUM_WEIGHTS, k=3)) + f" {i}",
+        sequence="MALWMRLLPLLALLALWGPDPAAA" * 10,
+        organism=rng.choice(ORGANISMS),
+        function="benchmark",
+        length=240,
+        molecular_weight=26000.0,
+        pdb_ids=[],
+        alphafold_id=None,
+        confidence_score=None,
+        last_updated=datetime.now()
+    ) for i in range(count)]
+
+
+def benchmark_cache_hits(count: int = 5000, protein_count: int = 500):
+    """缓存命中：每次查询新建连接 vs 连接池"""
+    print(f"\n🗄️  缓存命中基准 ({count} 次按ID查询)")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "protein_cache.db")
+        manager = ProteinDatabaseManager(db_path)
+        for protein in make_proteins(protein_count):
+            manager._cache_protein(protein)
+        ids = [f"Q{i % protein_count:06d}" for i in range(count)]
+        
+        # 基线：与原实现相同，每次查询 connect/close
+        start_time = time.perf_counter()
+        for uniprot_id in ids:
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM proteins WHERE uniprot_id = ?", (uniprot_id,))
+            cursor.fetchone()
+            conn.close()
+        connect_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        for uniprot_id in ids:
+            manager._get_cached_protein_by_id(uniprot_id)
+        pooled_time = time.perf_counter() - start_time
+        
+        manager._pool.close()
+    
+    print(f"  每次 connect/close: {connect_time / count * 1e6:8.1f} µs/次")
+    print(f"  连接池 (含行转换):  {pooled_time / count * 1e6:8.1f} µs/次")
+    print(f"  加速比: {connect_time / pooled_time:.1f}x")
+
+
+def benchmark_bulk_upsert(batch_sizes=(50, 20000)):
+    """写入吞吐：逐行 connect/提交 (原实现)、连接池逐行提交、单事务批量写入"""
+    print("\n📥 批量写入基准 (行/秒)")
+    
+    for count in batch_sizes:
+        proteins = make_proteins(count)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "protein_cache.db")
+            manager = ProteinDatabaseManager(db_path)
+            row_sql = (
+                "INSERT OR REPLACE INTO proteins (uniprot_id, name, sequence, organism, function, length, "
+                "molecular_weight, pdb_ids, alphafold_id, confidence_score, last_updated, cache_expiry) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            )
+            expiry = time.time() + 86400
+            
+            # 原实现：每行新建连接 (默认 rollback 日志、synchronous=FULL) 并提交；大批量只抽样
+            sample = proteins[:min(count, 500)]
+            with tempfile.TemporaryDirectory() as baseline_dir:
+                baseline_path = os.path.join(baseline_dir, "baseline.db")
+                conn = sqlite3.connect(baseline_path)
+                manager._create_tables(conn.cursor())
+                conn.close()
+                start_time = time.perf_counter()
+                for protein in sample:
+                    conn = sqlite3.connect(baseline_path)
+                    conn.execute(row_sql, manager._protein_row(protein, expiry))
+                    conn.commit()
+                    conn.close()
+                connect_rate = len(sample) / (time.perf_counter() - start_time)
+            
+            start_time = time.perf_counter()
+            for protein in sample:
+                manager._cache_protein(protein)
+            pooled_rate = len(sample) / (time.perf_counter() - start_time)
+            
+            start_time = time.perf_counter()
+            manager.cache_proteins(proteins)
+            bulk_rate = count / (time.perf_counter() - start_time)
+            manager._pool.close()
+        
+        print(f"  {count:6d} 行: 逐行 connect/提交 {connect_rate:10.0f} 行/秒，"
+              f"连接池逐行提交 {pooled_rate:10.0f} 行/秒，批量写入 {bulk_rate:10.0f} 行/秒")
+
+
+def benchmark_search(row_count: int = 300000, repeats: int = 50):
+    """缓存检索：FTS5 (bm25 排序、前缀) vs 前导通配符 LIKE 全表扫描"""
+    print(f"\n🔎 缓存检索基准 ({row_count} 行)")
+    
+    # 最后一个查询的词出现在约 20% 的名称中，bm25 需要为所有匹配行评分，是最坏情况
+    queries = [("insulin rec", "Homo"), ("kinase", None), ("zinc fing", "mus"), ("transporter 12345", None),
+               (NAME_WORDS[0], None)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "protein_cache.db")
+        manager = ProteinDatabaseManager(db_path)
+        proteins = make_proteins(row_count)
+        start_time = time.perf_counter()
+        manager.cache_proteins(proteins)
+        print(f"  写入并建立索引: {time.perf_counter() - start_time:.1f} 秒")
+        
+        with manager._pool.connection() as conn:
+            for name, organism in queries:
+                start_time = time.perf_counter()
+                for _ in range(repeats):
+                    fts_rows = search_cached_rows(conn, name, organism)
+                fts_time = (time.perf_counter() - start_time) / repeats
+                
+                like_sql = "SELECT * FROM proteins WHERE name LIKE ?"
+                params = [f"%{name}%"]
+                if organism:
+                    like_sql += " AND organism LIKE ?"
+                    params.append(f"%{organism}%")
+                start_time = time.perf_counter()
+                for _ in range(max(repeats // 10, 1)):
+                    conn.execute(like_sql, params).fetchall()
+                like_time = (time.perf_counter() - start_time) / max(repeats // 10, 1)
+                
+                print(f"  {name!r:22} {organism or '-':6}: FTS5 {fts_time * 1000:7.2f} ms ({len(fts_rows):3d} 行)，"
+                      f"LIKE {like_time * 1000:7.2f} ms")
+        manager._pool.close()
+
+
+def benchmark_warm_cache(count: int = 100000):
+    """批量预热缓存：每批一次 accession 检索，逐条解析后单事务写入"""
+    print(f"\n🔥 批量预热缓存基准 ({count} 个 accession，本地样例服务器)")
+    
+    rng = random.Random(0)
+    sequence = ''.join(rng.choice("ACDEFGHIKLMNPQRSTVWY") for _ in range(400))
+    
+    def entry_for(accession):
+        return {
+            "primaryAccession": accession,
+            "organism": {"scientificName": rng.choice(ORGANISMS)},
+            "proteinDescription": {"recommendedName": {"fullName": {"value": f"Protein {accession}"}}},
+            "sequence": {"value": sequence, "length": len(sequence), "molWeight": 44000},
+            "uniProtKBCrossReferences": [{"database": "AlphaFoldDB", "id": accession}],
+        }
+    
+    server = UniProtFixtureServer(entry_for)
+    client = HTTPClient()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = ProteinDatabaseManager(os.path.join(temp_dir, "protein_cache.db"))
+        manager.http = client
+        manager.uniprot_base_url = server.url
+        
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        start_time = time.perf_counter()
+        written = manager.warm_cache(f"Q{i:05d}" for i in range(count))
+        elapsed = time.perf_counter() - start_time
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        manager._pool.close()
+    client.close()
+    server.close()
+    
+    print(f"  写入 {written} 条，{len(server.requests)} 次检索请求，耗时 {elapsed:.1f} 秒 "
+          f"({written / elapsed:.0f} 条/秒)")
+    print(f"  峰值常驻内存: {rss_before:.0f} MB -> {rss_after:.0f} MB")
+
+
+def main():
+    """运行所有基准"""
+    print("🚀 ProteinFoldDAO 数据库性能基准")
+    print("=" * 60)
+    
+    benchmark_cache_hits()
+    benchmark_bulk_upsert()
+    benchmark_search()
+    benchmark_warm_cache()
+
+
+if __name__ == "__main__":
+    main()
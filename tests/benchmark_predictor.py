@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 预测器性能基准
+对比逐条调用与批量接口的吞吐量 (条/秒)
+
+运行: python tests/benchmark_predictor.py
+"""
+
+import sys
+import os
+import random
+import time
+
+import numpy as np
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from ai.predictor import ProteinFoldingPredictor, BATCH_THROUGHPUT_TARGET, encode_sequence, ensure_energy_plot
+from ai.parallel_predictor import ParallelPredictor
+from ai.predictor_session import PredictorSession
+
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+
+
+def random_sequences(count: int, length: int, seed: int = 42) -> list:
+    """生成随机测试序列"""
+    rng = random.Random(seed)
+    return [''.join(rng.choice(AMINO_ACIDS) for _ in range(length)) for _ in range(count)]
+
+
+def benchmark_batch_vs_loop(count: int = 2000, loop_count: int = 50, length: int = 238):
+    """批量接口 vs 逐条调用 predict_folding"""
+    print(f"\n📦 批量预测基准 (序列长度 {length})")
+    
+    predictor = ProteinFoldingPredictor()
+    sequences = random_sequences(count, length)
+    
+    # 逐条调用 (包含能量图渲染，样本较少)
+    start_time = time.perf_counter()
+    for sequence in sequences[:loop_count]:
+        predictor.predict_folding(sequence)
+    loop_rate = loop_count / (time.perf_counter() - start_time)
+    
+    # 批量接口
+    start_time = time.perf_counter()
+    predictor.predict_folding_batch(sequences)
+    batch_rate = count / (time.perf_counter() - start_time)
+    
+    print(f"  逐条调用 predict_folding: {loop_rate:10.1f} 条/秒 ({loop_count} 条)")
+    print(f"  predict_folding_batch:    {batch_rate:10.1f} 条/秒 ({count} 条)")
+    print(f"  加速比: {batch_rate / loop_rate:.1f}x")
+    
+    status = "✅" if batch_rate >= BATCH_THROUGHPUT_TARGET else "⚠️"
+    print(f"  {status} 吞吐目标: {BATCH_THROUGHPUT_TARGET} 条/秒")
+
+
+def benchmark_feature_engine(count: int = 200, length: int = 1000):
+    """向量化特征引擎 vs 逐残基字典查找 (每条序列全部标量特征)"""
+    print(f"\n🧮 特征引擎基准 (序列长度 {length})")
+    
+    predictor = ProteinFoldingPredictor()
+    sequences = random_sequences(count, length, seed=7)
+    
+    def dict_lookup_features(sequence: str):
+        # 原实现：每个特征各自遍历序列并逐残基查字典
+        np.mean([predictor.hydrophobicity_scale.get(aa, 0) for aa in sequence])
+        np.mean([predictor.aa_volume.get(aa, 0) for aa in sequence])
+        np.mean([predictor.flexibility_index.get(aa, 0) for aa in sequence])
+        np.mean([predictor.isoelectric_points.get(aa, 6.0) for aa in sequence])
+        sum(predictor.charged_aa.get(aa, 0) for aa in sequence)
+        sum(predictor.disorder_favoring.get(aa, 0) for aa in sequence)
+        sum(predictor.order_favoring.get(aa, 0) for aa in sequence)
+        sum(predictor.thermostable_aa.get(aa, 1) for aa in sequence)
+        sum(predictor.thermolabile_aa.get(aa, 1) for aa in sequence)
+        # 组成类特征：20次 str.count + 8类 + 3种二级结构 + Cys 各自遍历
+        for aa in AMINO_ACIDS:
+            sequence.count(aa)
+        for aa_set in list(predictor.aa_categories.values()) + \
+                list(predictor.secondary_structure_favoring.values()):
+            sum(1 for aa in sequence if aa in aa_set)
+        sequence.count('C')
+    
+    def engine_features(sequence: str):
+        # 新实现：一次编码 + 一次 gather + 一次直方图得到全部特征
+        predictor.feature_engine.compute(encode_sequence(sequence))
+    
+    def public_methods(sequence: str):
+        # 公开方法逐个调用 (每个方法各自清理序列，特征计算共享)
+        predictor.calculate_hydrophobicity(sequence)
+        predictor.calculate_average_volume(sequence)
+        predictor.calculate_flexibility(sequence)
+        predictor.calculate_isoelectric_point(sequence)
+        predictor.calculate_charge_balance(sequence)
+        predictor.calculate_disorder_tendency(sequence)
+        predictor.calculate_thermostability_indicators(sequence)
+        predictor.calculate_amino_acid_composition(sequence)
+        predictor.calculate_aa_category_distribution(sequence)
+        predictor.calculate_secondary_structure_tendency(sequence)
+    
+    timings = {}
+    for name, func in [("逐残基字典查找", dict_lookup_features),
+                       ("向量化特征引擎", engine_features),
+                       ("公开calculate_*方法", public_methods)]:
+        start_time = time.perf_counter()
+        for sequence in sequences:
+            func(sequence)
+        timings[name] = (time.perf_counter() - start_time) / count * 1e6
+        print(f"  {name}: {timings[name]:10.1f} 微秒/条")
+    
+    print(f"  加速比: {timings['逐残基字典查找'] / timings['向量化特征引擎']:.1f}x")
+
+
+def benchmark_analysis_backends(count: int = 200, length: int = 1000):
+    """不稳定性指数/芳香性/分子量：原生内核 vs BioPython"""
+    print(f"\n⚗️ 分析后端基准 (序列长度 {length})")
+    
+    sequences = random_sequences(count, length, seed=11)
+    timings = {}
+    for backend in ("biopython", "native"):
+        predictor = ProteinFoldingPredictor(analysis_backend=backend)
+        start_time = time.perf_counter()
+        for sequence in sequences:
+            predictor.build_context(sequence)
+        timings[backend] = (time.perf_counter() - start_time) / count * 1e6
+        print(f"  {backend:10s}: {timings[backend]:10.1f} 微秒/条")
+    
+    print(f"  加速比: {timings['biopython'] / timings['native']:.1f}x")
+
+
+def current_rss_mb() -> float:
+    """当前进程常驻内存 (MB)，仅Linux可用，其它平台返回0"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+def benchmark_energy_plot(count: int = 1000, baseline_count: int = 20):
+    """复用画布渲染器 vs 每次新建 pyplot 图，以及长时间渲染的内存稳定性"""
+    print(f"\n📈 能量图渲染基准 ({count} 次)")
+    
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import base64
+    import io
+    from concurrent.futures import ThreadPoolExecutor
+    from ai.energy_plot import EnergyPlotRenderer
+    
+    rng = np.random.default_rng(3)
+    profiles = [rng.normal(0, 1.2, 100) for _ in range(50)]
+    
+    def pyplot_render(energy_values):
+        # 原实现：每次通过 pyplot 新建图表，tight_layout + bbox_inches='tight'
+        x = np.arange(len(energy_values))
+        plt.figure(figsize=(8, 4))
+        plt.plot(x, energy_values, 'b-', linewidth=2, label='Folding Energy')
+        plt.fill_between(x, energy_values, alpha=0.3, color='blue')
+        plt.xlabel('Amino Acid Position', fontsize=10)
+        plt.ylabel('Relative Energy (kcal/mol)', fontsize=10)
+        plt.title('Protein Folding Energy Path', fontsize=12, fontweight='bold')
+        plt.grid(True, alpha=0.3)
+        plt.legend(fontsize=9)
+        stable_regions = np.where(energy_values < -0.5)[0]
+        if len(stable_regions) > 0:
+            plt.scatter(stable_regions, energy_values[stable_regions], color='green', s=20, alpha=0.7)
+        plt.tight_layout()
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
+        plt.close()
+        return base64.b64encode(buffer.getvalue()).decode()
+    
+    start_time = time.perf_counter()
+    for i in range(baseline_count):
+        pyplot_render(profiles[i % len(profiles)])
+    pyplot_ms = (time.perf_counter() - start_time) / baseline_count * 1000
+    
+    renderer = EnergyPlotRenderer()
+    renderer.render(profiles[0])  # 预热：创建画布
+    rss_start = current_rss_mb()
+    rss_samples = []
+    start_time = time.perf_counter()
+    for i in range(count):
+        renderer.render(profiles[i % len(profiles)])
+        if (i + 1) % max(1, count // 10) == 0:
+            rss_samples.append(current_rss_mb())
+    pooled_ms = (time.perf_counter() - start_time) / count * 1000
+    
+    print(f"  pyplot 每次新建: {pyplot_ms:8.1f} 毫秒/张")
+    print(f"  复用画布渲染器:  {pooled_ms:8.1f} 毫秒/张")
+    print(f"  加速比: {pyplot_ms / pooled_ms:.1f}x")
+    if rss_samples:
+        print(f"  常驻内存: 起始 {rss_start:.1f} MB，过程中 {min(rss_samples):.1f}-{max(rss_samples):.1f} MB，"
+              f"结束 {rss_samples[-1]:.1f} MB")
+    
+    # 多线程并发渲染 (每个线程各自的画布)
+    threads = 4
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(renderer.render, profiles[:threads]))  # 预热各线程画布
+        start_time = time.perf_counter()
+        list(executor.map(renderer.render, profiles * 2))
+    threaded_rate = len(profiles) * 2 / (time.perf_counter() - start_time)
+    print(f"  {threads}线程并发: {threaded_rate:8.1f} 张/秒")
+
+
+def benchmark_parallel(count: int = 20000, length: int = 238, workers: int = None):
+    """多进程执行器 vs 单进程批量接口"""
+    workers = workers or os.cpu_count() or 1
+    print(f"\n🧮 多进程批量预测基准 ({workers} 进程, {count} 条)")
+    
+    sequences = random_sequences(count, length)
+    
+    start_time = time.perf_counter()
+    ProteinFoldingPredictor().predict_folding_batch(sequences[:count // 4])
+    single_rate = (count // 4) / (time.perf_counter() - start_time)
+    
+    executor = ParallelPredictor(workers=workers, chunk_size=128)
+    start_time = time.perf_counter()
+    for _ in executor.imap(sequences, ordered=False):
+        pass
+    parallel_rate = count / (time.perf_counter() - start_time)
+    
+    print(f"  单进程 predict_folding_batch: {single_rate:10.1f} 条/秒")
+    print(f"  ParallelPredictor:            {parallel_rate:10.1f} 条/秒")
+    print(f"  加速比: {parallel_rate / single_rate:.1f}x")
+
+
+def benchmark_columnar_export(count: int = 20000, length: int = 238):
+    """JSON Lines vs Parquet / Arrow IPC 写出耗时与文件大小"""
+    import json
+    import tempfile
+    
+    print(f"\n🧱 结果导出基准 ({count} 条)")
+    try:
+        from ai.columnar_export import write_results
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("  ⚠️ 未安装 pyarrow，跳过")
+        return
+    
+    results = ProteinFoldingPredictor(noise_mode="off").predict_folding_batch(random_sequences(count, length))
+    for result in results:
+        result.pop("energy_profile")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "results.jsonl")
+        start_time = time.perf_counter()
+        with open(path, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        print(f"  JSON Lines: {time.perf_counter() - start_time:6.2f} 秒, {os.path.getsize(path) / 1e6:7.1f} MB")
+        
+        for file_format in ("parquet", "arrow"):
+            path = os.path.join(temp_dir, f"results.{file_format}")
+            start_time = time.perf_counter()
+            write_results(results, path, file_format)
+            elapsed = time.perf_counter() - start_time
+            print(f"  {file_format:10s}: {elapsed:6.2f} 秒, {os.path.getsize(path) / 1e6:7.1f} MB")
+
+
+def benchmark_window_profiles(count: int = 200, length: int = 1000, window_sizes=(5, 9, 15, 21)):
+    """前缀和滑动窗口曲线 vs 逐窗口重新求平均"""
+    print(f"\n📉 滑动窗口曲线基准 (序列长度 {length}, 窗口 {window_sizes})")
+    
+    predictor = ProteinFoldingPredictor()
+    sequences = random_sequences(count, length)
+    scale = predictor.hydrophobicity_scale
+    
+    # 参照实现：每个窗口重新查表求平均 (只计算疏水性)
+    baseline_count = max(1, count // 20)
+    start_time = time.perf_counter()
+    for sequence in sequences[:baseline_count]:
+        for window_size in window_sizes:
+            [np.mean([scale.get(aa, 0) for aa in sequence[i:i + window_size]])
+             for i in range(len(sequence) - window_size + 1)]
+    baseline_rate = baseline_count / (time.perf_counter() - start_time)
+    
+    start_time = time.perf_counter()
+    for sequence in sequences:
+        predictor.calculate_window_profiles(sequence, window_sizes)
+    prefix_rate = count / (time.perf_counter() - start_time)
+    
+    start_time = time.perf_counter()
+    for window_size in window_sizes:
+        predictor.calculate_window_profiles_batch(sequences, window_size)
+    batch_rate = count / (time.perf_counter() - start_time)
+    
+    print(f"  逐窗口平均 (仅疏水性): {baseline_rate:10.1f} 条/秒")
+    print(f"  前缀和 (3条曲线):      {prefix_rate:10.1f} 条/秒")
+    print(f"  批量填充 (每个窗口一次调用): {batch_rate:10.1f} 条/秒")
+
+
+def benchmark_mutation_scan(length: int = 1000, sample_count: int = 200):
+    """饱和突变扫描 vs 逐个突变体 predict_folding"""
+    print(f"\n🧬 饱和突变扫描基准 (序列长度 {length}, {19 * length} 个突变体)")
+    
+    predictor = ProteinFoldingPredictor(noise_mode="off")
+    sequence = random_sequences(1, length)[0]
+    
+    start_time = time.perf_counter()
+    predictor.scan_point_mutations(sequence)
+    scan_time = time.perf_counter() - start_time
+    
+    # 逐个突变体完整预测 (抽样后外推)
+    rng = random.Random(0)
+    start_time = time.perf_counter()
+    for _ in range(sample_count):
+        position = rng.randrange(length)
+        mutant = sequence[:position] + rng.choice(AMINO_ACIDS) + sequence[position + 1:]
+        predictor.predict_folding(mutant, render_plot=False)
+    loop_time = (time.perf_counter() - start_time) / sample_count * 19 * length
+    
+    print(f"  scan_point_mutations:     {scan_time * 1000:10.2f} ms")
+    print(f"  逐个 predict_folding (外推): {loop_time * 1000:10.0f} ms")
+    print(f"  加速比: {loop_time / scan_time:.0f}x")
+
+
+def benchmark_cleaning(count: int = 2000, length: int = 1000):
+    """查表清理 + 无效字符检测 vs 逐字符清理 + 集合差"""
+    from ai.predictor import clean_residues
+    
+    print(f"\n🧹 序列清理基准 ({count} 条小写带换行序列, 长度 {length})")
+    
+    sequences = ['\n'.join(s[i:i + 60] for i in range(0, length, 60)).lower()
+                 for s in random_sequences(count, length)]
+    valid = set(AMINO_ACIDS)
+    
+    start_time = time.perf_counter()
+    for sequence in sequences:
+        cleaned = ''.join(c.upper() for c in sequence if c.isalpha())
+        set(cleaned) - valid
+    loop_time = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    for sequence in sequences:
+        clean_residues(sequence)
+    table_time = time.perf_counter() - start_time
+    
+    print(f"  逐字符清理:   {loop_time / count * 1e6:8.1f} µs/条")
+    print(f"  转换表清理:   {table_time / count * 1e6:8.1f} µs/条")
+    print(f"  加速比: {loop_time / table_time:.0f}x")
+
+
+def benchmark_long_sequences(lengths=(1000, 5000, 10000, 25000, 50000), repeats: int = 20):
+    """
+    长序列模式：预测耗时与峰值内存随长度变化，断言时间近似线性、每残基内存有界
+    
+    结果中的 energy_profile 每个残基一个值，输出本身是 O(n) 的，
+    因此峰值内存只能做到与长度成正比 (每残基字节数不随长度增长)，而非常数。
+    """
+    import tracemalloc
+    
+    print(f"\n🧵 长序列模式基准 (每个长度 {repeats} 次，不渲染能量图)")
+    
+    predictor = ProteinFoldingPredictor(noise_mode="off", long_sequence_mode=True)
+    ns_per_residue = []
+    bytes_per_residue = []
+    for length in lengths:
+        sequence = random_sequences(1, length)[0]
+        predictor.predict_folding(sequence, render_plot=False)
+        
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            result = predictor.predict_folding(sequence, render_plot=False)
+        elapsed = (time.perf_counter() - start_time) / repeats
+        
+        tracemalloc.start()
+        result = predictor.predict_folding(sequence, render_plot=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        start_time = time.perf_counter()
+        ensure_energy_plot(result)
+        plot_time = time.perf_counter() - start_time
+        
+        print(f"  长度 {length:6d}: {elapsed * 1000:8.2f} ms/条 ({elapsed / length * 1e9:6.0f} ns/残基)，"
+              f"峰值内存 {peak / 1024:8.0f} KB ({peak / length:5.1f} B/残基)，能量图 {plot_time * 1000:6.1f} ms")
+        ns_per_residue.append(elapsed / length * 1e9)
+        bytes_per_residue.append(peak / length)
+    
+    # 最短序列的每残基开销含固定成本，较长序列不应超过它的 2 倍 (超线性增长会远超此界)
+    assert max(ns_per_residue[1:]) <= 2 * ns_per_residue[0], \
+        f"每残基耗时随长度增长: {[round(ns) for ns in ns_per_residue]} ns"
+    assert max(bytes_per_residue[1:]) <= 1.5 * bytes_per_residue[0], \
+        f"每残基峰值内存随长度增长: {[round(b, 1) for b in bytes_per_residue]} B"
+
+
+def benchmark_session_edits(lengths=(1000, 10000, 100000), edit_count: int = 500, full_count: int = 20):
+    """
+    交互式会话单残基编辑延迟 vs 完整 predict_folding (长序列模式)，随序列长度变化
+    
+    会话只在 C 层对整条序列做几次线性扫描 (清理、前后缀比较、拼接编码)，
+    其余更新与长度无关；长度增长100倍时单次编辑延迟应基本不变，而完整预测随长度线性增长。
+    """
+    print(f"\n✏️  交互式编辑重新评分基准 (每个长度 {edit_count} 次单残基编辑，不生成能量路径)")
+    
+    predictor = ProteinFoldingPredictor(noise_mode="off", long_sequence_mode=True)
+    rng = random.Random(0)
+    edit_times = []
+    for length in lengths:
+        sequence = random_sequences(1, length)[0]
+        edits = []
+        for _ in range(edit_count):
+            position = rng.randrange(length)
+            sequence = sequence[:position] + rng.choice(AMINO_ACIDS) + sequence[position + 1:]
+            edits.append(sequence)
+        
+        session = PredictorSession(predictor)
+        session.predict(edits[0], render_plot=False)
+        start_time = time.perf_counter()
+        for edited in edits:
+            session.predict(edited, render_plot=False)
+        edit_time = (time.perf_counter() - start_time) / edit_count
+        assert session.full_updates == 1
+        
+        start_time = time.perf_counter()
+        for edited in edits[:full_count]:
+            predictor.predict_folding(edited, render_plot=False)
+        full_time = (time.perf_counter() - start_time) / full_count
+        
+        print(f"  长度 {length:6d}: 会话 {edit_time * 1000:6.3f} ms/次，完整预测 {full_time * 1000:7.3f} ms/次，"
+              f"加速比 {full_time / edit_time:5.1f}x")
+        edit_times.append((edit_time, full_time))
+    
+    # 长度增长100倍，线性方案的延迟也增长约100倍；会话只允许 C 层扫描带来的小幅增长
+    assert edit_times[-1][0] <= 8 * edit_times[0][0], \
+        f"单次编辑延迟随长度增长: {[round(t * 1e6) for t, _ in edit_times]} us"
+    assert edit_times[-1][1] >= 5 * edit_times[-1][0], \
+        f"最长序列上会话相对完整预测加速不足: {edit_times[-1][1] / edit_times[-1][0]:.1f}x"
+
+
+def main():
+    """运行所有基准"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="ProteinFoldDAO 预测器性能基准")
+    parser.add_argument("--render-count", type=int, default=1000,
+                        help="能量图渲染次数 (内存稳定性可用 10000)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="多进程基准的进程数 (默认 CPU 核数)")
+    args = parser.parse_args()
+    
+    print("🚀 ProteinFoldDAO 预测器性能基准")
+    print("=" * 60)
+    
+    benchmark_batch_vs_loop()
+    benchmark_cleaning()
+    benchmark_feature_engine()
+    benchmark_analysis_backends()
+    benchmark_window_profiles()
+    benchmark_mutation_scan()
+    benchmark_long_sequences()
+    benchmark_session_edits()
+    benchmark_energy_plot(args.render_count)
+    benchmark_parallel(workers=args.workers)
+    benchmark_columnar_export()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 缓存软/硬过期与后台刷新测试 (使用本地桩服务器，不访问外网)
+"""
+
+import sys
+import os
+import gc
+import sqlite3
+import tempfile
+import time
+import unittest
+import weakref
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from ai.cache_refresh import AccessCounter, CacheRefresher, CacheTTL, shared_refresher, weak_method
+from ai.database_manager import ProteinDatabaseManager
+from ai.http_client import HTTPClient
+from ai.simple_database_manager import SimpleProteinDatabaseManager
+from ai.sqlite_pool import shared_pool
+from tests.test_http_client import StubServer, json_body, uniprot_entry
+
+TTLS = {"proteins": CacheTTL(soft=3600, hard=86400)}
+
+
+def wait_until(condition, timeout=5.0):
+    """轮询直到 condition() 为真，超时返回 False"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestCacheTTL(unittest.TestCase):
+    """CacheTTL 测试"""
+    
+    def test_validation(self):
+        """测试软有效期必须为正且不超过硬有效期"""
+        for soft, hard in ((0, 10), (20, 10), (-1, 10)):
+            with self.assertRaises(ValueError):
+                CacheTTL(soft=soft, hard=hard)
+        self.assertEqual(CacheTTL(soft=10, hard=10).hard, 10)
+    
+    def test_stale_and_expired(self):
+        """测试按更新时间判断软/硬过期"""
+        ttl = CacheTTL(soft=3600, hard=86400)
+        now = datetime.now()
+        self.assertFalse(ttl.is_stale(now - timedelta(minutes=30)))
+        self.assertTrue(ttl.is_stale(now - timedelta(hours=2)))
+        self.assertFalse(ttl.is_expired(now - timedelta(hours=2)))
+        self.assertTrue(ttl.is_expired(now - timedelta(days=2)))
+
+
+class TestCacheRefresher(unittest.TestCase):
+    """CacheRefresher 测试"""
+    
+    def test_access_counter(self):
+        """测试访问计数累计到阈值时提示写入，drain 后清空"""
+        counter = AccessCounter(flush_threshold=3)
+        self.assertFalse(counter.record(["A", "B"]))
+        self.assertTrue(counter.record(["A"]))
+        self.assertEqual(sorted(counter.drain()), [(1, "B"), (2, "A")])
+        self.assertEqual(counter.drain(), [])
+    
+    def test_on_demand_worker(self):
+        """测试安排的刷新由按需启动的线程去重、分批处理，处理完后线程退出"""
+        batches = []
+        refresher = CacheRefresher(lambda ids: batches.append(ids) or len(ids), batch_size=2)
+        refresher.stop()
+        self.assertEqual(refresher.schedule(["A", "B", "A", "C"]), 3)
+        self.assertEqual(refresher.schedule(["B"]), 0)
+        self.assertEqual(refresher.pending(), 3)
+        
+        refresher.start(interval=60)
+        self.assertTrue(wait_until(lambda: refresher.pending() == 0 and refresher.stats.refreshed == 3))
+        self.assertEqual(batches, [["A", "B"], ["C"]])
+        refresher.stop(timeout=5)
+        
+        # 按需模式：没有 start 也会为新的刷新启动线程，队列清空后退出
+        refresher = CacheRefresher(lambda ids: len(ids))
+        refresher.schedule(["D"])
+        self.assertTrue(wait_until(lambda: refresher.stats.refreshed == 1 and refresher._thread is None))
+    
+    def test_failures_counted(self):
+        """测试刷新异常或部分失败计入 stats.failed，不影响后续刷新"""
+        def refresh(ids):
+            if "bad" in ids:
+                raise RuntimeError("upstream down")
+            return len(ids) - 1
+        
+        refresher = CacheRefresher(refresh, batch_size=2)
+        refresher.stop()
+        refresher.schedule(["bad", "x", "y", "z"])
+        self.assertEqual(refresher.run_pending(), 1)
+        self.assertEqual(refresher.stats.to_dict(), {"scheduled": 4, "refreshed": 1, "proactive": 0, "failed": 3})
+    
+    def test_proactive_refresh(self):
+        """测试常驻线程按间隔主动刷新 select_hot 选出的条目"""
+        limits = []
+        
+        def select_hot(limit):
+            limits.append(limit)
+            return ["HOT"]
+        
+        refresher = CacheRefresher(lambda ids: len(ids), select_hot, batch_size=5)
+        refresher.start(interval=0.05)
+        self.assertTrue(wait_until(lambda: refresher.stats.proactive >= 2))
+        refresher.stop(timeout=5)
+        self.assertEqual(set(limits), {5})
+        with self.assertRaises(ValueError):
+            refresher.start(interval=0)
+    
+    def test_shared_refresher(self):
+        """测试按命名空间与路径共享，":memory:" 每次新建"""
+        def factory():
+            return CacheRefresher(lambda ids: len(ids))
+        
+        self.assertIs(shared_refresher("refresh.db", "A", factory),
+                      shared_refresher(os.path.abspath("refresh.db"), "A", factory))
+        self.assertIsNot(shared_refresher("refresh.db", "A", factory), shared_refresher("refresh.db", "B", factory))
+        self.assertIsNot(shared_refresher(":memory:", "A", factory), shared_refresher(":memory:", "A", factory))
+        
+        # 有效期不同的管理器不共用刷新器
+        self.assertIs(shared_refresher("refresh.db", "A", factory, ttls=dict(TTLS)),
+                      shared_refresher("refresh.db", "A", factory, ttls=dict(TTLS)))
+        self.assertIsNot(shared_refresher("refresh.db", "A", factory, ttls=TTLS),
+                         shared_refresher("refresh.db", "A", factory))
+    
+    def test_weak_method(self):
+        """测试弱引用回调不延长实例的生命周期，实例回收后返回默认值"""
+        class Owner:
+            def refresh(self, ids):
+                return len(ids)
+        
+        owner = Owner()
+        callback = weak_method(owner.refresh, 0)
+        self.assertEqual(callback(["A", "B"]), 2)
+        
+        del owner
+        gc.collect()
+        self.assertEqual(callback(["A", "B"]), 0)
+        
+        self.assertIs(weak_method(len, 0), len)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+    """数据库管理器返回软过期数据并后台刷新"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "cache.db")
+        self.server = StubServer({
+            f"/uniprotkb/{uniprot_id}": [(200, {}, json_body(uniprot_entry(uniprot_id, f"Fresh {uniprot_id}")), 0)]
+            for uniprot_id in ("P00001", "P00002", "P00003")
+        })
+        self.client = HTTPClient()
+    
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+        shared_pool(self.db_path).close()
+        self.temp_dir.cleanup()
+    
+    def make_manager(self, manager_class, background=False):
+        manager = manager_class(self.db_path, ttls=TTLS)
+        manager.http = self.client
+        manager.uniprot_base_url = self.server.url
+        if not background:
+            # 刷新留在队列中，由测试调用 run_pending 处理
+            manager.refresher.stop()
+        return manager
+    
+    def cache_aged(self, manager, uniprot_id, age):
+        """写入一条 age 之前更新的缓存"""
+        protein = manager._entry_to_protein(uniprot_entry(uniprot_id, f"Old {uniprot_id}"))
+        manager.cache_proteins([replace(protein, last_updated=datetime.now() - age)])
+    
+    def check_stale_served(self, manager_class):
+        manager = self.make_manager(manager_class)
+        self.cache_aged(manager, "P00001", timedelta(hours=2))
+        self.cache_aged(manager, "P00002", timedelta(minutes=5))
+        
+        # 软过期：立即返回旧数据，不发请求，安排后台刷新
+        self.assertEqual(manager.get_protein_by_uniprot_id("P00001").name, "Old P00001")
+        self.assertEqual([p.name for p in manager.get_proteins_by_uniprot_ids(["P00001", "P00002"])],
+                         ["Old P00001", "Old P00002"])
+        self.assertEqual(self.client.requests_sent, 0)
+        self.assertEqual(manager.refresher.pending(), 1)
+        
+        self.assertEqual(manager.refresher.run_pending(), 1)
+        self.assertEqual(self.server.hits["/uniprotkb/P00001"], 1)
+        self.assertEqual(self.server.hits["/uniprotkb/P00002"], 0)
+        refreshed = manager.get_protein_by_uniprot_id("P00001")
+        self.assertEqual(refreshed.name, "Fresh P00001")
+        self.assertFalse(manager._is_cache_stale(refreshed.last_updated))
+        self.assertEqual(manager.refresher.pending(), 0)
+    
+    def test_stale_served_database_manager(self):
+        """测试 ProteinDatabaseManager 返回软过期数据并后台刷新"""
+        self.check_stale_served(ProteinDatabaseManager)
+    
+    def test_stale_served_simple_database_manager(self):
+        """测试 SimpleProteinDatabaseManager 返回软过期数据并后台刷新"""
+        self.check_stale_served(SimpleProteinDatabaseManager)
+    
+    def check_refresher_binding(self, manager_class):
+        first = self.make_manager(manager_class)
+        other = manager_class(self.db_path, ttls={"proteins": CacheTTL(soft=60, hard=600)})
+        self.assertIsNot(other.refresher, first.refresher)
+        
+        # 共享的刷新器不让第一个管理器一直存活，之后由最新的管理器执行刷新
+        first_ref = weakref.ref(first)
+        refresher = first.refresher
+        del first
+        gc.collect()
+        self.assertIsNone(first_ref())
+        
+        second = self.make_manager(manager_class)
+        self.assertIs(second.refresher, refresher)
+        self.cache_aged(second, "P00001", timedelta(hours=2))
+        second.get_protein_by_uniprot_id("P00001")
+        self.assertEqual(refresher.run_pending(), 1)
+        self.assertEqual(second._get_cached_protein_by_id("P00001").name, "Fresh P00001")
+    
+    def test_refresher_binding_database_manager(self):
+        """测试 ProteinDatabaseManager 的刷新器按有效期区分且只弱引用管理器"""
+        self.check_refresher_binding(ProteinDatabaseManager)
+    
+    def test_refresher_binding_simple_database_manager(self):
+        """测试 SimpleProteinDatabaseManager 的刷新器按有效期区分且只弱引用管理器"""
+        self.check_refresher_binding(SimpleProteinDatabaseManager)
+    
+    def test_background_thread_refreshes(self):
+        """测试按需启动的后台线程完成刷新，搜索结果随之更新"""
+        manager = self.make_manager(SimpleProteinDatabaseManager, background=True)
+        self.cache_aged(manager, "P00001", timedelta(hours=2))
+        self.assertEqual([p.name for p in manager.search_protein_by_name("P00001")], ["Old P00001"])
+        self.assertTrue(wait_until(lambda: manager.refresher.stats.refreshed == 1))
+        self.assertEqual([p.name for p in manager.search_protein_by_name("fresh")], ["Fresh P00001"])
+    
+    def test_hard_expired_fetched_synchronously(self):
+        """测试超过硬有效期的行视为未命中，同步获取"""
+        manager = self.make_manager(ProteinDatabaseManager)
+        self.cache_aged(manager, "P00001", timedelta(days=2))
+        self.assertIsNone(manager._get_cached_protein_by_id("P00001"))
+        self.assertEqual(manager.get_protein_by_uniprot_id("P00001").name, "Fresh P00001")
+        self.assertEqual(self.server.hits["/uniprotkb/P00001"], 1)
+        self.assertEqual(manager.refresher.pending(), 0)
+    
+    def test_access_counts_and_hot_refresh(self):
+        """测试访问计数批量写入，主动刷新按访问次数选择已软过期的条目"""
+        manager = self.make_manager(ProteinDatabaseManager)
+        for uniprot_id in ("P00001", "P00002"):
+            self.cache_aged(manager, uniprot_id, timedelta(hours=2))
+        self.cache_aged(manager, "P00003", timedelta(minutes=5))
+        for _ in range(3):
+            manager.get_protein_by_uniprot_id("P00002")
+            manager.get_protein_by_uniprot_id("P00003")
+        manager.get_protein_by_uniprot_id("P00001")
+        
+        # 读取时只在内存中计数
+        with manager._pool.connection() as conn:
+            self.assertEqual(conn.execute("SELECT SUM(access_count) FROM proteins").fetchone()[0], 0)
+        self.assertEqual(manager.flush_access_counts(), 3)
+        with manager._pool.connection() as conn:
+            counts = dict(conn.execute("SELECT uniprot_id, access_count FROM proteins"))
+        self.assertEqual(counts, {"P00001": 1, "P00002": 3, "P00003": 3})
+        
+        # P00003 访问多但未软过期，不选
+        self.assertEqual(manager._select_hot_expired(1), ["P00002"])
+        self.assertEqual(manager._select_hot_expired(10), ["P00002", "P00001"])
+        manager.refresher.batch_size = 1
+        self.assertEqual(manager.refresher.refresh_hot(), 1)
+        self.assertEqual(manager.refresher.stats.proactive, 1)
+        self.assertEqual(manager._get_cached_protein_by_id("P00002").name, "Fresh P00002")
+        self.assertEqual(manager._select_hot_expired(10), ["P00001"])
+    
+    def test_access_updates_skip_search_index(self):
+        """测试访问计数的更新不触发全文索引重建 (重建会写入新的索引段)"""
+        manager = self.make_manager(ProteinDatabaseManager)
+        self.cache_aged(manager, "P00001", timedelta(minutes=5))
+        manager.get_protein_by_uniprot_id("P00001")
+        with manager._pool.connection() as conn:
+            segments = conn.execute("SELECT COUNT(*) FROM proteins_fts_data").fetchone()[0]
+        self.assertEqual(manager.flush_access_counts(), 1)
+        with manager._pool.connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM proteins_fts_data").fetchone()[0], segments)
+            conn.execute("INSERT INTO proteins_fts(proteins_fts, rank) VALUES ('integrity-check', 1)")
+        self.assertEqual([p.uniprot_id for p in manager.search_protein_by_name("Old")], ["P00001"])
+    
+    def test_legacy_cache_migrated(self):
+        """测试旧缓存文件补加访问计数列，旧的全文索引触发器被替换"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE proteins (uniprot_id TEXT PRIMARY KEY, name TEXT, sequence TEXT, "
+                     "organism TEXT, function TEXT, length INTEGER, molecular_weight REAL, pdb_ids TEXT, "
+                     "alphafold_id TEXT, confidence_score REAL, last_updated TIMESTAMP, cache_expiry TIMESTAMP)")
+        conn.execute("CREATE TRIGGER proteins_fts_update AFTER UPDATE ON proteins BEGIN SELECT 1; END")
+        conn.execute("INSERT INTO proteins (uniprot_id, name, last_updated) VALUES ('P00001', 'Insulin', ?)",
+                     (time.time(),))
+        conn.commit()
+        conn.close()
+        
+        manager = self.make_manager(ProteinDatabaseManager)
+        with manager._pool.connection() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(proteins)")}
+            triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+            row = conn.execute("SELECT access_count, last_accessed FROM proteins").fetchone()
+        self.assertTrue({"access_count", "last_accessed"} <= columns)
+        self.assertNotIn("proteins_fts_update", triggers)
+        self.assertIn("proteins_fts_update_text", triggers)
+        self.assertEqual(row, (0, None))
+    
+    
+    def check_legacy_text_timestamps(self, manager_class):
+        """旧版本写入的文本 last_updated：过期行视为未命中，未过期行按原时间返回"""
+        now = datetime.now()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE proteins (uniprot_id TEXT PRIMARY KEY, name TEXT, sequence TEXT, "
+                     "organism TEXT, function TEXT, length INTEGER, molecular_weight REAL, pdb_ids TEXT, "
+                     "alphafold_id TEXT, confidence_score REAL, last_updated TIMESTAMP, cache_expiry TIMESTAMP)")
+        rows = [("P00001", "Old P00001", str(now - timedelta(days=5)), (now - timedelta(days=4)).timestamp()),
+                ("P00002", "Old P00002", str(now - timedelta(minutes=5)), (now + timedelta(days=1)).timestamp()),
+                ("P00003", "Old P00003", "not a time", (now + timedelta(days=1)).timestamp())]
+        conn.executemany("INSERT INTO proteins VALUES (?, ?, 'MALW', 'Homo sapiens', '', 4, 500.0, '[]', "
+                         "NULL, NULL, ?, ?)", rows)
+        conn.commit()
+        conn.close()
+        
+        manager = self.make_manager(manager_class)
+        with manager._pool.connection() as conn:
+            types = {row[0] for row in conn.execute("SELECT typeof(last_updated) FROM proteins")}
+        self.assertNotIn("text", types)
+        
+        # 过期的旧行不返回，同步获取
+        self.assertEqual(manager.search_protein_by_name("P00001"), [])
+        self.assertEqual(manager.get_protein_by_uniprot_id("P00001").name, "Fresh P00001")
+        
+        # 未过期的旧行保留原更新时间
+        cached = manager.get_protein_by_uniprot_id("P00002")
+        self.assertEqual(cached.name, "Old P00002")
+        self.assertEqual(cached.last_updated, now - timedelta(minutes=5))
+        
+        # 无法解析的更新时间不当作刚更新：照常返回并安排刷新
+        self.assertEqual(manager.get_protein_by_uniprot_id("P00003").name, "Old P00003")
+        self.assertEqual(manager.refresher.pending(), 1)
+        self.assertEqual(manager.refresher.run_pending(), 1)
+        self.assertEqual(manager.get_protein_by_uniprot_id("P00003").name, "Fresh P00003")
+    
+    def test_legacy_text_timestamps_database_manager(self):
+        """测试 ProteinDatabaseManager 读取文本时间的旧缓存"""
+        self.check_legacy_text_timestamps(ProteinDatabaseManager)
+    
+    def test_legacy_text_timestamps_simple_database_manager(self):
+        """测试 SimpleProteinDatabaseManager 读取文本时间的旧缓存"""
+        self.check_legacy_text_timestamps(SimpleProteinDatabaseManager)
+    
+    def test_hard_expiry_recorded_at_write(self):
+        """测试硬有效期取写入时记录的 cache_expiry，不随读取方的 ttls 配置变化"""
+        manager = self.make_manager(ProteinDatabaseManager)
+        manager.protein_ttl = CacheTTL(soft=3600, hard=30 * 86400)
+        self.cache_aged(manager, "P00001", timedelta(days=2))
+        manager.protein_ttl = TTLS["proteins"]
+        self.assertEqual(manager.get_protein_by_uniprot_id("P00001").name, "Old P00001")
+        self.assertEqual(self.client.requests_sent, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
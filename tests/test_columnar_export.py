@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 列式导出测试
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from ai.predictor import ProteinFoldingPredictor, AMINO_ACIDS
+from ai.columnar_export import (RESULT_COLUMNS, AA_CATEGORY_NAMES, ColumnarWriter, flatten_result,
+                                 write_results)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+GFP_SEQUENCE = "MSKGEELFTGVVPILVELDGDVNGHKFSVSGEGEGDATYGKLTLKFICTTGKLPVPWPTLVTTFSYGVQCFSRYPDHMKQHDFFKSAMPEGYVQERTIFFKDDGNYKTRAEVKFEGDTLVNRIELKGIDFKEDGNILGHKLEYNYNSHNVYIMADKQKNGIKVNFKIRHNIEDGSVQLADHYQQNTPIGDGPVLLPDNHYLSTQSALSKDPNEKRDHMVLLEFVTAAGITHGMDELYK"
+INSULIN_SEQUENCE = "MALWMRLLPLLALLALWGPDPAAAFVNQHLCGSHLVEALYLVCGERGFFYTPKTRREAEDLQVGQVELGGGPGAGSLQPLALEGSLQKRGIVEQCCTSICSLYQLENYCN"
+
+
+class TestFlattenResult(unittest.TestCase):
+    """结果展开测试"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor(noise_mode="off")
+    
+    def test_columns_match_result(self):
+        """测试展开的列与嵌套结果一致"""
+        result = self.predictor.predict_folding(GFP_SEQUENCE, render_plot=False)
+        row = flatten_result(result, "gfp", 42)
+        
+        self.assertEqual(list(row), [name for name, _ in RESULT_COLUMNS])
+        self.assertEqual((row["id"], row["offset"], row["error"]), ("gfp", 42, None))
+        self.assertEqual(row["sequence_length"], len(GFP_SEQUENCE))
+        self.assertEqual(row["comp_A_pct"], result["amino_acid_composition"]["A"]["percentage"])
+        self.assertEqual(row["cat_polar_pct"], result["amino_acid_distribution"]["polar"]["percentage"])
+        self.assertEqual(row["helix_tendency"], result["secondary_structure_tendency"]["helix_tendency"])
+        self.assertEqual(row["potential_disulfide_bonds"],
+                         result["thermostability_indicators"]["potential_disulfide_bonds"])
+        self.assertEqual(sum(row[f"comp_{aa}_count"] for aa in AMINO_ACIDS), len(GFP_SEQUENCE))
+    
+    def test_category_names_match_predictor(self):
+        """测试类别列与预测器的类别定义一致"""
+        self.assertEqual(AA_CATEGORY_NAMES, tuple(self.predictor.aa_categories))
+        result = self.predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False)
+        self.assertEqual(AA_CATEGORY_NAMES, tuple(result["amino_acid_distribution"]))
+    
+    def test_python_scalar_types(self):
+        """测试展开后的值为 Python 标量 (不含 numpy 类型)"""
+        row = flatten_result(self.predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False))
+        for name, column_type in RESULT_COLUMNS:
+            if row[name] is None:
+                continue
+            expected = {"string": str, "int32": int, "int64": int, "float64": float}[column_type]
+            self.assertIs(type(row[name]), expected, name)
+    
+    def test_error_result(self):
+        """测试错误结果只有 error 列有值"""
+        row = flatten_result(self.predictor.predict_folding("", render_plot=False))
+        
+        self.assertEqual(row["error"], "序列不能为空")
+        self.assertIsNone(row["comp_A_pct"])
+        self.assertIsNone(row["helix_tendency"])
+
+
+@unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+class TestColumnarWriter(unittest.TestCase):
+    """Parquet / Arrow IPC 写出测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        predictor = ProteinFoldingPredictor(noise_mode="off")
+        self.results = predictor.predict_folding_batch([GFP_SEQUENCE, INSULIN_SEQUENCE, ""] * 3)
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_parquet_round_trip(self):
+        """测试 Parquet 按记录批写出并保持类型"""
+        path = os.path.join(self.temp_dir.name, "results.parquet")
+        self.assertEqual(write_results(self.results, path, batch_size=4), len(self.results))
+        
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, len(self.results))
+        self.assertEqual(str(table.schema.field("comp_A_count").type), "int32")
+        self.assertEqual(table.column("cat_polar_pct").to_pylist()[0],
+                         self.results[0]["amino_acid_distribution"]["polar"]["percentage"])
+        self.assertEqual(table.column("error").to_pylist()[2], "序列不能为空")
+        self.assertEqual(pyarrow.parquet.ParquetFile(path).metadata.num_row_groups, 3)
+    
+    def test_arrow_ipc_memory_map(self):
+        """测试 Arrow IPC 文件可内存映射读取，能量路径为列表列"""
+        path = os.path.join(self.temp_dir.name, "results.arrow")
+        with ColumnarWriter(path, "arrow", batch_size=5, include_profile=True) as writer:
+            for index, result in enumerate(self.results):
+                writer.write(result, f"seq{index}", index)
+        
+        with pyarrow.memory_map(path) as source:
+            reader = pyarrow.ipc.open_file(source)
+            table = reader.read_all()
+        
+        self.assertEqual(reader.num_record_batches, 2)
+        self.assertEqual(table.column("id").to_pylist()[-1], "seq8")
+        self.assertEqual(table.column("energy_profile").to_pylist()[1], self.results[1]["energy_profile"])
+    
+    def test_invalid_format(self):
+        """测试未知格式"""
+        with self.assertRaises(ValueError):
+            ColumnarWriter(os.path.join(self.temp_dir.name, "x"), "orc")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 蛋白质缓存数据库与连接池测试 (不访问网络)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from ai import database_manager, simple_database_manager
+from ai.database_manager import ProteinDatabaseManager, ProteinInfo
+from ai.simple_database_manager import SimpleProteinDatabaseManager
+from ai.sqlite_pool import SQLiteConnectionPool, shared_pool
+
+
+def make_protein(uniprot_id, name="Insulin", organism="Homo sapiens", protein_class=ProteinInfo):
+    """构造测试用蛋白质信息"""
+    return protein_class(
+        uniprot_id=uniprot_id,
+        name=name,
+        sequence="MALWMRLLPLLALLALWGPDPAAA",
+        organism=organism,
+        function=name,
+        length=24,
+        molecular_weight=2600.5,
+        pdb_ids=["1ABC", "2DEF"],
+        alphafold_id=f"AF-{uniprot_id}-F1",
+        confidence_score=None,
+        last_updated=datetime.now()
+    )
+
+
+class TestSQLiteConnectionPool(unittest.TestCase):
+    """连接池测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.pool = SQLiteConnectionPool(os.path.join(self.temp_dir.name, "pool.db"), max_idle=2)
+        with self.pool.transaction() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)")
+    
+    def tearDown(self):
+        self.pool.close()
+        self.temp_dir.cleanup()
+    
+    def test_pragmas_and_reuse(self):
+        """测试连接设置 WAL 等 PRAGMA，且顺序使用时只打开一个连接"""
+        for i in range(50):
+            with self.pool.transaction() as conn:
+                conn.execute("INSERT INTO items (value) VALUES (?)", (str(i),))
+        
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+            self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -16000)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 50)
+        self.assertEqual(self.pool.connections_created, 1)
+    
+    def test_transaction_rollback(self):
+        """测试事务中抛出异常时回滚"""
+        with self.assertRaises(RuntimeError):
+            with self.pool.transaction() as conn:
+                conn.execute("INSERT INTO items (value) VALUES ('lost')")
+                raise RuntimeError("中断")
+        
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 0)
+    
+    def test_uncommitted_work_discarded_on_release(self):
+        """测试归还连接时回滚未提交的事务"""
+        with self.pool.connection() as conn:
+            conn.execute("INSERT INTO items (value) VALUES ('pending')")
+        with self.pool.connection() as conn:
+            self.assertFalse(conn.in_transaction)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 0)
+    
+    def test_concurrent_threads(self):
+        """测试多线程并发读写，空闲连接数受 max_idle 限制"""
+        def worker(thread_index):
+            for i in range(25):
+                with self.pool.transaction() as conn:
+                    conn.execute("INSERT INTO items (value) VALUES (?)", (f"{thread_index}-{i}",))
+                with self.pool.connection() as conn:
+                    conn.execute("SELECT COUNT(*) FROM items").fetchone()
+        
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 200)
+        self.assertLessEqual(len(self.pool._idle), 2)
+    
+    def test_closed_pool(self):
+        """测试关闭后不能再借出连接"""
+        self.pool.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            with self.pool.connection():
+                pass
+    
+    def test_memory_database_shared(self):
+        """测试内存库的所有连接访问同一个数据库"""
+        pool = SQLiteConnectionPool(":memory:")
+        with pool.transaction() as conn:
+            conn.execute("CREATE TABLE t (x)")
+            conn.execute("INSERT INTO t VALUES (1)")
+        
+        def read():
+            with pool.connection() as conn:
+                self.result = conn.execute("SELECT x FROM t").fetchone()[0]
+        
+        # 第一个连接仍被借出时，另一个线程使用新连接读取
+        with pool.connection():
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        self.assertEqual(self.result, 1)
+        self.assertEqual(pool.connections_created, 3)
+        pool.close()
+
+
+class TestProteinCache(unittest.TestCase):
+    """两个数据库管理器的缓存读写测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "protein_cache.db")
+    
+    def tearDown(self):
+        shared_pool(self.db_path).close()
+        self.temp_dir.cleanup()
+    
+    def check_round_trip(self, manager_class, module):
+        manager = manager_class(self.db_path)
+        protein = make_protein("P01308", protein_class=module.ProteinInfo)
+        manager._cache_protein(protein)
+        
+        # 缓存命中时不访问网络
+        with patch.object(manager.http, 'get', side_effect=AssertionError("不应访问网络")):
+            cached = manager.get_protein_by_uniprot_id("P01308")
+            found = manager.search_protein_by_name("Insul", "Homo")
+        
+        self.assertEqual((cached.uniprot_id, cached.name, cached.pdb_ids), ("P01308", "Insulin", ["1ABC", "2DEF"]))
+        self.assertEqual(cached.last_updated.replace(microsecond=0),
+                         protein.last_updated.replace(microsecond=0))
+        self.assertEqual([p.uniprot_id for p in found], ["P01308"])
+        return manager
+    
+    def test_database_manager(self):
+        """测试 ProteinDatabaseManager 缓存读写"""
+        self.check_round_trip(ProteinDatabaseManager, database_manager)
+    
+    def test_simple_database_manager(self):
+        """测试 SimpleProteinDatabaseManager 缓存读写"""
+        self.check_round_trip(SimpleProteinDatabaseManager, simple_database_manager)
+    
+    def test_bulk_upsert_single_transaction(self):
+        """测试批量写入 (生成器输入) 只提交一次，重复ID覆盖旧行"""
+        manager = SimpleProteinDatabaseManager(self.db_path)
+        statements = []
+        with manager._pool.connection() as conn:
+            conn.set_trace_callback(statements.append)
+        
+        proteins = (make_protein(f"Q{i:05d}", protein_class=simple_database_manager.ProteinInfo)
+                    for i in range(1000))
+        self.assertEqual(manager.cache_proteins(proteins), 1000)
+        self.assertEqual(sum(statement.startswith("COMMIT") for statement in statements), 1)
+        self.assertEqual(manager.cache_proteins([make_protein("Q00001", name="Renamed")]), 1)
+        self.assertEqual(manager.cache_proteins([]), 0)
+        
+        with manager._pool.connection() as conn:
+            conn.set_trace_callback(None)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM proteins").fetchone()[0], 1000)
+        self.assertEqual(manager._get_cached_protein_by_id("Q00001").name, "Renamed")
+    
+    def test_search_results_cached_in_bulk(self):
+        """测试搜索结果通过一次批量写入缓存"""
+        results = [{
+            "primaryAccession": f"P{i:05d}",
+            "proteinDescription": {"recommendedName": {"fullName": {"value": f"Kinase {i}"}}},
+            "sequence": {"value": "MKV", "length": 3},
+            "organism": {"scientificName": "Homo sapiens"},
+        } for i in range(50)]
+        response = type("Response", (), {"raise_for_status": lambda self: None,
+                                          "json": lambda self: {"results": results}})()
+        
+        manager = ProteinDatabaseManager(self.db_path)
+        with patch.object(manager.http, 'get', return_value=response), \
+                patch.object(manager, 'cache_proteins', wraps=manager.cache_proteins) as bulk:
+            found = manager.search_protein_by_name("Kinase")
+        
+        self.assertEqual(len(found), 50)
+        self.assertEqual(bulk.call_count, 1)
+        self.assertEqual(len(manager._get_cached_proteins("Kinase")), 50)
+    
+    def test_managers_share_pool(self):
+        """测试同一缓存文件的管理器共用连接池，重复查询不再打开新连接"""
+        first = self.check_round_trip(ProteinDatabaseManager, database_manager)
+        second = SimpleProteinDatabaseManager(self.db_path)
+        self.assertIs(first._pool, second._pool)
+        
+        created = first._pool.connections_created
+        for _ in range(100):
+            second._get_cached_protein_by_id("P01308")
+        self.assertEqual(first._pool.connections_created, created)
+
+
+class TestFullTextSearch(unittest.TestCase):
+    """FTS5 缓存检索测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "protein_cache.db")
+        self.manager = ProteinDatabaseManager(self.db_path)
+        proteins = [
+            make_protein("P01308", "Insulin"),
+            make_protein("P01325", "Insulin-1", organism="Mus musculus"),
+            make_protein("P06213", "Insulin receptor"),
+            make_protein("P04637", "Cellular tumor antigen p53"),
+        ]
+        # 只在功能描述中提到 insulin 的蛋白
+        binder = make_protein("Q99999", "Growth factor binding protein")
+        binder.function = "Binds insulin-like growth factors"
+        self.manager.cache_proteins(proteins + [binder])
+    
+    def tearDown(self):
+        shared_pool(self.db_path).close()
+        self.temp_dir.cleanup()
+    
+    def ids(self, name, organism=None):
+        return [protein.uniprot_id for protein in self.manager._get_cached_proteins(name, organism)]
+    
+    def test_prefix_and_ranking(self):
+        """测试前缀匹配，名称命中排在只有功能描述命中之前"""
+        ids = self.ids("insul")
+        self.assertEqual(set(ids), {"P01308", "P01325", "P06213", "Q99999"})
+        self.assertEqual(ids[-1], "Q99999")
+        self.assertEqual(self.ids("insulin rec"), ["P06213"])
+        self.assertEqual(self.ids("p53"), ["P04637"])
+    
+    def test_organism_filter(self):
+        """测试生物体过滤 (前缀、不区分大小写)"""
+        self.assertEqual(set(self.ids("insulin", "homo")), {"P01308", "P06213", "Q99999"})
+        self.assertEqual(self.ids("insulin", "Mus musculus"), ["P01325"])
+    
+    def test_index_follows_updates(self):
+        """测试更新缓存行后索引同步"""
+        self.manager._cache_protein(make_protein("P04637", "Tumor suppressor"))
+        
+        self.assertEqual(self.ids("antigen"), [])
+        self.assertEqual(self.ids("suppressor"), ["P04637"])
+        # 索引内容与 proteins 表不一致时 integrity-check 抛出异常
+        with self.manager._pool.connection() as conn:
+            conn.execute("INSERT INTO proteins_fts(proteins_fts, rank) VALUES ('integrity-check', 1)")
+    
+    def test_index_built_for_existing_cache(self):
+        """测试旧缓存文件 (没有索引) 首次打开时从已有行建立索引"""
+        legacy_path = os.path.join(self.temp_dir.name, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("CREATE TABLE proteins (uniprot_id TEXT PRIMARY KEY, name TEXT, sequence TEXT, "
+                     "organism TEXT, function TEXT, length INTEGER, molecular_weight REAL, pdb_ids TEXT, "
+                     "alphafold_id TEXT, confidence_score REAL, last_updated TIMESTAMP, cache_expiry TIMESTAMP)")
+        now = datetime.now().timestamp()
+        conn.execute("INSERT INTO proteins VALUES ('P01308', 'Insulin', 'MALW', 'Homo sapiens', 'Insulin', "
+                     "4, 500.0, '[]', NULL, NULL, ?, ?)", (now, now + 86400))
+        conn.commit()
+        conn.close()
+        
+        manager = SimpleProteinDatabaseManager(legacy_path)
+        self.assertEqual([p.uniprot_id for p in manager._get_cached_proteins("insulin", "全部")], ["P01308"])
+        shared_pool(legacy_path).close()
+    
+    def test_like_fallback(self):
+        """测试名称中没有可检索的词时退回子串匹配"""
+        self.assertEqual(len(self.ids("-")), 1)
+        self.assertEqual(len(self.ids("")), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
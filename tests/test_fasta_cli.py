@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 批量预测命令行工具测试
+"""
+
+import sys
+import os
+import csv
+import io
+import json
+import tempfile
+import unittest
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from ai.fasta_cli import (CSV_COLUMNS, build_parser, detect_format, main, read_fasta, read_fastq, read_records,
+                          resume_offset, run)
+from ai.predictor import ProteinFoldingPredictor
+
+try:
+    import pyarrow.parquet
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+GFP_SEQUENCE = "MSKGEELFTGVVPILVELDGDVNGHKFSVSGEGEGDATYGKLTLKFICTTGKLPVPWPTLVTTFSYGVQCFSRYPDHMKQHDFFKSAMPEGYVQERTIFFKDDGNYKTRAEVKFEGDTLVNRIELKGIDFKEDGNILGHKLEYNYNSHNVYIMADKQKNGIKVNFKIRHNIEDGSVQLADHYQQNTPIGDGPVLLPDNHYLSTQSALSKDPNEKRDHMVLLEFVTAAGITHGMDELYK"
+INSULIN_SEQUENCE = "MALWMRLLPLLALLALWGPDPAAAFVNQHLCGSHLVEALYLVCGERGFFYTPKTRREAEDLQVGQVELGGGPGAGSLQPLALEGSLQKRGIVEQCCTSICSLYQLENYCN"
+
+
+def fasta_text(records):
+    """生成每行60个字符的 FASTA 文本"""
+    lines = []
+    for record_id, sequence in records:
+        lines.append(f">{record_id} test protein")
+        lines.extend(sequence[i:i + 60] for i in range(0, len(sequence), 60))
+    return "\n".join(lines) + "\n"
+
+
+RECORDS = [(f"seq{i}", [GFP_SEQUENCE, INSULIN_SEQUENCE, "", GFP_SEQUENCE[:80]][i % 4]) for i in range(12)]
+
+
+class TestFastaParsing(unittest.TestCase):
+    """FASTA/FASTQ 流式解析测试"""
+    
+    def test_fasta_records_and_offsets(self):
+        """测试多行序列拼接，偏移指向记录首行"""
+        data = fasta_text(RECORDS).encode()
+        records = list(read_fasta(io.BytesIO(data)))
+        
+        self.assertEqual([(r.id, r.sequence) for r in records], RECORDS)
+        for record in records:
+            self.assertTrue(data[record.offset:].startswith(f">{record.id} ".encode()))
+        
+        # 从任一记录偏移开始读取得到其后的全部记录
+        stream = io.BytesIO(data)
+        stream.seek(records[5].offset)
+        resumed = list(read_fasta(stream, records[5].offset))
+        self.assertEqual([r.offset for r in resumed], [r.offset for r in records[5:]])
+    
+    def test_fastq(self):
+        """测试 FASTQ 解析，质量行以 '@' 开头也不会误判"""
+        data = (b"@read1 first\nMKVL\n+\n@@@@\n"
+                b"@read2\nACDE\nFGHI\n+read2\nIIII\n@III\n")
+        records = list(read_records(io.BufferedReader(io.BytesIO(data))))
+        
+        self.assertEqual([(r.id, r.sequence) for r in records], [("read1", "MKVL"), ("read2", "ACDEFGHI")])
+        self.assertEqual(records[1].offset, data.index(b"@read2"))
+        self.assertEqual(records[0].description, "read1 first")
+    
+    def test_detect_format_skips_leading_whitespace(self):
+        """测试自动识别格式时跳过开头的空行，且不消耗流"""
+        stream = io.BufferedReader(io.BytesIO(b"\n \r\n@read1\nMKVL\n+\nIIII\n"))
+        self.assertEqual(detect_format(stream), "fastq")
+        self.assertEqual([r.sequence for r in read_records(stream)], ["MKVL"])
+        self.assertEqual(detect_format(io.BufferedReader(io.BytesIO(b"\n>seq1\nMKVL\n"))), "fasta")
+    
+    def test_fastq_explicit_format(self):
+        """测试显式指定 FASTQ 格式"""
+        records = list(read_fastq(io.BytesIO(b"@r\nMK\n+\nII\n")))
+        self.assertEqual(records[0].sequence, "MK")
+
+
+class TestFastaCli(unittest.TestCase):
+    """命令行端到端测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.temp_dir.name, "proteins.fasta")
+        with open(self.input_path, "w") as f:
+            f.write(fasta_text(RECORDS))
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def run_cli(self, *argv):
+        return run(build_parser().parse_args([self.input_path, "--progress-interval", "0", *argv]))
+    
+    def read_jsonl(self, path):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    
+    def test_main_exit_status(self):
+        """测试命令行入口成功时返回退出码 0"""
+        output = os.path.join(self.temp_dir.name, "results.jsonl")
+        self.assertEqual(main([self.input_path, "-o", output, "--progress-interval", "0"]), 0)
+        self.assertEqual(len(self.read_jsonl(output)), len(RECORDS))
+    
+    def test_jsonl_output(self):
+        """测试 JSON Lines 输出与预测器结果一致"""
+        output = os.path.join(self.temp_dir.name, "results.jsonl")
+        self.assertEqual(self.run_cli("-o", output), len(RECORDS))
+        
+        rows = self.read_jsonl(output)
+        predictor = ProteinFoldingPredictor(noise_mode="deterministic")
+        expected = predictor.predict_folding(GFP_SEQUENCE, render_plot=False)
+        
+        self.assertEqual([row["id"] for row in rows], [record_id for record_id, _ in RECORDS])
+        self.assertEqual(rows[0]["stability_score"], expected["stability_score"])
+        self.assertEqual(rows[0]["amino_acid_composition"], expected["amino_acid_composition"])
+        self.assertNotIn("energy_plot", rows[0])
+        self.assertNotIn("energy_profile", rows[0])
+        self.assertIn("error", rows[2])
+    
+    def test_csv_output(self):
+        """测试 CSV 输出"""
+        output = os.path.join(self.temp_dir.name, "results.csv")
+        self.run_cli("-o", output)
+        
+        with open(output, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        
+        self.assertEqual(len(rows), len(RECORDS))
+        self.assertEqual(int(rows[1]["sequence_length"]), len(INSULIN_SEQUENCE))
+        self.assertEqual(rows[2]["error"], "序列不能为空")
+    
+    def test_workers(self):
+        """测试多进程输出与单进程一致"""
+        single = os.path.join(self.temp_dir.name, "single.jsonl")
+        parallel = os.path.join(self.temp_dir.name, "parallel.jsonl")
+        self.run_cli("-o", single)
+        self.run_cli("-o", parallel, "--workers", "2", "--chunk-size", "5")
+        
+        self.assertEqual(self.read_jsonl(single), self.read_jsonl(parallel))
+    
+    def test_resume_after_interruption(self):
+        """测试截断的输出续跑后与完整运行一致"""
+        for output_format in ("jsonl", "csv"):
+            complete = os.path.join(self.temp_dir.name, f"complete.{output_format}")
+            partial = os.path.join(self.temp_dir.name, f"partial.{output_format}")
+            self.run_cli("-o", complete)
+            
+            with open(complete, "rb") as f:
+                data = f.read()
+            # 保留前5行并留下半行，模拟写出过程中被中断
+            lines = data.split(b"\n")
+            with open(partial, "wb") as f:
+                f.write(b"\n".join(lines[:5]) + b"\n" + lines[5][:10])
+            
+            written = self.run_cli("-o", partial, "--resume")
+            with open(partial, "rb") as f:
+                self.assertEqual(f.read(), data)
+            skipped = 5 if output_format == "jsonl" else 4
+            self.assertEqual(written, len(RECORDS) - skipped)
+    
+    def test_resume_offset_without_records(self):
+        """测试没有完整记录时从头开始"""
+        output = os.path.join(self.temp_dir.name, "empty.jsonl")
+        with open(output, "w") as f:
+            f.write('{"id": "seq0", "off')
+        
+        self.assertIsNone(resume_offset(output, "jsonl"))
+        self.assertEqual(os.path.getsize(output), 0)
+    
+    @unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+    def test_parquet_output(self):
+        """测试按扩展名输出 Parquet，列与 CSV 相同"""
+        output = os.path.join(self.temp_dir.name, "results.parquet")
+        self.run_cli("-o", output, "--workers", "2")
+        
+        table = pyarrow.parquet.read_table(output)
+        self.assertEqual(table.column_names, CSV_COLUMNS)
+        self.assertEqual(table.column("id").to_pylist(), [record_id for record_id, _ in RECORDS])
+        self.assertEqual(table.column("offset").to_pylist()[0], 0)
+    
+    def test_offset(self):
+        """测试从指定字节偏移开始处理"""
+        output = os.path.join(self.temp_dir.name, "tail.jsonl")
+        with open(self.input_path, "rb") as f:
+            offset = f.read().index(b">seq10 ")
+        
+        self.run_cli("-o", output, "--offset", str(offset))
+        self.assertEqual([row["id"] for row in self.read_jsonl(output)], ["seq10", "seq11"])
+
+
+if __name__ == "__main__":
+    unittest.main()
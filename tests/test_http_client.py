@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 共享 HTTP 客户端测试 (使用本地桩服务器，不访问外网)
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from ai.database_manager import ProteinDatabaseManager
+from ai.http_client import HTTPClient
+from ai.simple_database_manager import SimpleProteinDatabaseManager
+from ai.sqlite_pool import shared_pool
+
+
+# 分块正文相邻两块之间的间隔 (秒)
+STREAM_CHUNK_DELAY = 0.02
+
+
+class StubServer:
+    """
+    本地桩 HTTP 服务器
+    
+    routes 把路径映射到响应列表 (状态码, 响应头, 正文, 延迟秒数)，按请求次序依次返回，
+    用完后重复最后一个；记录每个请求的客户端端口与最大并发数。
+    正文为列表时逐块写出，块之间间隔 STREAM_CHUNK_DELAY 秒 (模拟慢速流式响应体)。
+    """
+    
+    def __init__(self, routes):
+        self.routes = {path: list(responses) for path, responses in routes.items()}
+        self.hits = {path: 0 for path in routes}
+        self.client_ports = set()
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            
+            def do_GET(self):
+                stub.handle(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def handle(self, handler):
+        path = handler.path.split("?")[0]
+        with self._lock:
+            self.client_ports.add(handler.client_address[1])
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            responses = self.routes.get(path, [(404, {}, b"", 0)])
+            index = min(self.hits.get(path, 0), len(responses) - 1)
+            self.hits[path] = self.hits.get(path, 0) + 1
+        status, headers, body, delay = responses[index]
+        try:
+            if delay:
+                time.sleep(delay)
+            handler.send_response(status)
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            chunks = body if isinstance(body, list) else [body]
+            handler.send_header("Content-Length", str(sum(len(chunk) for chunk in chunks)))
+            handler.end_headers()
+            for index, chunk in enumerate(chunks):
+                if index:
+                    time.sleep(STREAM_CHUNK_DELAY)
+                handler.wfile.write(chunk)
+                handler.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self.active -= 1
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def json_body(data) -> bytes:
+    return json.dumps(data).encode()
+
+
+def uniprot_entry(accession, name, pdb_id=None):
+    """UniProt 条目 JSON"""
+    entry = {
+        "primaryAccession": accession,
+        "proteinDescription": {"recommendedName": {"fullName": {"value": name}}},
+        "sequence": {"value": "MALWMRLLPLLALLALWGPDPAAA", "length": 24},
+        "organism": {"scientificName": "Homo sapiens"},
+    }
+    if pdb_id:
+        entry["uniProtKBCrossReferences"] = [{"database": "PDB", "id": pdb_id}]
+    return entry
+
+
+OK = (200, {"Content-Type": "application/json"}, json_body({"ok": True}), 0)
+UNAVAILABLE = (503, {}, b"", 0)
+
+
+class TestHTTPClient(unittest.TestCase):
+    """HTTPClient 测试"""
+    
+    def make_server(self, routes):
+        server = StubServer(routes)
+        self.addCleanup(server.close)
+        return server
+    
+    def make_client(self, **kwargs):
+        kwargs.setdefault("backoff_base", 0.01)
+        client = HTTPClient(**kwargs)
+        self.addCleanup(client.close)
+        return client
+    
+    def test_keep_alive_reuses_connection(self):
+        """测试顺序请求复用同一个 TCP 连接"""
+        server = self.make_server({"/ok": [OK]})
+        client = self.make_client()
+        for _ in range(20):
+            response = client.get(f"{server.url}/ok")
+            self.assertEqual(response.json(), {"ok": True})
+        self.assertEqual(server.hits["/ok"], 20)
+        self.assertEqual(len(server.client_ports), 1)
+    
+    def test_retry_on_unavailable(self):
+        """测试 503/429 后退避重试直到成功"""
+        server = self.make_server({"/flaky": [UNAVAILABLE, (429, {}, b"", 0), OK]})
+        client = self.make_client(max_retries=3)
+        response = client.get(f"{server.url}/flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(server.hits["/flaky"], 3)
+        self.assertEqual(client.retries, 2)
+    
+    def test_retries_exhausted_returns_last_response(self):
+        """测试重试用尽后返回最后一次响应，由 raise_for_status 报错"""
+        server = self.make_server({"/down": [UNAVAILABLE]})
+        client = self.make_client(max_retries=2)
+        response = client.get(f"{server.url}/down")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(server.hits["/down"], 3)
+        with self.assertRaises(requests.HTTPError):
+            response.raise_for_status()
+    
+    def test_client_errors_not_retried(self):
+        """测试 404 不重试"""
+        server = self.make_server({})
+        client = self.make_client()
+        self.assertEqual(client.get(f"{server.url}/missing").status_code, 404)
+        self.assertEqual(client.requests_sent, 1)
+        self.assertEqual(client.retries, 0)
+    
+    def test_retry_after_header(self):
+        """测试 Retry-After 决定等待时间，且不超过 backoff_max"""
+        client = self.make_client(backoff_max=0.05)
+        response = requests.Response()
+        response.headers["Retry-After"] = "2"
+        self.assertEqual(client._backoff(0, response), 0.05)
+        response.headers["Retry-After"] = "0"
+        self.assertEqual(client._backoff(5, response), 0.0)
+    
+    def test_jittered_backoff_bounds(self):
+        """测试退避时间在 [0, min(backoff_max, base*2**n)] 内"""
+        client = self.make_client(backoff_base=0.5, backoff_max=3.0)
+        for attempt, bound in [(0, 0.5), (1, 1.0), (2, 2.0), (6, 3.0)]:
+            delays = [client._backoff(attempt) for _ in range(200)]
+            self.assertTrue(all(0 <= delay <= bound for delay in delays))
+            self.assertGreater(max(delays) - min(delays), 0)
+    
+    def test_read_timeout(self):
+        """测试读取超时：慢响应在超时后失败，不会无限等待"""
+        server = self.make_server({"/slow": [(200, {}, b"late", 1.0)]})
+        client = self.make_client(timeout=(1.0, 0.2), max_retries=1)
+        start = time.perf_counter()
+        with self.assertRaises(requests.Timeout):
+            client.get(f"{server.url}/slow")
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(client.requests_sent, 2)
+    
+    def test_per_host_limit(self):
+        """测试同一主机的在途请求数不超过 per_host_limit"""
+        server = self.make_server({"/busy": [(200, {}, b"ok", 0.05)]})
+        client = self.make_client(per_host_limit=2)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(lambda _: client.get(f"{server.url}/busy").status_code, range(16)))
+        self.assertEqual(statuses, [200] * 16)
+        self.assertEqual(server.max_active, 2)
+        self.assertLessEqual(len(server.client_ports), 2)
+    
+    def test_per_host_limit_covers_streamed_body(self):
+        """测试 stream=True 时名额持有到响应关闭，读取响应体期间同样受并发限制"""
+        server = self.make_server({"/stream": [(200, {}, [b"a" * 64] * 4, 0)]})
+        client = self.make_client(per_host_limit=1)
+        
+        def fetch(_):
+            with client.get(f"{server.url}/stream", stream=True) as response:
+                return b"".join(response.iter_content(16))
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            bodies = list(executor.map(fetch, range(4)))
+        self.assertEqual(bodies, [b"a" * 256] * 4)
+        self.assertEqual(server.max_active, 1)
+        
+        # 未关闭的流式响应在被回收时归还名额
+        response = client.get(f"{server.url}/stream", stream=True)
+        slot = client._slot(server.url)
+        self.assertFalse(slot.acquire(blocking=False))
+        del response
+        self.assertTrue(slot.acquire(blocking=False))
+        slot.release()
+
+
+class TestManagersUseHTTPClient(unittest.TestCase):
+    """数据库管理器经共享客户端访问外部 API"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "cache.db")
+        entry = uniprot_entry("P01308", "Insulin", pdb_id="1ZNI")
+        self.server = StubServer({
+            "/uniprotkb/P01308": [UNAVAILABLE, (200, {}, json_body(entry), 0)],
+            "/core/entry/1ZNI": [(200, {}, json_body({"entry": {"id": "1ZNI"}}), 0)],
+        })
+        self.client = HTTPClient(backoff_base=0.01)
+    
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+        shared_pool(self.db_path).close()
+        self.temp_dir.cleanup()
+    
+    def make_manager(self, manager_class):
+        manager = manager_class(self.db_path)
+        manager.http = self.client
+        manager.uniprot_base_url = self.server.url
+        manager.pdb_base_url = self.server.url
+        return manager
+    
+    def test_database_manager(self):
+        """测试 ProteinDatabaseManager 获取详情 (503 后重试) 与结构"""
+        manager = self.make_manager(ProteinDatabaseManager)
+        structure = manager.get_protein_structure("P01308")
+        self.assertEqual(structure, {"entry": {"id": "1ZNI"}})
+        self.assertEqual(self.server.hits["/uniprotkb/P01308"], 2)
+        self.assertEqual(len(self.server.client_ports), 1)
+    
+    def test_simple_database_manager(self):
+        """测试 SimpleProteinDatabaseManager 获取详情"""
+        manager = self.make_manager(SimpleProteinDatabaseManager)
+        protein = manager.get_protein_by_uniprot_id("P01308")
+        self.assertEqual((protein.name, protein.pdb_ids), ("Insulin", ["1ZNI"]))
+        self.assertEqual(self.client.retries, 1)
+
+
+
+class TestBulkLookup(unittest.TestCase):
+    """按多个 UniProt ID 批量获取"""
+    
+    DELAY = 0.2
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "cache.db")
+        self.ids = [f"P{i:05d}" for i in range(8)]
+        self.server = StubServer({
+            f"/uniprotkb/{uniprot_id}": [(200, {}, json_body(uniprot_entry(uniprot_id, f"Kinase {i}")), self.DELAY)]
+            for i, uniprot_id in enumerate(self.ids)
+        })
+        self.addCleanup(self.server.close)
+        self.client = HTTPClient(per_host_limit=8)
+        self.addCleanup(self.client.close)
+    
+    def tearDown(self):
+        shared_pool(self.db_path).close()
+        self.temp_dir.cleanup()
+    
+    def check_bulk_lookup(self, manager_class):
+        manager = manager_class(self.db_path)
+        manager.http = self.client
+        manager.uniprot_base_url = self.server.url
+        manager._cache_protein(manager._row_to_protein(
+            ("P00003", "Cached", "MKV", "Homo sapiens", "Cached", 3, 0.0, "[]", None, None,
+             time.time(), time.time() + 86400)))
+        statements = []
+        with manager._pool.connection() as conn:
+            conn.set_trace_callback(statements.append)
+        
+        # 重复 ID 去重；P99999 不存在 (404) 被省略；P00003 命中缓存，不发请求
+        requested = self.ids + ["P00001", "P99999"]
+        start = time.perf_counter()
+        proteins = manager.get_proteins_by_uniprot_ids(requested, max_workers=4)
+        elapsed = time.perf_counter() - start
+        
+        self.assertEqual([p.uniprot_id for p in proteins], self.ids)
+        self.assertEqual(proteins[3].name, "Cached")
+        self.assertEqual(self.server.hits["/uniprotkb/P00003"], 0)
+        self.assertEqual(self.server.max_active, 4)
+        # 7 个未命中各需 DELAY 秒，4 个并发约 2 轮
+        self.assertLess(elapsed, 4 * self.DELAY)
+        self.assertEqual(sum(statement.startswith("COMMIT") for statement in statements), 1)
+        
+        # 再次获取全部命中缓存
+        with manager._pool.connection() as conn:
+            conn.set_trace_callback(None)
+        sent = self.client.requests_sent
+        self.assertEqual([p.name for p in manager.get_proteins_by_uniprot_ids(self.ids)][:2],
+                         ["Kinase 0", "Kinase 1"])
+        self.assertEqual(self.client.requests_sent, sent)
+    
+    def test_database_manager(self):
+        """测试 ProteinDatabaseManager 并发获取未命中并单事务写回"""
+        self.check_bulk_lookup(ProteinDatabaseManager)
+    
+    def test_simple_database_manager(self):
+        """测试 SimpleProteinDatabaseManager 并发获取未命中并单事务写回"""
+        self.check_bulk_lookup(SimpleProteinDatabaseManager)
+    
+    def test_popular_proteins(self):
+        """测试热门蛋白质列表经批量接口获取"""
+        manager = SimpleProteinDatabaseManager(self.db_path)
+        manager.http = self.client
+        manager.uniprot_base_url = self.server.url
+        with patch.object(manager, "get_proteins_by_uniprot_ids", return_value=[]) as bulk:
+            self.assertEqual(manager.get_popular_proteins(), [])
+        self.assertEqual(bulk.call_count, 1)
+        self.assertIn("P04637", bulk.call_args[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
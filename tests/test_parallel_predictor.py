@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 多进程批量预测测试
+"""
+
+import sys
+import os
+import unittest
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from ai.predictor import ProteinFoldingPredictor
+from ai.parallel_predictor import ParallelPredictor
+
+GFP_SEQUENCE = "MSKGEELFTGVVPILVELDGDVNGHKFSVSGEGEGDATYGKLTLKFICTTGKLPVPWPTLVTTFSYGVQCFSRYPDHMKQHDFFKSAMPEGYVQERTIFFKDDGNYKTRAEVKFEGDTLVNRIELKGIDFKEDGNILGHKLEYNYNSHNVYIMADKQKNGIKVNFKIRHNIEDGSVQLADHYQQNTPIGDGPVLLPDNHYLSTQSALSKDPNEKRDHMVLLEFVTAAGITHGMDELYK"
+INSULIN_SEQUENCE = "MALWMRLLPLLALLALWGPDPAAAFVNQHLCGSHLVEALYLVCGERGFFYTPKTRREAEDLQVGQVELGGGPGAGSLQPLALEGSLQKRGIVEQCCTSICSLYQLENYCN"
+
+# 触发测试用预测器异常/崩溃的序列
+RAISING_SEQUENCE = "RAISE"
+CRASHING_SEQUENCE = "CRASH"
+
+
+class FaultyPredictor(ProteinFoldingPredictor):
+    """遇到特定序列时抛出异常或直接终止进程的预测器"""
+    
+    def predict_folding_batch(self, sequences, render_plot=False):
+        if CRASHING_SEQUENCE in sequences:
+            os._exit(1)
+        if RAISING_SEQUENCE in sequences:
+            raise RuntimeError("batch failed")
+        return super().predict_folding_batch(sequences, render_plot=render_plot)
+    
+    def predict_folding(self, sequence, render_plot=True):
+        if sequence == RAISING_SEQUENCE:
+            raise RuntimeError("boom")
+        return super().predict_folding(sequence, render_plot=render_plot)
+
+
+class TestParallelPredictor(unittest.TestCase):
+    """多进程批量预测测试"""
+    
+    def test_matches_sequential(self):
+        """测试结果与单进程批量预测一致且保持输入顺序"""
+        sequences = [GFP_SEQUENCE, INSULIN_SEQUENCE, "", GFP_SEQUENCE[:50]] * 5
+        kwargs = {"noise_mode": "deterministic", "noise_seed": 3}
+        executor = ParallelPredictor(workers=2, chunk_size=3, predictor_kwargs=kwargs)
+        
+        results = executor.predict(iter(sequences))
+        expected = ProteinFoldingPredictor(**kwargs).predict_folding_batch(sequences)
+        
+        self.assertEqual(results, expected)
+        self.assertEqual(executor.stats.sequences, 20)
+        self.assertEqual(executor.stats.chunks, 7)
+        self.assertEqual(executor.stats.failed_sequences, 5)
+    
+    def test_unordered_covers_all_indices(self):
+        """测试按完成顺序产出时每个下标恰好出现一次"""
+        executor = ParallelPredictor(workers=2, chunk_size=2, predictor_kwargs={"noise_mode": "off"})
+        sequences = [GFP_SEQUENCE[:length] for length in range(20, 40)]
+        
+        indices = []
+        for index, result in executor.imap(sequences, ordered=False):
+            indices.append(index)
+            self.assertEqual(result['sequence_length'], len(sequences[index]))
+        
+        self.assertEqual(sorted(indices), list(range(len(sequences))))
+    
+    def test_bounded_in_flight(self):
+        """测试输入按需读取，在途块数有界"""
+        consumed = []
+        
+        def sequences():
+            for index in range(1000):
+                consumed.append(index)
+                yield INSULIN_SEQUENCE
+        
+        executor = ParallelPredictor(workers=1, chunk_size=10, max_in_flight=2,
+                                     predictor_kwargs={"noise_mode": "off"})
+        results = executor.imap(sequences())
+        for _ in range(5):
+            next(results)
+        
+        self.assertLessEqual(len(consumed), 10 * 3)
+        results.close()
+    
+    def test_sequence_failure_isolated(self):
+        """测试单条预测异常只影响该序列"""
+        executor = ParallelPredictor(workers=1, chunk_size=3, predictor_factory=FaultyPredictor)
+        
+        results = executor.predict([INSULIN_SEQUENCE, RAISING_SEQUENCE, GFP_SEQUENCE])
+        
+        self.assertNotIn("error", results[0])
+        self.assertIn("boom", results[1]["error"])
+        self.assertNotIn("error", results[2])
+    
+    def test_worker_crash_reported(self):
+        """测试工作进程崩溃时报告错误并继续处理后续块"""
+        executor = ParallelPredictor(workers=1, chunk_size=1, max_in_flight=1,
+                                     predictor_factory=FaultyPredictor)
+        
+        results = executor.predict([INSULIN_SEQUENCE, CRASHING_SEQUENCE, GFP_SEQUENCE])
+        
+        self.assertNotIn("error", results[0])
+        self.assertIn("error", results[1])
+        self.assertEqual(results[2]["sequence_length"], len(GFP_SEQUENCE))
+        self.assertEqual(executor.stats.crashed_chunks, 1)
+        self.assertEqual(executor.stats.pool_restarts, 1)
+    
+    def test_worker_crash_spares_other_chunks(self):
+        """测试崩溃时在途的其他块重试后正常交付，只有崩溃块返回错误"""
+        sequences = [INSULIN_SEQUENCE, CRASHING_SEQUENCE, GFP_SEQUENCE, GFP_SEQUENCE[:50]]
+        executor = ParallelPredictor(workers=2, chunk_size=1, max_in_flight=4,
+                                     predictor_factory=FaultyPredictor,
+                                     predictor_kwargs={"noise_mode": "off"})
+        
+        results = executor.predict(sequences)
+        
+        self.assertEqual(results[1]["error"], "工作进程异常退出")
+        for index in (0, 2, 3):
+            self.assertNotIn("error", results[index])
+            self.assertEqual(results[index]["sequence_length"], len(sequences[index]))
+        self.assertEqual(executor.stats.crashed_chunks, 1)
+        self.assertEqual(executor.stats.failed_sequences, 1)
+    
+    def test_invalid_chunk_size(self):
+        """测试无效的块大小"""
+        with self.assertRaises(ValueError):
+            ParallelPredictor(chunk_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,738 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 预测器单元测试
+覆盖批量预测及特征计算路径
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+import ai.predictor
+from ai.predictor import ProteinFoldingPredictor, encode_sequence, ensure_energy_plot, UNKNOWN_RESIDUE, AMINO_ACIDS
+from ai.result_cache import PredictionCache, cache_key
+
+GFP_SEQUENCE = "MSKGEELFTGVVPILVELDGDVNGHKFSVSGEGEGDATYGKLTLKFICTTGKLPVPWPTLVTTFSYGVQCFSRYPDHMKQHDFFKSAMPEGYVQERTIFFKDDGNYKTRAEVKFEGDTLVNRIELKGIDFKEDGNILGHKLEYNYNSHNVYIMADKQKNGIKVNFKIRHNIEDGSVQLADHYQQNTPIGDGPVLLPDNHYLSTQSALSKDPNEKRDHMVLLEFVTAAGITHGMDELYK"
+INSULIN_SEQUENCE = "MALWMRLLPLLALLALWGPDPAAAFVNQHLCGSHLVEALYLVCGERGFFYTPKTRREAEDLQVGQVELGGGPGAGSLQPLALEGSLQKRGIVEQCCTSICSLYQLENYCN"
+
+
+class TestBatchPrediction(unittest.TestCase):
+    """批量预测测试"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor()
+    
+    def test_list_input_keeps_order(self):
+        """测试列表输入按顺序返回"""
+        sequences = [GFP_SEQUENCE, "", INSULIN_SEQUENCE]
+        results = self.predictor.predict_folding_batch(sequences)
+        
+        self.assertIsInstance(results, list)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['sequence_length'], len(GFP_SEQUENCE))
+        self.assertIn('error', results[1])
+        self.assertEqual(results[2]['sequence_length'], len(INSULIN_SEQUENCE))
+    
+    def test_mapping_input_keeps_ids(self):
+        """测试 id→序列 映射输入"""
+        sequences = {"insulin": INSULIN_SEQUENCE, "gfp": GFP_SEQUENCE}
+        results = self.predictor.predict_folding_batch(sequences)
+        
+        self.assertEqual(list(results.keys()), ["insulin", "gfp"])  # type: ignore[union-attr]
+        self.assertEqual(results["gfp"]['sequence_length'], len(GFP_SEQUENCE))  # type: ignore[index]
+    
+    def test_generator_input(self):
+        """测试生成器输入"""
+        results = self.predictor.predict_folding_batch(seq for seq in [GFP_SEQUENCE] * 3)
+        self.assertEqual(len(results), 3)
+    
+    def test_duplicate_results_independent(self):
+        """测试重复序列的结果互不共享嵌套容器"""
+        results = self.predictor.predict_folding_batch([INSULIN_SEQUENCE, INSULIN_SEQUENCE])
+        self.assertEqual(results[0], results[1])
+        profile_length = len(results[1]['energy_profile'])
+        
+        results[0]['energy_profile'].append(0.0)
+        results[0]['amino_acid_composition']['A'] = -1
+        results[0]['thermostability_indicators'].clear()
+        
+        self.assertEqual(len(results[1]['energy_profile']), profile_length)
+        self.assertNotEqual(results[1]['amino_acid_composition']['A'], -1)
+        self.assertTrue(results[1]['thermostability_indicators'])
+    
+    def test_matches_single_prediction(self):
+        """测试批量结果与单条预测的确定性字段一致"""
+        single = self.predictor.predict_folding(GFP_SEQUENCE)
+        batch = self.predictor.predict_folding_batch([GFP_SEQUENCE])[0]
+        
+        for field in ['sequence_length', 'molecular_weight', 'instability_index',
+                      'hydrophobicity', 'amino_acid_composition', 'thermostability_indicators']:
+            self.assertEqual(single[field], batch[field])
+        self.assertEqual(batch['energy_plot'], "")
+    
+    def test_render_plot_option(self):
+        """测试批量接口可选渲染能量图"""
+        result = self.predictor.predict_folding_batch([INSULIN_SEQUENCE], render_plot=True)[0]
+        self.assertGreater(len(result['energy_plot']), 0)
+
+
+
+class TestFeatureEngine(unittest.TestCase):
+    """向量化特征引擎测试"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor()
+    
+    def test_encode_sequence(self):
+        """测试序列编码"""
+        codes = encode_sequence("ACY中X")
+        self.assertEqual(codes.dtype.name, 'uint8')
+        self.assertEqual(list(codes), [0, 1, 19, UNKNOWN_RESIDUE, UNKNOWN_RESIDUE])
+    
+    def test_matches_dict_lookup(self):
+        """测试与逐残基字典查找结果逐位一致"""
+        import numpy as np
+        p = self.predictor
+        for sequence in [GFP_SEQUENCE, INSULIN_SEQUENCE, "ACDXZBEF", "PPGGSNQ" * 50]:
+            with self.subTest(sequence=sequence[:20]):
+                self.assertEqual(
+                    p.calculate_hydrophobicity(sequence),
+                    np.mean([p.hydrophobicity_scale.get(aa, 0) for aa in sequence]))
+                self.assertEqual(
+                    p.calculate_isoelectric_point(sequence),
+                    np.mean([p.isoelectric_points.get(aa, 6.0) for aa in sequence]))
+                self.assertEqual(
+                    p.calculate_charge_balance(sequence),
+                    abs(sum(p.charged_aa.get(aa, 0) for aa in sequence)) / len(sequence))
+                disorder = sum(p.disorder_favoring.get(aa, 0) for aa in sequence)
+                order = sum(p.order_favoring.get(aa, 0) for aa in sequence)
+                self.assertEqual(p.calculate_disorder_tendency(sequence),
+                                 round(disorder / (disorder + order), 3))
+                stable = sum(p.thermostable_aa.get(aa, 1) for aa in sequence)
+                labile = sum(p.thermolabile_aa.get(aa, 1) for aa in sequence)
+                self.assertEqual(p.calculate_thermostability_indicators(sequence)['thermostability_score'],
+                                 round(stable / (stable + labile), 3))
+    
+    def test_composition_from_histogram(self):
+        """测试组成类特征与逐次计数结果一致"""
+        p = self.predictor
+        for sequence in [GFP_SEQUENCE, INSULIN_SEQUENCE, "ACDXZBEFCC"]:
+            with self.subTest(sequence=sequence[:20]):
+                composition = p.calculate_amino_acid_composition(sequence)
+                for aa, data in composition.items():
+                    self.assertEqual(data['count'], sequence.count(aa))
+                
+                distribution = p.calculate_aa_category_distribution(sequence)
+                for category, aa_set in p.aa_categories.items():
+                    self.assertEqual(distribution[category]['count'],
+                                     sum(1 for aa in sequence if aa in aa_set))
+                
+                structure = p.calculate_secondary_structure_tendency(sequence)
+                helix_count = sum(1 for aa in sequence if aa in 'AELKMQ')
+                self.assertEqual(structure['helix_tendency'],
+                                 round(helix_count / len(sequence) * 100, 2))
+                
+                thermo = p.calculate_thermostability_indicators(sequence)
+                self.assertEqual(thermo['potential_disulfide_bonds'], sequence.count('C') // 2)
+    
+    def test_empty_sequence_defaults(self):
+        """测试空序列默认值"""
+        self.assertEqual(self.predictor.calculate_hydrophobicity(""), 0)
+        self.assertEqual(self.predictor.calculate_isoelectric_point(""), 6.0)
+        self.assertEqual(self.predictor.calculate_disorder_tendency(""), 0.5)
+
+
+
+class TestPredictionContext(unittest.TestCase):
+    """预测上下文测试：每项昂贵分析每条序列只执行一次"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor()
+    
+    def test_expensive_calls_once_per_prediction(self):
+        """测试 predict_folding 的调用次数 (BioPython参照后端)"""
+        p = ProteinFoldingPredictor(analysis_backend="biopython")
+        with patch.object(ai.predictor, 'ProteinAnalysis', wraps=ai.predictor.ProteinAnalysis) as analysis, \
+                patch.object(ai.predictor, 'molecular_weight', wraps=ai.predictor.molecular_weight) as mw, \
+                patch.object(p, 'clean_sequence', wraps=p.clean_sequence) as clean, \
+                patch.object(p, '_validate_clean_sequence', wraps=p._validate_clean_sequence) as validate, \
+                patch.object(p.feature_engine, 'compute', wraps=p.feature_engine.compute) as compute:
+            result = p.predict_folding(GFP_SEQUENCE)
+        
+        self.assertNotIn('error', result)
+        self.assertEqual(analysis.call_count, 1)
+        self.assertEqual(mw.call_count, 1)
+        self.assertEqual(clean.call_count, 1)
+        self.assertEqual(validate.call_count, 1)
+        self.assertEqual(compute.call_count, 1)
+    
+    def test_native_calls_once_per_prediction(self):
+        """测试默认后端每个内核只调用一次且不调用 BioPython"""
+        with patch.object(ai.predictor, 'ProteinAnalysis', wraps=ai.predictor.ProteinAnalysis) as analysis, \
+                patch.object(ai.predictor, 'instability_index', wraps=ai.predictor.instability_index) as ii, \
+                patch.object(ai.predictor, 'protein_molecular_weight',
+                             wraps=ai.predictor.protein_molecular_weight) as mw:
+            self.predictor.predict_folding(GFP_SEQUENCE)
+        
+        self.assertEqual(analysis.call_count, 0)
+        self.assertEqual(ii.call_count, 1)
+        self.assertEqual(mw.call_count, 1)
+    
+    def test_batch_calls_once_per_sequence(self):
+        """测试批量预测中每条序列只分析一次"""
+        p = ProteinFoldingPredictor(analysis_backend="biopython")
+        with patch.object(ai.predictor, 'ProteinAnalysis', wraps=ai.predictor.ProteinAnalysis) as analysis, \
+                patch.object(ai.predictor, 'molecular_weight', wraps=ai.predictor.molecular_weight) as mw:
+            p.predict_folding_batch([GFP_SEQUENCE, INSULIN_SEQUENCE])
+        
+        self.assertEqual(analysis.call_count, 2)
+        self.assertEqual(mw.call_count, 2)
+    
+    def test_context_matches_sequence_input(self):
+        """测试传入上下文与传入序列结果一致"""
+        p = self.predictor
+        context = p.build_context(INSULIN_SEQUENCE)
+        self.assertEqual(p.calculate_hydrophobicity(context), p.calculate_hydrophobicity(INSULIN_SEQUENCE))
+        self.assertEqual(p.calculate_amino_acid_composition(context),
+                         p.calculate_amino_acid_composition(INSULIN_SEQUENCE))
+        self.assertEqual(p.calculate_thermostability_indicators(context),
+                         p.calculate_thermostability_indicators(INSULIN_SEQUENCE))
+
+
+
+class TestNativeKernels(unittest.TestCase):
+    """原生不稳定性指数/分子量内核测试"""
+    
+    def setUp(self):
+        self.native = ProteinFoldingPredictor()
+        self.reference = ProteinFoldingPredictor(analysis_backend="biopython")
+    
+    def test_matches_biopython(self):
+        """测试与 BioPython 结果误差小于 1e-9"""
+        import random
+        rng = random.Random(0)
+        sequences = [GFP_SEQUENCE, INSULIN_SEQUENCE, "ACDEFGHIKLMNPQRSTVWY"] + [
+            ''.join(rng.choice(ai.predictor.AMINO_ACIDS) for _ in range(rng.randint(5, 1000)))
+            for _ in range(20)
+        ]
+        for sequence in sequences:
+            with self.subTest(sequence=sequence[:20]):
+                native = self.native.build_context(sequence)
+                reference = self.reference.build_context(sequence)
+                self.assertAlmostEqual(native.instability_index, reference.instability_index, delta=1e-9)
+                self.assertAlmostEqual(native.aromaticity, reference.aromaticity, delta=1e-9)
+                self.assertAlmostEqual(native.molecular_weight, reference.molecular_weight, delta=1e-9)
+    
+    def test_protein_molecular_weight(self):
+        """测试分子量按蛋白质计算"""
+        result = self.native.predict_folding(INSULIN_SEQUENCE)
+        self.assertAlmostEqual(result['molecular_weight'], 11980.79, places=2)
+    
+    def test_non_standard_residue_fallback(self):
+        """测试非标准残基时两个后端都回退到默认值"""
+        for predictor in (self.native, self.reference):
+            context = predictor.build_context("ACDXEFG")
+            self.assertEqual(context.instability_index, 50.0)
+            self.assertEqual(context.molecular_weight, 7 * 110)
+    
+    def test_unknown_backend(self):
+        """测试未知后端"""
+        with self.assertRaises(ValueError):
+            ProteinFoldingPredictor(analysis_backend="rust")
+
+
+
+class TestLazyEnergyPlot(unittest.TestCase):
+    """能量图按需渲染测试"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor()
+    
+    def test_profile_without_plot(self):
+        """测试不渲染时结果携带原始能量路径"""
+        with patch.object(ai.predictor, 'render_energy_plot') as render:
+            result = self.predictor.predict_folding(GFP_SEQUENCE, render_plot=False)
+        
+        render.assert_not_called()
+        self.assertEqual(result['energy_plot'], "")
+        self.assertEqual(len(result['energy_profile']), 100)
+        self.assertIsInstance(result['energy_profile'][0], float)
+    
+    def test_short_sequence_profile(self):
+        """测试短序列能量路径长度"""
+        result = self.predictor.predict_folding(INSULIN_SEQUENCE[:30], render_plot=False)
+        self.assertEqual(len(result['energy_profile']), 30)
+    
+    def test_ensure_energy_plot_renders_once(self):
+        """测试按需渲染并缓存到结果中"""
+        result = self.predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False)
+        with patch.object(ai.predictor, 'render_energy_plot', wraps=ai.predictor.render_energy_plot) as render:
+            first = ensure_energy_plot(result)
+            second = ensure_energy_plot(result)
+        
+        self.assertGreater(len(first), 0)
+        self.assertEqual(first, second)
+        self.assertEqual(result['energy_plot'], first)
+        self.assertEqual(render.call_count, 1)
+    
+    def test_error_result(self):
+        """测试错误结果没有能量图"""
+        result = self.predictor.predict_folding("", render_plot=False)
+        self.assertEqual(ensure_energy_plot(result), "")
+
+
+
+class TestDeterministicNoise(unittest.TestCase):
+    """可复现噪声测试"""
+    
+    def test_same_sequence_same_result(self):
+        """测试确定性模式下相同序列在不同实例间结果一致"""
+        first = ProteinFoldingPredictor(noise_mode="deterministic", noise_seed=7)
+        second = ProteinFoldingPredictor(noise_mode="deterministic", noise_seed=7)
+        
+        # 先预测其他序列，确认结果与调用顺序无关
+        second.predict_folding(INSULIN_SEQUENCE, render_plot=False)
+        self.assertEqual(first.predict_folding(GFP_SEQUENCE, render_plot=False),
+                         second.predict_folding(GFP_SEQUENCE, render_plot=False))
+    
+    def test_profile_matches_prediction(self):
+        """测试单独计算的能量路径与完整预测一致"""
+        predictor = ProteinFoldingPredictor(noise_mode="deterministic")
+        result = predictor.predict_folding(GFP_SEQUENCE.lower(), render_plot=False)
+        
+        self.assertEqual(predictor.calculate_energy_profile(GFP_SEQUENCE).tolist(), result['energy_profile'])
+    
+    def test_seed_changes_noise(self):
+        """测试全局种子改变噪声"""
+        first = ProteinFoldingPredictor(noise_mode="deterministic", noise_seed=1)
+        second = ProteinFoldingPredictor(noise_mode="deterministic", noise_seed=2)
+        
+        self.assertNotEqual(first.calculate_energy_profile(GFP_SEQUENCE).tolist(),
+                            second.calculate_energy_profile(GFP_SEQUENCE).tolist())
+    
+    def test_noise_off(self):
+        """测试关闭噪声时能量路径只含确定性部分"""
+        predictor = ProteinFoldingPredictor(noise_mode="off")
+        profile = predictor.calculate_energy_profile(INSULIN_SEQUENCE)
+        
+        codes = encode_sequence(INSULIN_SEQUENCE[:100])
+        hydrophobicity = predictor.feature_engine.gather(codes)[predictor.feature_engine.columns['hydrophobicity']]
+        expected = -hydrophobicity * 0.5 + np.sin(np.arange(len(codes)) * 0.3) * 0.2
+        np.testing.assert_array_equal(profile, expected)
+        self.assertEqual(predictor.calculate_stability_score(INSULIN_SEQUENCE),
+                         predictor.calculate_stability_score(INSULIN_SEQUENCE))
+    
+    def test_noise_bounds(self):
+        """测试噪声幅度不变"""
+        noisy = ProteinFoldingPredictor(noise_mode="deterministic")
+        quiet = ProteinFoldingPredictor(noise_mode="off")
+        
+        difference = noisy.calculate_energy_profile(GFP_SEQUENCE) - quiet.calculate_energy_profile(GFP_SEQUENCE)
+        self.assertTrue(np.all(np.abs(difference) <= 0.1))
+        self.assertLessEqual(abs(noisy.calculate_stability_score(GFP_SEQUENCE)
+                                 - quiet.calculate_stability_score(GFP_SEQUENCE)), 0.051)
+    
+    def test_invalid_noise_mode(self):
+        """测试未知噪声模式"""
+        with self.assertRaises(ValueError):
+            ProteinFoldingPredictor(noise_mode="chaotic")
+
+
+
+class TestResultCache(unittest.TestCase):
+    """预测结果缓存测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "predictions.db")
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_hit_returns_same_result(self):
+        """测试命中缓存时结果与直接计算一致，且不重复计算"""
+        cache = PredictionCache()
+        predictor = ProteinFoldingPredictor(noise_mode="deterministic", result_cache=cache)
+        uncached = ProteinFoldingPredictor(noise_mode="deterministic")
+        
+        first = predictor.predict_folding(GFP_SEQUENCE, render_plot=False)
+        with patch.object(predictor, '_predict_clean_sequence') as compute:
+            second = predictor.predict_folding(GFP_SEQUENCE.lower(), render_plot=False)
+        
+        compute.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(second, uncached.predict_folding(GFP_SEQUENCE, render_plot=False))
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+    
+    def test_result_isolated_from_callers(self):
+        """测试调用方修改结果不会污染缓存"""
+        predictor = ProteinFoldingPredictor(noise_mode="off", result_cache=PredictionCache())
+        
+        first = predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False)
+        first['amino_acid_composition']['A']['count'] = -1
+        second = predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False)
+        
+        self.assertGreater(second['amino_acid_composition']['A']['count'], 0)
+    
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = PredictionCache(max_entries=2)
+        predictor = ProteinFoldingPredictor(noise_mode="off", result_cache=cache)
+        
+        predictor.predict_folding(GFP_SEQUENCE, render_plot=False)
+        predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False)
+        predictor.predict_folding(GFP_SEQUENCE, render_plot=False)
+        predictor.predict_folding("ACDEFGHIKLMNPQRSTVWY", render_plot=False)
+        
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats.evictions, 1)
+        # 胰岛素最久未使用，被淘汰
+        predictor.predict_folding(GFP_SEQUENCE, render_plot=False)
+        predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False)
+        self.assertEqual(cache.stats.to_dict()['hits'], 2)
+        self.assertEqual(cache.stats.misses, 4)
+    
+    def test_key_includes_config(self):
+        """测试不同配置的结果互不命中"""
+        cache = PredictionCache()
+        ProteinFoldingPredictor(noise_mode="deterministic", noise_seed=1, result_cache=cache).predict_folding(
+            GFP_SEQUENCE, render_plot=False)
+        ProteinFoldingPredictor(noise_mode="deterministic", noise_seed=2, result_cache=cache).predict_folding(
+            GFP_SEQUENCE, render_plot=False)
+        
+        self.assertEqual(cache.stats.hits, 0)
+        self.assertEqual(len(cache), 2)
+        self.assertNotEqual(cache_key(GFP_SEQUENCE, {"version": "1"}), cache_key(GFP_SEQUENCE, {"version": "2"}))
+    
+    def test_plot_stored_separately(self):
+        """测试能量图单独缓存，数值结果不含PNG"""
+        cache = PredictionCache()
+        predictor = ProteinFoldingPredictor(noise_mode="off", result_cache=cache)
+        
+        predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False)
+        with patch.object(ai.predictor, 'render_energy_plot', wraps=ai.predictor.render_energy_plot) as render:
+            first = predictor.predict_folding(INSULIN_SEQUENCE)
+            second = predictor.predict_folding(INSULIN_SEQUENCE)
+        
+        self.assertEqual(render.call_count, 1)
+        self.assertGreater(len(first['energy_plot']), 0)
+        self.assertEqual(first['energy_plot'], second['energy_plot'])
+        self.assertEqual(predictor.predict_folding(INSULIN_SEQUENCE, render_plot=False)['energy_plot'], "")
+        self.assertEqual((cache.stats.plot_hits, cache.stats.plot_misses), (1, 1))
+    
+    def test_disk_tier_survives_restart(self):
+        """测试SQLite持久层在新的缓存实例中命中"""
+        first = ProteinFoldingPredictor(noise_mode="deterministic",
+                                        result_cache=PredictionCache(db_path=self.db_path))
+        expected = first.predict_folding(GFP_SEQUENCE)
+        
+        cache = PredictionCache(db_path=self.db_path)
+        second = ProteinFoldingPredictor(noise_mode="deterministic", result_cache=cache)
+        with patch.object(second, '_predict_clean_sequence') as compute:
+            result = second.predict_folding(GFP_SEQUENCE)
+        
+        compute.assert_not_called()
+        self.assertEqual(result, expected)
+        self.assertEqual(cache.stats.disk_hits, 1)
+        self.assertEqual(cache.stats.plot_hits, 1)
+    
+    def test_disk_tier_reuses_connections(self):
+        """测试持久层的读写复用连接池中的长连接，而不是每次新建连接"""
+        cache = PredictionCache(max_entries=1, max_plots=1, db_path=self.db_path)
+        for index in range(20):
+            cache.put(f"key{index}", {"value": index})
+        created = cache._pool.connections_created
+        
+        for index in range(20):
+            self.assertEqual(cache.get(f"key{index}"), {"value": index, "energy_plot": ""})
+        
+        self.assertEqual(cache.stats.disk_hits, 20)
+        self.assertEqual(cache._pool.connections_created, created)
+    
+    def test_batch_uses_cache(self):
+        """测试批量预测跨批次复用缓存"""
+        cache = PredictionCache()
+        predictor = ProteinFoldingPredictor(noise_mode="off", result_cache=cache)
+        
+        predictor.predict_folding_batch([GFP_SEQUENCE, INSULIN_SEQUENCE, GFP_SEQUENCE])
+        results = predictor.predict_folding_batch([INSULIN_SEQUENCE, ""])
+        
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(results[0]['sequence_length'], len(INSULIN_SEQUENCE))
+    
+    def test_random_noise_rejected(self):
+        """测试随机噪声模式不能使用缓存"""
+        with self.assertRaises(ValueError):
+            ProteinFoldingPredictor(result_cache=PredictionCache())
+
+
+
+class TestWindowProfiles(unittest.TestCase):
+    """滑动窗口性质曲线测试"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor()
+    
+    def naive_profile(self, sequence, window_size, name):
+        """逐窗口重新求平均的参照实现"""
+        values = []
+        for start in range(len(sequence) - window_size + 1):
+            window = sequence[start:start + window_size]
+            if name == "disorder":
+                disorder = sum(self.predictor.disorder_favoring.get(aa, 0) for aa in window)
+                order = sum(self.predictor.order_favoring.get(aa, 0) for aa in window)
+                values.append(disorder / (disorder + order) if disorder + order > 0 else 0.5)
+            else:
+                scale = {"hydrophobicity": self.predictor.hydrophobicity_scale,
+                         "flexibility": self.predictor.flexibility_index}[name]
+                values.append(np.mean([scale.get(aa, 0) for aa in window]))
+        return np.array(values)
+    
+    def test_matches_naive_windows(self):
+        """测试前缀和结果与逐窗口平均一致，多个窗口大小一次返回"""
+        profiles = self.predictor.calculate_window_profiles(GFP_SEQUENCE, window_sizes=(1, 7, 21))
+        
+        self.assertEqual(set(profiles), {1, 7, 21})
+        for window_size, by_name in profiles.items():
+            for name, profile in by_name.items():
+                self.assertEqual(len(profile), len(GFP_SEQUENCE) - window_size + 1)
+                np.testing.assert_allclose(profile, self.naive_profile(GFP_SEQUENCE, window_size, name),
+                                           rtol=0, atol=1e-9)
+    
+    def test_window_of_whole_sequence(self):
+        """测试窗口等于序列长度时与全局平均一致"""
+        length = len(INSULIN_SEQUENCE)
+        profile = self.predictor.calculate_hydrophobicity_profile(INSULIN_SEQUENCE, window_size=length)
+        
+        self.assertEqual(len(profile), 1)
+        self.assertAlmostEqual(profile[0], self.predictor.calculate_hydrophobicity(INSULIN_SEQUENCE), places=9)
+        self.assertEqual(len(self.predictor.calculate_flexibility_profile(INSULIN_SEQUENCE, length + 1)), 0)
+        self.assertAlmostEqual(self.predictor.calculate_disorder_profile(INSULIN_SEQUENCE, length)[0],
+                               self.predictor.calculate_disorder_tendency(INSULIN_SEQUENCE), places=3)
+    
+    def test_batch_padding_and_mask(self):
+        """测试批量曲线与逐条计算一致，并按长度掩码填充"""
+        sequences = [GFP_SEQUENCE, "MKV", INSULIN_SEQUENCE, "", GFP_SEQUENCE[:30]]
+        batch = self.predictor.calculate_window_profiles_batch(sequences, window_size=9, pad_value=np.nan)
+        
+        self.assertEqual(batch.lengths.tolist(), [230, 0, 102, 0, 22])
+        self.assertEqual(batch.mask.shape, (5, 230))
+        for index, sequence in enumerate(sequences):
+            expected = self.predictor.calculate_window_profiles(sequence, (9,))[9]
+            length = batch.lengths[index]
+            for name in expected:
+                row = batch.profiles[name][index]
+                np.testing.assert_allclose(row[:length], expected[name], rtol=0, atol=1e-9)
+                self.assertTrue(np.isnan(row[length:]).all())
+            self.assertEqual(batch.mask[index].sum(), length)
+    
+    def test_invalid_arguments(self):
+        """测试无效的窗口大小与曲线名称"""
+        with self.assertRaises(ValueError):
+            self.predictor.calculate_window_profiles(GFP_SEQUENCE, window_sizes=(0,))
+        with self.assertRaises(ValueError):
+            self.predictor.calculate_window_profiles(GFP_SEQUENCE, properties=("charge_density",))
+        with self.assertRaises(ValueError):
+            self.predictor.calculate_window_profiles_batch([GFP_SEQUENCE], window_size=-1)
+
+
+
+class TestMutationScan(unittest.TestCase):
+    """单点饱和突变扫描测试"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor(noise_mode="off")
+    
+    def full_score(self, sequence):
+        """完整构建上下文计算的未取整评分"""
+        context = self.predictor.build_context(sequence)
+        score = ai.predictor.base_stability_score(
+            len(sequence), self.predictor.calculate_hydrophobicity(context),
+            self.predictor.calculate_charge_balance(context), context.instability_index,
+            context.aromaticity, context.molecular_weight)
+        return min(1.0, max(0.0, score))
+    
+    def test_matches_full_recomputation(self):
+        """测试增量更新与逐个突变体完整计算一致 (含首尾位点)"""
+        scan = self.predictor.scan_point_mutations(INSULIN_SEQUENCE)
+        
+        self.assertEqual(scan.deltas.shape, (len(INSULIN_SEQUENCE), 20))
+        for position in (0, 1, 37, len(INSULIN_SEQUENCE) - 1):
+            for index, aa in enumerate(AMINO_ACIDS):
+                mutant = INSULIN_SEQUENCE[:position] + aa + INSULIN_SEQUENCE[position + 1:]
+                self.assertAlmostEqual(scan.scores[position, index], self.full_score(mutant), places=12)
+    
+    def test_wild_type_delta_zero(self):
+        """测试野生型位置变化为0，野生型评分与预测一致"""
+        scan = self.predictor.scan_point_mutations(GFP_SEQUENCE.lower())
+        codes = encode_sequence(GFP_SEQUENCE)
+        
+        self.assertTrue(np.all(scan.deltas[np.arange(len(codes)), codes] == 0))
+        self.assertEqual(round(scan.wild_type_score, 3), self.predictor.calculate_stability_score(GFP_SEQUENCE))
+    
+    def test_top_mutations(self):
+        """测试排序的突变列表不含野生型"""
+        scan = self.predictor.scan_point_mutations(INSULIN_SEQUENCE)
+        best = scan.top_mutations(5)
+        worst = scan.top_mutations(5, stabilizing=False)
+        
+        self.assertEqual(len(best), 5)
+        self.assertGreaterEqual(best[0][1], best[-1][1])
+        self.assertLessEqual(worst[0][1], worst[-1][1])
+        self.assertAlmostEqual(best[0][1], scan.deltas.max())
+        for name, _ in best + worst:
+            self.assertNotEqual(name[0], name[-1])
+    
+    def test_invalid_sequence(self):
+        """测试无效序列抛出 ValueError"""
+        with self.assertRaises(ValueError):
+            self.predictor.scan_point_mutations("MKV")
+
+
+
+class TestSequenceCleaning(unittest.TestCase):
+    """查表清理与验证测试"""
+    
+    def reference_clean(self, sequence):
+        return ''.join(c.upper() for c in sequence if c.isalpha())
+    
+    def test_matches_reference(self):
+        """测试与逐字符清理结果一致，并一次得到无效字符"""
+        from ai.predictor import clean_residues
+        rng = np.random.default_rng(3)
+        alphabet = list(AMINO_ACIDS + AMINO_ACIDS.lower() + "BJOUXZbjouxz0123456789 \t\n>*-_.")
+        inputs = [''.join(rng.choice(alphabet, size=n)) for n in (0, 1, 50, 1000)]
+        inputs += ["mkv lla\n", "MKVÉLLß", "ＭＫＶ", "\x00\x7fAC"]
+        for sequence in inputs:
+            with self.subTest(sequence=sequence[:20]):
+                cleaned, invalid = clean_residues(sequence)
+                expected = self.reference_clean(sequence)
+                self.assertEqual(cleaned, expected)
+                self.assertEqual(invalid, set(expected) - set(AMINO_ACIDS))
+    
+    def test_invalid_characters_message(self):
+        """测试无效字符的错误信息"""
+        predictor = ProteinFoldingPredictor()
+        self.assertEqual(predictor.validate_sequence("mkvxb lla")[1], "序列包含无效字符: B, X")
+        self.assertEqual(predictor.validate_sequence("MKVLLÉ")[1], "序列包含无效字符: É")
+        self.assertEqual(predictor.validate_sequence("MKV LLA"), (True, ""))
+    
+    def test_cleaned_once_per_prediction(self):
+        """测试一次预测中每条输入只清理一次"""
+        predictor = ProteinFoldingPredictor()
+        with patch.object(ai.predictor, 'clean_residues', wraps=ai.predictor.clean_residues) as clean:
+            predictor.predict_folding(GFP_SEQUENCE.lower())
+            predictor.calculate_hydrophobicity(GFP_SEQUENCE.lower())
+            predictor.calculate_energy_profile(GFP_SEQUENCE.lower())
+        self.assertEqual(clean.call_count, 1)
+
+
+class TestLongSequenceMode(unittest.TestCase):
+    """长序列模式测试"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor(noise_mode="off", long_sequence_mode=True)
+        rng = np.random.default_rng(7)
+        self.long_sequence = ''.join(rng.choice(list(AMINO_ACIDS), size=40000))
+    
+    def test_length_limits(self):
+        """测试默认模式仍限制1000个氨基酸，长序列模式放宽到 LONG_SEQUENCE_MAX_LENGTH"""
+        default = ProteinFoldingPredictor(noise_mode="off")
+        self.assertIn("error", default.predict_folding(GFP_SEQUENCE * 5, render_plot=False))
+        self.assertTrue(self.predictor.validate_sequence(self.long_sequence)[0])
+        
+        too_long = "A" * (ai.predictor.LONG_SEQUENCE_MAX_LENGTH + 1)
+        self.assertIn("最多支持100000个氨基酸", self.predictor.validate_sequence(too_long)[1])
+    
+    def test_chunked_features_match_direct(self):
+        """测试分块计算的特征与整体计算一致"""
+        codes = encode_sequence(self.long_sequence)
+        features = self.predictor.feature_engine.compute(codes)
+        direct = self.predictor.feature_engine.gather(codes)
+        
+        for name, k in self.predictor.feature_engine.columns.items():
+            self.assertAlmostEqual(features.means[name], direct[k].mean(), places=9)
+        dipeptides = ai.predictor.DIWV_MATRIX[codes[:-1], codes[1:]].sum()
+        self.assertAlmostEqual(ai.predictor.instability_index(codes), 10.0 / len(codes) * dipeptides, places=9)
+    
+    def test_full_length_energy_profile(self):
+        """测试长序列模式的能量路径覆盖全长，前100个值与默认模式一致"""
+        result = self.predictor.predict_folding(self.long_sequence, render_plot=False)
+        default = ProteinFoldingPredictor(noise_mode="off")
+        
+        self.assertEqual(result["sequence_length"], len(self.long_sequence))
+        self.assertEqual(len(result["energy_profile"]), len(self.long_sequence))
+        self.assertEqual(result["energy_profile"][:100], default.calculate_energy_profile(self.long_sequence[:1000]).tolist())
+        self.assertTrue(ensure_energy_plot(result))
+    
+    def test_cache_config(self):
+        """测试只有启用长序列模式时缓存配置才改变"""
+        self.assertNotIn("long_sequence_mode", ProteinFoldingPredictor().cache_config())
+        self.assertTrue(self.predictor.cache_config()["long_sequence_mode"])
+
+
+class TestEnergyPlotRenderer(unittest.TestCase):
+    """复用画布的能量图渲染器测试"""
+    
+    def setUp(self):
+        from ai.energy_plot import EnergyPlotRenderer
+        self.renderer = EnergyPlotRenderer()
+    
+    def test_renders_png(self):
+        """测试输出为PNG"""
+        import base64
+        image = base64.b64decode(self.renderer.render([0.5, -1.0, -0.7, 1.2, 0.1]))
+        self.assertTrue(image.startswith(b'\x89PNG'))
+    
+    def test_reuses_surface(self):
+        """测试同一线程复用画布且不创建 pyplot 图"""
+        import matplotlib.pyplot as plt
+        figures_before = len(plt.get_fignums())
+        self.renderer.render([0.1] * 10)
+        surface = self.renderer._surface()
+        self.renderer.render([-1.0] * 80)
+        
+        self.assertIs(self.renderer._surface(), surface)
+        self.assertEqual(len(plt.get_fignums()), figures_before)
+        self.assertEqual(len(surface.line.get_xdata()), 80)
+    
+    def test_concurrent_renders(self):
+        """测试多线程并发渲染结果与单线程一致"""
+        from concurrent.futures import ThreadPoolExecutor
+        profiles = [[(i * j) % 7 - 3.0 for j in range(60)] for i in range(8)]
+        expected = [self.renderer.render(profile) for profile in profiles]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(self.renderer.render, profiles))
+        self.assertEqual(results, expected)
+    
+    def test_empty_profile(self):
+        """测试空能量路径"""
+        self.assertGreater(len(self.renderer.render([])), 0)
+    
+    def test_min_max_decimation(self):
+        """测试长能量路径按最小/最大值抽取，保留极值且位置递增"""
+        from ai.energy_plot import decimate_min_max
+        values = np.random.default_rng(0).normal(size=50001)
+        x, y = decimate_min_max(values, 2000)
+        
+        self.assertLessEqual(len(x), 2000)
+        self.assertTrue(np.all(np.diff(x) > 0))
+        self.assertEqual((y.min(), y.max()), (values.min(), values.max()))
+        np.testing.assert_array_equal(y, values[x.astype(int)])
+        
+        self.renderer.render(values)
+        self.assertLessEqual(len(self.renderer._surface().line.get_xdata()), self.renderer.max_points)
+        self.assertEqual(self.renderer._surface().line.get_xdata()[-1], len(values) - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
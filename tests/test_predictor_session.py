@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 交互式预测会话测试
+"""
+
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+import ai.predictor
+import ai.predictor_session
+from ai.predictor import ProteinFoldingPredictor
+from ai.predictor_session import PredictorSession, diff_sequences
+
+GFP_SEQUENCE = "MSKGEELFTGVVPILVELDGDVNGHKFSVSGEGEGDATYGKLTLKFICTTGKLPVPWPTLVTTFSYGVQCFSRYPDHMKQHDFFKSAMPEGYVQERTIFFKDDGNYKTRAEVKFEGDTLVNRIELKGIDFKEDGNILGHKLEYNYNSHNVYIMADKQKNGIKVNFKIRHNIEDGSVQLADHYQQNTPIGDGPVLLPDNHYLSTQSALSKDPNEKRDHMVLLEFVTAAGITHGMDELYK"
+
+
+def assert_results_close(test, actual, expected, path="result"):
+    """逐字段比较结果，浮点数允许取整边界上的差异"""
+    if isinstance(expected, dict):
+        test.assertEqual(set(actual), set(expected), path)
+        for key in expected:
+            assert_results_close(test, actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        test.assertEqual(len(actual), len(expected), path)
+        for index, (a, e) in enumerate(zip(actual, expected)):
+            assert_results_close(test, a, e, f"{path}[{index}]")
+    elif isinstance(expected, float):
+        test.assertAlmostEqual(actual, expected, delta=1.001e-3, msg=path)
+    else:
+        test.assertEqual(actual, expected, path)
+
+
+class TestDiffSequences(unittest.TestCase):
+    """序列差异测试"""
+    
+    def test_edit_kinds(self):
+        """测试替换、插入、删除以及重复残基附近的编辑"""
+        cases = [
+            ("MKVLA", "MKILA", (2, "V", "I")),
+            ("MKVLA", "MKVVLA", (3, "", "V")),
+            ("MKVLA", "MKA", (2, "VL", "")),
+            ("MKVLA", "AMKVLA", (0, "", "A")),
+            ("MKVLA", "MKVLAW", (5, "", "W")),
+            ("MKVLA", "MKVLA", (5, "", "")),
+            ("AAAA", "AAAAA", (4, "", "A")),
+        ]
+        for old, new, (start, removed, inserted) in cases:
+            with self.subTest(old=old, new=new):
+                edit = diff_sequences(old, new)
+                self.assertEqual((edit.start, edit.removed, edit.inserted), (start, removed, inserted))
+                self.assertEqual(old[:edit.start] + edit.inserted + old[edit.start + len(edit.removed):], new)
+
+
+class TestPredictorSession(unittest.TestCase):
+    """增量预测会话测试"""
+    
+    def setUp(self):
+        self.predictor = ProteinFoldingPredictor(noise_mode="deterministic")
+        self.session = PredictorSession(self.predictor)
+    
+    def test_edits_match_full_prediction(self):
+        """测试一连串编辑后的结果 (按需补全能量路径后) 与完整预测一致"""
+        sequences = [
+            GFP_SEQUENCE,
+            GFP_SEQUENCE[:50] + "A" + GFP_SEQUENCE[51:],             # 替换
+            GFP_SEQUENCE[:50] + "AWW" + GFP_SEQUENCE[51:],           # 插入
+            GFP_SEQUENCE[:50] + "AWW" + GFP_SEQUENCE[60:],           # 删除
+            "M" + GFP_SEQUENCE[:50] + "AWW" + GFP_SEQUENCE[60:],     # 开头插入
+            "M" + GFP_SEQUENCE[:50] + "AWW" + GFP_SEQUENCE[60:-1] + "C",  # 末尾替换
+        ]
+        for sequence in sequences:
+            with self.subTest(length=len(sequence)):
+                result = self.session.predict(sequence, render_plot=False)
+                self.assertEqual(result["energy_profile"], [])
+                self.session.ensure_energy_profile(result)
+                assert_results_close(self, result, self.predictor.predict_folding(sequence, render_plot=False))
+        
+        self.assertEqual(self.session.full_updates, 1)
+        self.assertEqual(self.session.incremental_updates, len(sequences) - 1)
+    
+    def test_long_sequence_mode_edits(self):
+        """测试长序列模式下全长能量路径按需生成且与完整预测一致"""
+        predictor = ProteinFoldingPredictor(noise_mode="deterministic", long_sequence_mode=True)
+        session = PredictorSession(predictor)
+        sequence = GFP_SEQUENCE * 20
+        session.predict(sequence, render_plot=False)
+        
+        sequence = sequence[:3000] + "W" + sequence[3001:]
+        result = session.predict(sequence, render_plot=False)
+        profile = session.ensure_energy_profile(result)
+        
+        self.assertEqual(len(profile), len(sequence))
+        assert_results_close(self, result, predictor.predict_folding(sequence, render_plot=False))
+        self.assertEqual(session.incremental_updates, 1)
+    
+    def test_incremental_path_skips_length_proportional_work(self):
+        """测试增量更新不重新计算全序列特征、不稳定性指数与能量路径"""
+        self.session.predict(GFP_SEQUENCE, render_plot=False)
+        with patch.object(self.predictor.feature_engine, 'compute') as compute, \
+                patch.object(ai.predictor, 'instability_index') as instability, \
+                patch.object(self.predictor, 'calculate_energy_profile') as energy_profile:
+            self.session.predict(GFP_SEQUENCE[:50] + "W" + GFP_SEQUENCE[51:], render_plot=False)
+        
+        compute.assert_not_called()
+        instability.assert_not_called()
+        energy_profile.assert_not_called()
+        self.assertEqual(self.session.incremental_updates, 1)
+    
+    def test_instability_after_many_edits(self):
+        """测试多次编辑后二肽和没有累积误差"""
+        sequence = GFP_SEQUENCE
+        for position in range(0, len(GFP_SEQUENCE), 3):
+            sequence = sequence[:position] + "W" + sequence[position + 1:]
+            result = self.session.predict(sequence, render_plot=False)
+        
+        expected = self.predictor.predict_folding(sequence, render_plot=False)
+        self.assertEqual(result["instability_index"], expected["instability_index"])
+        self.assertEqual(result["molecular_weight"], expected["molecular_weight"])
+        self.assertEqual(self.session.full_updates, 1)
+    
+    def test_large_edit_rebuilds(self):
+        """测试编辑量超过上限时完整重建"""
+        session = PredictorSession(self.predictor, max_edit_size=4)
+        session.predict(GFP_SEQUENCE, render_plot=False)
+        session.predict(GFP_SEQUENCE[:100] + "WWWWW" + GFP_SEQUENCE[100:], render_plot=False)
+        
+        self.assertEqual(session.full_updates, 2)
+        self.assertEqual(session.last_edit.inserted, "WWWWW")
+    
+    def test_invalid_sequence_keeps_state(self):
+        """测试无效输入返回错误结果且不影响后续增量更新"""
+        self.session.predict(GFP_SEQUENCE, render_plot=False)
+        self.assertIn("error", self.session.predict("MKV"))
+        
+        self.session.predict(GFP_SEQUENCE[:-1] + "A", render_plot=False)
+        self.assertEqual(self.session.incremental_updates, 1)
+    
+    def test_profile_only_for_latest_result(self):
+        """测试只为最近一次结果补全能量路径"""
+        stale = self.session.predict(GFP_SEQUENCE, render_plot=False)
+        self.session.predict(GFP_SEQUENCE[:-1] + "A", render_plot=False)
+        
+        self.assertEqual(self.session.ensure_energy_profile(stale), [])
+        self.assertEqual(self.session.ensure_energy_plot(stale), "")
+    
+    def test_plot_reused_when_profile_unchanged(self):
+        """测试能量路径不变时不重新渲染"""
+        session = PredictorSession(ProteinFoldingPredictor(noise_mode="off"))
+        with patch.object(ai.predictor_session, 'render_energy_plot', return_value="png") as render:
+            session.predict(GFP_SEQUENCE)
+            # 编辑位于前100个残基之后，能量路径不变
+            result = session.predict(GFP_SEQUENCE[:150] + "W" + GFP_SEQUENCE[151:])
+        
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(result["energy_plot"], "png")
+        self.assertEqual(len(result["energy_profile"]), 100)
+    
+    def test_biopython_backend_rebuilds(self):
+        """测试 BioPython 后端每次完整重建"""
+        session = PredictorSession(ProteinFoldingPredictor(analysis_backend="biopython"))
+        session.predict(GFP_SEQUENCE, render_plot=False)
+        session.predict(GFP_SEQUENCE[:-1] + "A", render_plot=False)
+        
+        self.assertEqual(session.full_updates, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO 并发请求合并测试 (使用本地桩服务器，不访问外网)
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from ai.database_manager import ProteinDatabaseManager
+from ai.http_client import HTTPClient
+from ai.simple_database_manager import SimpleProteinDatabaseManager
+from ai.single_flight import SingleFlight, shared_flight
+from ai.sqlite_pool import shared_pool
+from tests.test_http_client import StubServer, json_body, uniprot_entry
+
+CALLERS = 8
+
+
+def run_concurrently(fn, count=CALLERS):
+    """count 个线程同时调用 fn，返回各自的结果"""
+    barrier = threading.Barrier(count)
+    
+    def call(_):
+        barrier.wait()
+        return fn()
+    
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(call, range(count)))
+
+
+class TestSingleFlight(unittest.TestCase):
+    """SingleFlight 测试"""
+    
+    def test_concurrent_calls_share_result(self):
+        """测试并发的相同调用只执行一次，全部得到同一结果"""
+        flight = SingleFlight()
+        executions = []
+        
+        def fetch():
+            executions.append(1)
+            time.sleep(0.2)
+            return {"value": 42}
+        
+        results = run_concurrently(lambda: flight.do("key", fetch))
+        self.assertEqual(len(executions), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.stats.to_dict(), {"executed": 1, "coalesced": CALLERS - 1, "errors": 0})
+        self.assertEqual(flight.in_flight(), 0)
+        
+        # 调用完成后不再保留结果
+        self.assertEqual(flight.do("key", lambda: "again"), "again")
+        self.assertEqual(flight.stats.executed, 2)
+    
+    def test_different_keys_not_merged(self):
+        """测试不同键各自执行"""
+        flight = SingleFlight()
+        results = run_concurrently(lambda: flight.do(threading.get_ident(), lambda: time.sleep(0.05) or 1), 4)
+        self.assertEqual(results, [1] * 4)
+        self.assertEqual((flight.stats.executed, flight.stats.coalesced), (4, 0))
+    
+    def test_error_propagates_to_waiters(self):
+        """测试执行方的异常传给所有等待方，之后的调用重新执行"""
+        flight = SingleFlight()
+        
+        def failing():
+            time.sleep(0.2)
+            raise RuntimeError("upstream down")
+        
+        def call():
+            try:
+                flight.do("key", failing)
+            except RuntimeError as e:
+                return str(e)
+        
+        self.assertEqual(run_concurrently(call), ["upstream down"] * CALLERS)
+        self.assertEqual(flight.stats.errors, 1)
+        self.assertEqual(flight.do("key", lambda: "recovered"), "recovered")
+    
+    def test_do_many_overlapping_keys(self):
+        """测试批量调用按键合并：在途的键等待，其余的键一次获取"""
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+        
+        def fetch(keys):
+            calls.append(sorted(keys))
+            started.set()
+            time.sleep(0.2)
+            return {key: key * 10 for key in keys if key != 4}
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            first = executor.submit(flight.do_many, [1, 2], fetch)
+            started.wait()
+            second = executor.submit(flight.do_many, [2, 3, 4, 3], fetch)
+            single = executor.submit(flight.do, 1, lambda: "single")
+            self.assertEqual(first.result(), {1: 10, 2: 20})
+            self.assertEqual(second.result(), {2: 20, 3: 30, 4: None})
+            self.assertEqual(single.result(), 10)
+        self.assertEqual(calls, [[1, 2], [3, 4]])
+        self.assertEqual(flight.stats.to_dict(), {"executed": 2, "coalesced": 2, "errors": 0})
+        self.assertEqual(flight.in_flight(), 0)
+    
+    def test_do_many_error(self):
+        """测试批量调用出错时等待其中任一键的调用方都得到异常"""
+        flight = SingleFlight()
+        started = threading.Event()
+        
+        def failing(keys):
+            started.set()
+            time.sleep(0.2)
+            raise RuntimeError("upstream down")
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do_many, ["a", "b"], failing)
+            started.wait()
+            waiter = executor.submit(flight.do, "b", lambda: "unused")
+            for future in (leader, waiter):
+                with self.assertRaisesRegex(RuntimeError, "upstream down"):
+                    future.result()
+        self.assertEqual(flight.stats.errors, 1)
+        self.assertEqual(flight.do_many(["a"], lambda keys: {"a": 1}), {"a": 1})
+    
+    def test_shared_flight(self):
+        """测试按命名空间与路径共享"""
+        self.assertIs(shared_flight("cache.db", "A"), shared_flight(os.path.abspath("cache.db"), "A"))
+        self.assertIsNot(shared_flight("cache.db", "A"), shared_flight("cache.db", "B"))
+        self.assertIsNot(shared_flight(":memory:"), shared_flight(":memory:"))
+
+
+class TestManagerCoalescing(unittest.TestCase):
+    """数据库管理器合并并发的缓存未命中"""
+    
+    DELAY = 0.3
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "cache.db")
+        search = json_body({"results": [uniprot_entry(f"P0{i:04d}", f"Insulin {i}") for i in range(3)]})
+        self.server = StubServer({
+            "/uniprotkb/search": [(200, {}, search, self.DELAY)],
+            "/uniprotkb/P01308": [(200, {}, json_body(uniprot_entry("P01308", "Insulin")), self.DELAY)],
+        })
+        self.client = HTTPClient(per_host_limit=CALLERS)
+    
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+        shared_pool(self.db_path).close()
+        self.temp_dir.cleanup()
+    
+    def make_manager(self, manager_class):
+        """每个调用方 (会话) 使用各自的管理器实例"""
+        manager = manager_class(self.db_path)
+        manager.http = self.client
+        manager.uniprot_base_url = self.server.url
+        return manager
+    
+    def check_search(self, manager_class):
+        managers = [self.make_manager(manager_class) for _ in range(CALLERS)]
+        flights = managers[0].flights
+        self.assertTrue(all(manager.flights is flights for manager in managers))
+        before = flights.stats.to_dict()
+        
+        callers = iter(managers)
+        lock = threading.Lock()
+        
+        def search():
+            with lock:
+                manager = next(callers)
+            return manager.search_protein_by_name("insulin")
+        
+        results = run_concurrently(search)
+        self.assertEqual(self.server.hits["/uniprotkb/search"], 1)
+        self.assertEqual([[p.uniprot_id for p in result] for result in results],
+                         [["P00000", "P00001", "P00002"]] * CALLERS)
+        # 每个调用方得到各自的列表
+        self.assertEqual(len({id(result) for result in results}), CALLERS)
+        self.assertEqual(flights.stats.executed - before["executed"], 1)
+        self.assertEqual(flights.stats.coalesced - before["coalesced"], CALLERS - 1)
+    
+    def test_search_database_manager(self):
+        """测试 ProteinDatabaseManager 并发的相同搜索只请求一次"""
+        self.check_search(ProteinDatabaseManager)
+    
+    def test_search_simple_database_manager(self):
+        """测试 SimpleProteinDatabaseManager 并发的相同搜索只请求一次"""
+        self.check_search(SimpleProteinDatabaseManager)
+    
+    def test_id_lookup(self):
+        """测试并发的相同 ID 查询只请求一次"""
+        manager = self.make_manager(SimpleProteinDatabaseManager)
+        results = run_concurrently(lambda: manager.get_protein_by_uniprot_id("P01308"))
+        self.assertEqual({protein.name for protein in results}, {"Insulin"})
+        self.assertEqual(self.server.hits["/uniprotkb/P01308"], 1)
+        self.assertEqual(manager.flights.stats.coalesced, CALLERS - 1)
+    
+    def test_bulk_lookup(self):
+        """测试并发的相同批量查询合并为一次获取"""
+        manager = self.make_manager(ProteinDatabaseManager)
+        results = run_concurrently(lambda: manager.get_proteins_by_uniprot_ids(["P01308"]), 4)
+        self.assertEqual([[p.uniprot_id for p in result] for result in results], [["P01308"]] * 4)
+        self.assertEqual(self.server.hits["/uniprotkb/P01308"], 1)
+        self.assertEqual(manager.flights.stats.coalesced, 3)
+    
+    def test_single_and_bulk_share_id(self):
+        """测试单个查询与包含同一 ID 的批量查询共享一次获取"""
+        manager = self.make_manager(ProteinDatabaseManager)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            single = executor.submit(manager.get_protein_by_uniprot_id, "P01308")
+            time.sleep(self.DELAY / 3)
+            bulk = executor.submit(manager.get_proteins_by_uniprot_ids, ["P01308", "P99999"])
+            self.assertEqual(single.result().name, "Insulin")
+            self.assertEqual([p.uniprot_id for p in bulk.result()], ["P01308"])
+        self.assertEqual(self.server.hits["/uniprotkb/P01308"], 1)
+        self.assertEqual(self.server.hits["/uniprotkb/P99999"], 1)
+    
+    def test_overlapping_bulk_lookups(self):
+        """测试未命中集合部分重叠的批量查询，重叠的 ID 只获取一次"""
+        manager = self.make_manager(SimpleProteinDatabaseManager)
+        for missing in ("P99999", "P88888"):
+            # 不存在的 ID 不写入缓存，延迟响应使三个调用在时间上重叠
+            self.server.routes[f"/uniprotkb/{missing}"] = [(404, {}, b"", self.DELAY)]
+        batches = [["P01308", "P99999"], ["P01308", "P88888"], ["P99999", "P88888", "P01308"]]
+        with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            results = list(executor.map(manager.get_proteins_by_uniprot_ids, batches))
+        self.assertEqual([[p.uniprot_id for p in result] for result in results], [["P01308"]] * 3)
+        for path in ("/uniprotkb/P01308", "/uniprotkb/P99999", "/uniprotkb/P88888"):
+            self.assertEqual(self.server.hits[path], 1, path)
+    
+    def test_sequential_miss_after_flight_uses_cache(self):
+        """测试合并结束后的调用直接命中缓存，不再请求"""
+        manager = self.make_manager(ProteinDatabaseManager)
+        manager.search_protein_by_name("insulin")
+        self.assertEqual(len(manager._search_and_cache("insulin")), 3)
+        self.assertEqual(self.server.hits["/uniprotkb/search"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
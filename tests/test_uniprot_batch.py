@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ProteinFoldDAO UniProt 批量获取测试 (本地样例服务器代替 UniProt，不访问外网)
+"""
+
+import sys
+import os
+import json
+import re
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from ai.database_manager import ProteinDatabaseManager
+from ai.http_client import HTTPClient
+from ai.simple_database_manager import SimpleProteinDatabaseManager
+from ai.sqlite_pool import shared_pool
+from ai.uniprot_batch import (UNIPROT_FIELDS, accession_query, batched, fetch_accession_batches,
+                              iter_accession_entries, iter_json_array)
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "uniprot_entries.json")
+
+
+def load_fixture_entries():
+    """UniProt REST 检索响应格式的样例条目 (序列为截短片段)，按 accession 索引"""
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        return {entry["primaryAccession"]: entry for entry in json.load(f)}
+
+
+class UniProtFixtureServer:
+    """
+    模拟 UniProt /uniprotkb/search 的本地服务器
+    
+    解析 accession:(A OR B ...) 查询，按 size 分页，用 Link 头返回带游标的下一页地址；
+    entries 为 accession -> 条目的映射或按 accession 生成条目的函数。
+    记录每个请求的查询参数。
+    """
+    
+    def __init__(self, entries):
+        self.entries = entries
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                server.handle(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    
+    def lookup(self, accession):
+        if callable(self.entries):
+            return self.entries(accession)
+        return self.entries.get(accession)
+    
+    def handle(self, handler):
+        parts = urlsplit(handler.path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        with self._lock:
+            self.requests.append(params)
+        match = re.fullmatch(r"accession:\((.*)\)", params.get("query", ""))
+        if parts.path != "/uniprotkb/search" or not match:
+            handler.send_response(400)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+        
+        found = [entry for entry in map(self.lookup, match.group(1).split(" OR ")) if entry]
+        size = int(params.get("size", 25))
+        offset = int(params.get("cursor", 0))
+        body = json.dumps({"results": found[offset:offset + size]}).encode()
+        
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        if offset + size < len(found):
+            next_params = dict(params, cursor=str(offset + size))
+            handler.send_header("Link", f'<{self.url}{parts.path}?{urlencode(next_params)}>; rel="next"')
+        handler.end_headers()
+        handler.wfile.write(body)
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIncrementalParsing(unittest.TestCase):
+    """增量 JSON 数组解析"""
+    
+    def test_matches_json_loads(self):
+        """测试任意块大小下逐条解析的结果与 json.loads 一致"""
+        document = {"results": list(load_fixture_entries().values()) + [{"name": "Protéine ß", "n": [1, 2.5]}],
+                    "facets": []}
+        data = json.dumps(document, ensure_ascii=False, indent=1).encode("utf-8")
+        for size in (1, 3, 7, 64, 4096, len(data)):
+            self.assertEqual(list(iter_json_array(chunked(data, size))), document["results"])
+    
+    def test_scalars_and_empty(self):
+        """测试标量元素在块边界截断时等待后续字符，空数组与缺少数组的文档"""
+        self.assertEqual(list(iter_json_array(chunked(b'{"results": [12345, 6.5, "x", null]}', 2))),
+                         [12345, 6.5, "x", None])
+        self.assertEqual(list(iter_json_array([b'{"results": []}'])), [])
+        self.assertEqual(list(iter_json_array([b'{"messages": ["bad query"]}'])), [])
+    
+    def test_truncated_document(self):
+        """测试响应被截断时报错"""
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"results": [{"a": 1}, {"b": ']))
+    
+    def test_query_and_batching(self):
+        """测试查询构造跳过非法 accession，分批接受生成器"""
+        self.assertEqual(accession_query(["P01308", "bad id", "A0A024R161"]), "accession:(P01308 OR A0A024R161)")
+        self.assertIsNone(accession_query(["x) OR (y"]))
+        self.assertEqual(list(batched((str(i) for i in range(5)), 2)), [["0", "1"], ["2", "3"], ["4"]])
+
+
+class TestUniProtBatchFetch(unittest.TestCase):
+    """批量 accession 检索"""
+    
+    def setUp(self):
+        self.entries = load_fixture_entries()
+        self.server = UniProtFixtureServer(self.entries)
+        self.client = HTTPClient()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "cache.db")
+    
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+        shared_pool(self.db_path).close()
+        self.temp_dir.cleanup()
+    
+    def test_pagination_and_fields(self):
+        """测试按 Link 头翻页取完全部条目，且只请求缓存需要的字段"""
+        accessions = list(self.entries) + ["Q99999"]
+        entries = list(iter_accession_entries(self.client, self.server.url, accessions, page_size=3))
+        self.assertEqual([entry["primaryAccession"] for entry in entries], list(self.entries))
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual([request.get("cursor") for request in self.server.requests], [None, "3", "6"])
+        for request in self.server.requests:
+            self.assertEqual(request["fields"], ",".join(UNIPROT_FIELDS))
+            self.assertEqual(request["format"], "json")
+    
+    def test_batches(self):
+        """测试分批获取，每批一个检索请求，出错的批次记录错误"""
+        accessions = list(self.entries)
+        batches = list(fetch_accession_batches(self.client, self.server.url, accessions, batch_size=3, max_workers=2))
+        self.assertEqual(sorted(len(batch.entries) for batch in batches), [1, 3, 3])
+        self.assertTrue(all(batch.error is None for batch in batches))
+        self.assertEqual(len(self.server.requests), 3)
+        
+        failing = list(fetch_accession_batches(self.client, f"{self.server.url}/missing", accessions[:2]))
+        self.assertEqual(len(failing), 1)
+        self.assertIsNotNone(failing[0].error)
+    
+    def check_warm_cache(self, manager_class):
+        manager = manager_class(self.db_path)
+        manager.http = self.client
+        manager.uniprot_base_url = self.server.url
+        self.assertEqual(manager.warm_cache(iter(self.entries), batch_size=3), len(self.entries))
+        self.assertEqual(len(self.server.requests), 3)
+        
+        insulin = manager._get_cached_protein_by_id("P01308")
+        self.assertEqual((insulin.name, insulin.length, insulin.molecular_weight, insulin.pdb_ids,
+                          insulin.alphafold_id), ("Insulin", 110, 11981, ["1ZNI", "3I40"], "P01308"))
+        self.assertEqual([p.uniprot_id for p in manager._get_cached_proteins("hemoglobin")],
+                         ["P68871", "P69905"])
+    
+    def test_warm_cache_database_manager(self):
+        """测试 ProteinDatabaseManager 预热缓存"""
+        self.check_warm_cache(ProteinDatabaseManager)
+    
+    def test_warm_cache_simple_database_manager(self):
+        """测试 SimpleProteinDatabaseManager 预热缓存"""
+        self.check_warm_cache(SimpleProteinDatabaseManager)
+    
+    def test_bulk_lookup_uses_batch_search(self):
+        """测试未命中较多时批量接口改用 accession 检索"""
+        def entry_for(accession):
+            entry = dict(self.entries["P01308"], primaryAccession=accession)
+            return entry if accession != "Q00007" else None
+        
+        self.server.entries = entry_for
+        manager = ProteinDatabaseManager(self.db_path)
+        manager.http = self.client
+        manager.uniprot_base_url = self.server.url
+        ids = [f"Q{i:05d}" for i in range(30)]
+        proteins = manager.get_proteins_by_uniprot_ids(ids)
+        
+        # Q00007 不在检索结果中，再逐条请求 (样例服务器返回 400) 后省略
+        self.assertEqual([p.uniprot_id for p in proteins], [i for i in ids if i != "Q00007"])
+        searches = [request for request in self.server.requests if "query" in request]
+        self.assertEqual(len(searches), 1)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(len(manager._get_cached_proteins_by_ids(ids)), 29)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -351,8 +351,8 @@ class BlockchainManager:
                 return True
         return False
 
-def display_prediction_result(result):
-    """显示预测结果 - iOS风格"""
+def display_prediction_result(result, ensure_energy_plot):
+    """显示预测结果 - iOS风格 (ensure_energy_plot 由 main 传入产生该结果的预测会话的方法)"""
     if "error" in result:
         st.markdown(f"""
         <div class="error-message">
@@ -410,9 +410,11 @@ def display_prediction_result(result):
     with col_right:
         # 能量图显示在右侧，与下面图表大小一致
         st.markdown("### 📈 能量路径图")
-        if result['energy_plot']:
+        # 能量图在面板显示时才按需渲染，渲染结果写回session中的结果，重跑时复用
+        energy_plot = ensure_energy_plot(result)
+        if energy_plot:
             try:
-                image_data = base64.b64decode(result['energy_plot'])
+                image_data = base64.b64decode(energy_plot)
                 image = Image.open(io.BytesIO(image_data))
                 # 设置固定尺寸，与下面的图表保持一致
                 st.image(image, caption="蛋白折叠能量路径", width=400)
@@ -705,7 +707,7 @@ def main():
     # 在函数内部导入AI模块
     try:
         from predictor import ProteinFoldingPredictor
-        predictor = ProteinFoldingPredictor()
+        from predictor_session import PredictorSession
     except ImportError as e:
         st.error(f"无法导入AI模块: {e}")
         st.stop()
@@ -807,6 +809,16 @@ def main():
                 placeholder="输入蛋白序列，例如：MKWVTFISLLFLFSSAYS..."
             )
         
+        long_sequence_mode = st.checkbox("长序列模式", value=False,
+                                         help="最长支持10万个氨基酸，能量路径覆盖全长")
+        
+        # 预测会话跨重运行保留 (长序列模式单独一个)，编辑序列后只增量重新计算
+        session_key = 'predictor_session_long' if long_sequence_mode else 'predictor_session'
+        if session_key not in st.session_state:
+            st.session_state[session_key] = PredictorSession(
+                ProteinFoldingPredictor(long_sequence_mode=long_sequence_mode))
+        session = st.session_state[session_key]
+        
         # 预测按钮
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
@@ -815,13 +827,16 @@ def main():
         # 执行预测
         if predict_button and sequence_input:
             with st.spinner("🧬 AI正在分析蛋白序列..."):
-                result = predictor.predict_folding(sequence_input)
+                result = session.predict(sequence_input, render_plot=False)
                 st.session_state['prediction_result'] = result
+                st.session_state['prediction_session'] = session
                 st.session_state['sequence_input'] = sequence_input
         
         # 显示预测结果
         if 'prediction_result' in st.session_state:
-            display_prediction_result(st.session_state['prediction_result'])
+            # 能量路径与能量图由产生该结果的会话按需生成
+            display_prediction_result(st.session_state['prediction_result'],
+                                      st.session_state['prediction_session'].ensure_energy_plot)
             
             # 提交到DAO按钮
             if st.session_state['prediction_result'] and 'error' not in st.session_state['prediction_result']:
@@ -910,6 +925,7 @@ def main():
                 try:
                     from simple_database_manager import SimpleProteinDatabaseManager
                     db_manager = SimpleProteinDatabaseManager()
+                    db_manager.start_background_refresh()  # 主动刷新热门的过期缓存
                     
                     # 转换生物体名称
                     organism_filter = None if organism == "全部" else organism
@@ -1013,6 +1029,7 @@ def main():
                 try:
                     from simple_database_manager import SimpleProteinDatabaseManager
                     db_manager = SimpleProteinDatabaseManager()
+                    db_manager.start_background_refresh()  # 主动刷新热门的过期缓存
                     popular_proteins = db_manager.get_popular_proteins()
                     
                     if popular_proteins:
@@ -1311,7 +1328,7 @@ def main():
         with st.expander("如何输入序列？"):
             st.markdown("将氨基酸序列粘贴到“AI预测”页的文本框，或在数据库中复制。支持大小写，会自动清理空格与无关字符。")
         with st.expander("序列校验不通过怎么办？"):
-            st.markdown("检查是否存在非法字符，长度是否在 5–1000 之间；页面会提示具体原因。")
+            st.markdown("检查是否存在非法字符，长度是否在 5–1000 之间（长序列模式下最长 100000）；页面会提示具体原因。")
         with st.expander("为什么有些图表或中文字体显示警告？"):
             st.markdown("这是 Matplotlib 在当前字体下对部分字符不支持的警告，不影响核心功能，后续会内置更全面的字体集。")
         with st.expander("如何参与治理？"):
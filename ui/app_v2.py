@@ -26,7 +26,7 @@ import threading
 
 # 添加AI模块路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'ai'))
-from predictor import ProteinFoldingPredictor
+from predictor import ProteinFoldingPredictor, ensure_energy_plot
 
 # 页面配置
 st.set_page_config(
@@ -571,8 +571,10 @@ def display_ai_prediction_result(result):
     
     with col2:
         st.markdown("### 📈 能量路径可视化")
-        if result['energy_plot']:
-            image_data = base64.b64decode(result['energy_plot'])
+        # 能量图在面板显示时才按需渲染
+        energy_plot = ensure_energy_plot(result)
+        if energy_plot:
+            image_data = base64.b64decode(energy_plot)
             image = Image.open(io.BytesIO(image_data))
             st.image(image, caption="AI生成的蛋白折叠能量路径", use_container_width=True)
         else:
@@ -872,7 +874,7 @@ def main():
                 st.error("❌ 请输入蛋白序列")
             else:
                 with st.spinner("🤖 AI正在分析序列..."):
-                    result = predictor.predict_folding(sequence_input)
+                    result = predictor.predict_folding(sequence_input, render_plot=False)
                 
                 # 显示AI预测结果
                 display_ai_prediction_result(result)
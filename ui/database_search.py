@@ -15,6 +15,8 @@ class DatabaseSearchInterface:
     
     def __init__(self):
         self.db_manager = ProteinDatabaseManager()
+        # 后台主动刷新访问最多的过期缓存 (多次调用只启动一个线程)
+        self.db_manager.start_background_refresh()
     
     def render_search_interface(self):
         """渲染搜索界面"""